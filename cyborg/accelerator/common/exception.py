@@ -122,3 +122,7 @@ class MissingParameterValue(InvalidParameterValue):
 
 class InvalidAccelerator(InvalidParameterValue):
     _msg_fmt = "%(err)s"
+
+
+class SPDKRPCError(AcceleratorException):
+    _msg_fmt = _("SPDK RPC call %(method)s failed: %(err)s")
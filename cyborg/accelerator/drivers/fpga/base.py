@@ -44,7 +44,19 @@ class FPGADriver(object):
     def discover(self):
         raise NotImplementedError()
 
-    def program(self, device_path, image):
+    def get_pf_address(self, device_path):
+        """Return the PCI address of the PF a device belongs to."""
+        raise NotImplementedError()
+
+    def program(self, device_path, image, progress=None):
+        """Program a device with an image.
+
+        :param device_path: the PCI address or sysfs path of the device.
+        :param image: the path of the image file.
+        :param progress: an optional callable, called with the percentage
+                         of the image loaded as it progresses.
+        :returns: the return code of the programming tool.
+        """
         raise NotImplementedError()
 
     @classmethod
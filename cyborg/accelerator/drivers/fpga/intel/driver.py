@@ -17,11 +17,19 @@
 Cyborg Intel FPGA driver implementation.
 """
 
+import re
 import subprocess
 
+from oslo_log import log as logging
+
 from cyborg.accelerator.drivers.fpga.base import FPGADriver
 from cyborg.accelerator.drivers.fpga.intel import sysinfo
 
+LOG = logging.getLogger(__name__)
+
+# fpgaconf reports its progress as e.g. "Programming 42%".
+PROGRESS_PATTERN = re.compile(br"(\d{1,3})%")
+
 
 class IntelFPGADriver(FPGADriver):
     """Base class for FPGA drivers.
@@ -30,6 +38,7 @@ class IntelFPGADriver(FPGADriver):
        Vedor should implement their specific drivers.
     """
     VENDOR = "intel"
+    FPGACONF = ["sudo", "fpgaconf"]
 
     def __init__(self, *args, **kwargs):
         pass
@@ -37,20 +46,28 @@ class IntelFPGADriver(FPGADriver):
     def discover(self):
         return sysinfo.fpga_tree()
 
-    def program(self, device_path, image):
-        bdf = ""
+    def get_pf_address(self, device_path):
+        if sysinfo.is_bdf(device_path):
+            return sysinfo.get_pf_bdf(device_path)
         path = sysinfo.find_pf_by_vf(device_path) if sysinfo.is_vf(
             device_path) else device_path
-        if sysinfo.is_bdf(device_path):
-            bdf = sysinfo.get_pf_bdf(device_path)
-        else:
-            bdf = sysinfo.get_bdf_by_path(path)
-        bdfs = sysinfo.split_bdf(bdf)
-        cmd = ["sudo", "fpgaconf"]
+        return sysinfo.get_bdf_by_path(path)
+
+    def program(self, device_path, image, progress=None):
+        bdfs = sysinfo.split_bdf(self.get_pf_address(device_path))
+        cmd = list(self.FPGACONF)
         for i in zip(["-b", "-d", "-f"], bdfs):
             cmd.extend(i)
         cmd.append(image)
-        p = subprocess.Popen(cmd, stdout=subprocess.PIPE)
-        # FIXME Should log p.communicate(), p.stderr
+        # NOTE: subprocess is green once eventlet monkey patched it, so
+        # reading the output only blocks the current green thread.
+        p = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                             stderr=subprocess.STDOUT)
+        for line in iter(p.stdout.readline, b""):
+            LOG.debug("fpgaconf %(image)s: %(line)s",
+                      {"image": image, "line": line.rstrip()})
+            m = PROGRESS_PATTERN.search(line)
+            if m and progress:
+                progress(int(m.group(1)))
         p.wait()
         return p.returncode
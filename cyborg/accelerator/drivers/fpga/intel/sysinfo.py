@@ -19,6 +19,7 @@ Cyborg Intel FPGA driver implementation.
 
 # from cyborg.accelerator.drivers.fpga.base import FPGADriver
 
+import copy
 import glob
 import os
 import re
@@ -38,6 +39,16 @@ DEVICE_FILE_MAP = {"vendor": "vendor_id",
 DEVICE_FILE_HANDLER = {}
 DEVICE_EXPOSED = ["vendor", "device", "sriov_numvfs"]
 
+# The last scanned fpga tree and its signature, see fpga_tree().
+_TREE_CACHE = {"signature": None, "tree": None}
+# The device infos of every scanned device, keyed by its signature entry.
+_DEVICE_CACHE = {}
+
+
+def read_line(filename):
+    with open(filename) as f:
+        return f.readline().strip()
+
 
 def all_fpgas():
     # glob.glob1("/sys/class/fpga", "*")
@@ -68,8 +79,8 @@ def bdf_path_map():
     return maps
 
 
-def all_vfs_in_pf_fpgas(pf_path):
-    maps = target_symbolic_map()
+def all_vfs_in_pf_fpgas(pf_path, maps=None):
+    maps = maps or target_symbolic_map()
     vfs = glob.glob(os.path.join(pf_path, "device/virtfn*"))
     return [maps[os.path.realpath(vf)] for vf in vfs]
 
@@ -112,10 +123,6 @@ def get_pf_bdf(bdf):
 def fpga_device(path):
     infos = {}
 
-    def read_line(filename):
-        with open(filename) as f:
-            return f.readline().strip()
-
     # NOTE "In 3.x, os.path.walk is removed in favor of os.walk."
     for (dirpath, dirnames, filenames) in os.walk(path):
         for filename in filenames:
@@ -130,7 +137,42 @@ def fpga_device(path):
     return infos
 
 
+def fpga_signature():
+    """Return a cheap fingerprint of the fpga topology.
+
+    It is made of every device under SYS_FPGA, the PCI device it is bound
+    to and its number of enabled VFs, so any hotplug, rebind or SR-IOV
+    change gives a different signature. Computing it only resolves one
+    symlink and reads at most one file per device.
+    """
+    signature = {}
+    for path in all_fpgas():
+        dpath = os.path.realpath(os.path.join(path, DEVICE))
+        numvfs = os.path.join(dpath, "sriov_numvfs")
+        signature[path] = (dpath, read_line(numvfs)
+                           if os.path.exists(numvfs) else None)
+    return signature
+
+
 def fpga_tree():
+    """Return the fpga tree of the host.
+
+    The tree is only rebuilt when the fpga_signature() changed since the
+    last call, and then only the devices whose signature entry changed
+    are walked again.
+    """
+    signature = fpga_signature()
+    if signature == _TREE_CACHE["signature"]:
+        return copy.deepcopy(_TREE_CACHE["tree"])
+
+    seen = {}
+
+    def scan_device(path, dpath):
+        key = (path, ) + signature.get(path, (dpath, None))
+        if key not in _DEVICE_CACHE:
+            _DEVICE_CACHE[key] = fpga_device(dpath)
+        seen[key] = _DEVICE_CACHE[key]
+        return dict(seen[key])
 
     def gen_fpga_infos(path, vf=True):
         name = os.path.basename(path)
@@ -143,20 +185,27 @@ def fpga_tree():
                 "devices": bdf, "assignable": True,
                 "parent_devices": pf_bdf,
                 "name": name}
-        d_info = fpga_device(dpath)
+        d_info = scan_device(path, dpath)
         fpga.update(d_info)
         return fpga
 
     devs = []
     pure_pfs = all_pure_pf_fpgas()
+    maps = target_symbolic_map()
     for pf in all_pf_fpgas():
         fpga = gen_fpga_infos(pf, False)
         if pf in pure_pfs:
             fpga["assignable"] = False
             fpga["regions"] = []
-            vfs = all_vfs_in_pf_fpgas(pf)
+            vfs = all_vfs_in_pf_fpgas(pf, maps)
             for vf in vfs:
                 vf_fpga = gen_fpga_infos(vf, True)
                 fpga["regions"].append(vf_fpga)
         devs.append(fpga)
-    return devs
+
+    # Forget the devices which are gone.
+    _DEVICE_CACHE.clear()
+    _DEVICE_CACHE.update(seen)
+    _TREE_CACHE["signature"] = signature
+    _TREE_CACHE["tree"] = devs
+    return copy.deepcopy(devs)
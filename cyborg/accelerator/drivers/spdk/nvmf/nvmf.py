@@ -31,10 +31,10 @@ class NVMFDRIVER(SPDKDRIVER):
 
     def get_one_accelerator(self):
         acc_client = NvmfTgt(self.py)
-        bdevs = acc_client.get_bdevs()
-        # Display current blockdev list
-        subsystems = acc_client.get_nvmf_subsystems()
-        # Display nvmf subsystems
+        # Get the current blockdev list and nvmf subsystems in a single
+        # round-trip.
+        bdevs, subsystems = acc_client.get_many(
+            ['get_bdevs', 'get_nvmf_subsystems'])
         accelerator_obj = {
             'server': self.SERVER,
             'bdevs': bdevs,
@@ -5,6 +5,7 @@ Utils for SPDK driver.
 import glob
 import os
 import re
+import threading
 
 from oslo_config import cfg
 from oslo_log import log as logging
@@ -13,8 +14,8 @@ from cyborg.accelerator import configuration
 from cyborg.accelerator.common import exception
 from cyborg.accelerator.drivers.spdk.util.pyspdk.py_spdk import PySPDK
 from cyborg.common.i18n import _
-from pyspdk.nvmf_client import NvmfTgt
-from pyspdk.vhost_client import VhostTgt
+from cyborg.accelerator.drivers.spdk.util.pyspdk.nvmf_client import NvmfTgt
+from cyborg.accelerator.drivers.spdk.util.pyspdk.vhost_client import VhostTgt
 
 LOG = logging.getLogger(__name__)
 
@@ -37,7 +38,21 @@ accelerator_opts = [
 
     cfg.BoolOpt('remoteable',
                 default=False,
-                help=_('Remoteable is false by default'))
+                help=_('Remoteable is false by default')),
+
+    cfg.StrOpt('rpc_server_address',
+               default='/var/tmp/spdk.sock',
+               help=_('The Unix socket path, or the IP address, the SPDK '
+                      'app listens to for JSON-RPC requests')),
+
+    cfg.PortOpt('rpc_server_port',
+                default=5260,
+                help=_('The TCP port of the SPDK JSON-RPC server, when '
+                       'rpc_server_address is an IP address')),
+
+    cfg.FloatOpt('rpc_timeout',
+                 default=60.0,
+                 help=_('Timeout in seconds of the SPDK JSON-RPC calls'))
 ]
 
 CONF = cfg.CONF
@@ -49,6 +64,11 @@ SERVERS = config.safe_get('accelerator_servers')
 SERVERS_PATTERN = re.compile("|".join(["(%s)" % s for s in SERVERS]))
 SPDK_SERVER_APP_DIR = os.path.join(config.safe_get('spdk_dir'), 'app/')
 
+# The py_client of each (server, RPC address, RPC port), shared by the
+# driver instances so that their RPC connection outlives a driver call.
+_PY_CLIENTS = {}
+_PY_CLIENTS_LOCK = threading.Lock()
+
 
 def discover_servers():
     """Discover backend servers according to the CONF
@@ -168,12 +188,23 @@ def construct_null_bdev(py,
 def get_py_client(server):
     """Get the py_client instance
 
+    The instance of a server is created once and shared by the callers.
+
     :param server: server.
-    :return: Boolean.
+    :return: py_client.
     :raise: InvalidAccelerator.
     """
     if server in SERVERS:
-        py = PySPDK(server)
+        address = config.safe_get('rpc_server_address')
+        port = config.safe_get('rpc_server_port')
+        with _PY_CLIENTS_LOCK:
+            py = _PY_CLIENTS.get((server, address, port))
+            if py is None:
+                # The connection is closed on error and opened again by
+                # the next call.
+                py = PySPDK(server, address, port,
+                            config.safe_get('rpc_timeout'))
+                _PY_CLIENTS[(server, address, port)] = py
         return py
     else:
         msg = (_("Could not find %s accelerator") % server)
@@ -183,12 +214,14 @@ def get_py_client(server):
 def check_for_setup_error(py, server):
     """Check server's status
 
+    The server must be running and answer a RPC ping.
+
     :param py: py_client.
     :param server: server.
     :return: Boolean.
     :raise: AcceleratorException.
     """
-    if py.is_alive():
+    if py.is_alive(check_rpc=True):
         return True
     else:
         msg = (_("%s accelerator is down") % server)
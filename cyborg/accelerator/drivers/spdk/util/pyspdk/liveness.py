@@ -0,0 +1,96 @@
+"""
+Liveness detection of the SPDK apps.
+"""
+
+import re
+import threading
+
+import psutil
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
+
+
+def process_start_time(pid):
+    """Return the start time of a process, or None if it does not exist.
+
+    The start time tells a process from a later one reusing its pid.
+    It is read from /proc/<pid>/stat (in clock ticks since boot) where
+    available, which is much cheaper than listing all the processes.
+    """
+    try:
+        with open('/proc/%d/stat' % pid) as f:
+            stat = f.read()
+    except (IOError, OSError):
+        try:
+            return psutil.Process(pid).create_time()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+    # The command name (2nd field) may contain spaces and parentheses,
+    # the start time is the 22nd field.
+    return int(stat.rsplit(')', 1)[1].split()[19])
+
+
+class ProcessLiveness(object):
+    """Tell whether the process matching a pattern is alive.
+
+    The whole process table is only scanned to find the process the
+    first time, or when it died: the pid found is cached along with its
+    start time, and later checks only compare that start time.
+
+    :param pattern: a regex searched in the command lines.
+    :param ping: an optional callable raising if the process does not
+                 answer, e.g. a cheap RPC call.
+    """
+
+    # The (pid, start time) of the processes found so far, keyed by
+    # pattern, shared by all the instances.
+    _cache = {}
+    _lock = threading.Lock()
+
+    def __init__(self, pattern, ping=None):
+        super(ProcessLiveness, self).__init__()
+        self.pattern = pattern
+        self.ping = ping
+
+    def _scan(self):
+        regex = re.compile(self.pattern)
+        for proc in psutil.process_iter():
+            try:
+                pinfo = proc.as_dict(attrs=['pid', 'cmdline'])
+            except psutil.NoSuchProcess:
+                continue
+            if regex.search(str(pinfo.get('cmdline'))):
+                return pinfo.get('pid')
+        LOG.debug("NoSuchProcess:%s", self.pattern)
+        return None
+
+    def get_pid(self):
+        """Return the pid of the process, or None if it is not running."""
+        with self._lock:
+            cached = self._cache.get(self.pattern)
+            if cached and process_start_time(cached[0]) == cached[1]:
+                return cached[0]
+            pid = self._scan()
+            start_time = pid and process_start_time(pid)
+            if start_time is None:
+                self._cache.pop(self.pattern, None)
+                return None
+            self._cache[self.pattern] = (pid, start_time)
+            return pid
+
+    def is_alive(self, check_rpc=False):
+        """Whether the process is running.
+
+        :param check_rpc: also require the process to answer the ping.
+        """
+        if not self.get_pid():
+            return False
+        if check_rpc and self.ping is not None:
+            try:
+                self.ping()
+            except Exception as e:
+                LOG.warning("%(name)s is running but does not answer: "
+                            "%(err)s", {'name': self.pattern, 'err': e})
+                return False
+        return True
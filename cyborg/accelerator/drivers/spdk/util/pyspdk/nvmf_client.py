@@ -1,6 +1,3 @@
-import json
-
-
 class NvmfTgt(object):
 
     def __init__(self, py):
@@ -8,40 +5,30 @@ class NvmfTgt(object):
         self.py = py
 
     def get_rpc_methods(self):
-        rpc_methods = self._get_json_objs(
-            'get_rpc_methods', '10.0.2.15')
+        rpc_methods = self._get_json_objs('get_rpc_methods')
         return rpc_methods
 
     def get_bdevs(self):
-        block_devices = self._get_json_objs(
-            'get_bdevs', '10.0.2.15')
+        block_devices = self._get_json_objs('get_bdevs')
         return block_devices
 
     def delete_bdev(self, name):
-        sub_args = [name]
-        res = self.py.exec_rpc('delete_bdev', '10.0.2.15', sub_args=sub_args)
-        print res
+        params = {'name': name}
+        return self.py.exec_rpc('delete_bdev', params)
 
     def kill_instance(self, sig_name):
-        sub_args = [sig_name]
-        res = self.py.exec_rpc('kill_instance', '10.0.2.15', sub_args=sub_args)
-        print res
+        params = {'sig_name': sig_name}
+        return self.py.exec_rpc('kill_instance', params)
 
     def construct_aio_bdev(self, filename, name, block_size):
-        sub_args = [filename, name, str(block_size)]
-        res = self.py.exec_rpc(
-            'construct_aio_bdev',
-            '10.0.2.15',
-            sub_args=sub_args)
-        print res
+        params = {'filename': filename,
+                  'name': name,
+                  'block_size': int(block_size)}
+        return self.py.exec_rpc('construct_aio_bdev', params)
 
     def construct_error_bdev(self, basename):
-        sub_args = [basename]
-        res = self.py.exec_rpc(
-            'construct_error_bdev',
-            '10.0.2.15',
-            sub_args=sub_args)
-        print res
+        params = {'base_name': basename}
+        return self.py.exec_rpc('construct_error_bdev', params)
 
     def construct_nvme_bdev(
             self,
@@ -51,48 +38,31 @@ class NvmfTgt(object):
             adrfam=None,
             trsvcid=None,
             subnqn=None):
-        sub_args = ["-b", "-t", "-a"]
-        sub_args.insert(1, name)
-        sub_args.insert(2, trtype)
-        sub_args.insert(3, traddr)
+        params = {'name': name,
+                  'trtype': trtype,
+                  'traddr': traddr}
         if adrfam is not None:
-            sub_args.append("-f")
-            sub_args.append(adrfam)
+            params['adrfam'] = adrfam
         if trsvcid is not None:
-            sub_args.append("-s")
-            sub_args.append(trsvcid)
+            params['trsvcid'] = trsvcid
         if subnqn is not None:
-            sub_args.append("-n")
-            sub_args.append(subnqn)
-        res = self.py.exec_rpc(
-            'construct_nvme_bdev',
-            '10.0.2.15',
-            sub_args=sub_args)
-        return res
+            params['subnqn'] = subnqn
+        return self.py.exec_rpc('construct_nvme_bdev', params)
 
     def construct_null_bdev(self, name, total_size, block_size):
-        sub_args = [name, str(total_size), str(block_size)]
-        res = self.py.exec_rpc(
-            'construct_null_bdev',
-            '10.0.2.15',
-            sub_args=sub_args)
-        return res
+        params = {'name': name,
+                  'total_size': int(total_size),
+                  'block_size': int(block_size)}
+        return self.py.exec_rpc('construct_null_bdev', params)
 
     def construct_malloc_bdev(self, total_size, block_size):
-        sub_args = [str(total_size), str(block_size)]
-        res = self.py.exec_rpc(
-            'construct_malloc_bdev',
-            '10.0.2.15',
-            sub_args=sub_args)
-        print res
+        params = {'total_size': int(total_size),
+                  'block_size': int(block_size)}
+        return self.py.exec_rpc('construct_malloc_bdev', params)
 
     def delete_nvmf_subsystem(self, nqn):
-        sub_args = [nqn]
-        res = self.py.exec_rpc(
-            'delete_nvmf_subsystem',
-            '10.0.2.15',
-            sub_args=sub_args)
-        print res
+        params = {'nqn': nqn}
+        return self.py.exec_rpc('delete_nvmf_subsystem', params)
 
     def construct_nvmf_subsystem(
             self,
@@ -101,19 +71,27 @@ class NvmfTgt(object):
             hosts,
             serial_number,
             namespaces):
-        sub_args = [nqn, listen, hosts, serial_number, namespaces]
-        res = self.py.exec_rpc(
-            'construct_nvmf_subsystem',
-            '10.0.2.15',
-            sub_args=sub_args)
-        print res
+        # Same parsing as rpc.py: listen is a comma-separated list of
+        # 'trtype:x traddr:y trsvcid:z', hosts and namespaces are
+        # whitespace-separated lists.
+        listen_addresses = [dict(u.split(":", 1) for u in a.split())
+                            for a in listen.split(",")]
+        params = {'nqn': nqn,
+                  'listen_addresses': listen_addresses,
+                  'serial_number': serial_number}
+        if hosts:
+            params['hosts'] = hosts.split()
+        if namespaces:
+            params['namespaces'] = namespaces.split()
+        return self.py.exec_rpc('construct_nvmf_subsystem', params)
 
     def get_nvmf_subsystems(self):
-        subsystems = self._get_json_objs(
-            'get_nvmf_subsystems', '10.0.2.15')
+        subsystems = self._get_json_objs('get_nvmf_subsystems')
         return subsystems
 
-    def _get_json_objs(self, method, server_ip):
-        res = self.py.exec_rpc(method, server_ip)
-        json_obj = json.loads(res)
-        return json_obj
+    def get_many(self, methods):
+        """Call several parameterless methods in one round-trip."""
+        return self.py.exec_rpcs([(method, None) for method in methods])
+
+    def _get_json_objs(self, method):
+        return self.py.exec_rpc(method)
@@ -1,22 +1,32 @@
-import psutil
-import re
 import os
 import subprocess
 
+from oslo_log import log as logging
+
+from cyborg.accelerator.drivers.spdk.util.pyspdk.liveness import \
+    ProcessLiveness
+from cyborg.accelerator.drivers.spdk.util.pyspdk.rpc_client import \
+    JSONRPCClient
+
+LOG = logging.getLogger(__name__)
+
 
 class PySPDK(object):
 
-    def __init__(self, pname):
+    def __init__(self, pname, rpc_address='/var/tmp/spdk.sock',
+                 rpc_port=5260, rpc_timeout=60.0):
         super(PySPDK, self).__init__()
         self.pid = None
         self.pname = pname
+        self.client = JSONRPCClient(rpc_address, rpc_port, rpc_timeout)
+        self.liveness = ProcessLiveness(pname, ping=self.ping)
 
     def start_server(self, spdk_dir, server_name):
         if not self.is_alive():
             self.init_hugepages(spdk_dir)
             server_dir = os.path.join(spdk_dir, 'app/')
             file_dir = self._search_file(server_dir, server_name)
-            print file_dir
+            LOG.debug("Starting %s from %s", server_name, file_dir)
             os.chdir(file_dir)
             p = subprocess.Popen(
                 'sudo ./%s' % server_name,
@@ -28,7 +38,7 @@ class PySPDK(object):
     def init_hugepages(self, spdk_dir):
         huge_dir = os.path.join(spdk_dir, 'scripts/')
         file_dir = self._search_file(huge_dir, 'setup.sh')
-        print file_dir
+        LOG.debug("Setting up hugepages from %s", file_dir)
         os.chdir(file_dir)
         p = subprocess.Popen(
             'sudo ./setup.sh',
@@ -45,38 +55,37 @@ class PySPDK(object):
                     return dirpath
 
     def _get_process_id(self):
-        for proc in psutil.process_iter():
-            try:
-                pinfo = proc.as_dict(attrs=['pid', 'cmdline'])
-                if re.search(self.pname, str(pinfo.get('cmdline'))):
-                    self.pid = pinfo.get('pid')
-                    return self.pid
-            except psutil.NoSuchProcess:
-                print "NoSuchProcess:%s" % self.pname
-        print "NoSuchProcess:%s" % self.pname
+        self.pid = self.liveness.get_pid()
         return self.pid
 
-    def is_alive(self):
-        self.pid = self._get_process_id()
-        if self.pid:
-            p = psutil.Process(self.pid)
-            if p.is_running():
-                return True
-        return False
+    def ping(self):
+        """Check the SPDK app answers RPC calls, raise SPDKRPCError if not."""
+        self.exec_rpc('get_rpc_methods')
 
-    @staticmethod
-    def exec_rpc(method, server='127.0.0.1', port=5260, sub_args=None):
-        exec_cmd = ["./rpc.py", "-s", "-p"]
-        exec_cmd.insert(2, server)
-        exec_cmd.insert(4, str(port))
-        exec_cmd.insert(5, method)
-        if sub_args is None:
-            sub_args = []
-        exec_cmd.extend(sub_args)
-        p = subprocess.Popen(
-            exec_cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
-        out, err = p.communicate()
-        return out
+    def is_alive(self, check_rpc=False):
+        """Whether the SPDK app is running.
+
+        :param check_rpc: also require the app to answer a RPC ping.
+        """
+        alive = self.liveness.is_alive(check_rpc)
+        self.pid = self.liveness.get_pid() if alive else None
+        return alive
+
+    def exec_rpc(self, method, params=None):
+        """Call a JSON-RPC method of the SPDK app.
+
+        :param method: the name of the RPC method.
+        :param params: a dict of the method parameters, or None.
+        :returns: the result of the call.
+        :raise: SPDKRPCError.
+        """
+        return self.client.call(method, params)
+
+    def exec_rpcs(self, calls):
+        """Call several JSON-RPC methods of the SPDK app in one round-trip.
+
+        :param calls: a list of (method, params) tuples.
+        :returns: the list of the results of the calls.
+        :raise: SPDKRPCError.
+        """
+        return self.client.call_many(calls)
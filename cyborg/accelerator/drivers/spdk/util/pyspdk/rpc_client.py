@@ -0,0 +1,196 @@
+"""
+JSON-RPC 2.0 client for the SPDK applications.
+"""
+
+import itertools
+import json
+import re
+import select
+import socket
+import threading
+
+from oslo_log import log as logging
+
+from cyborg.accelerator.common import exception
+
+LOG = logging.getLogger(__name__)
+
+# The bytes telling where a JSON object ends: the quotes, the escaped
+# characters within strings, and the brackets.
+_JSON_DELIMITERS = re.compile(br'\\.|["{}\[\]]', re.DOTALL)
+
+
+class JSONRPCClient(object):
+    """JSON-RPC 2.0 client talking to a SPDK app over its RPC socket.
+
+    The app listens on a Unix socket when address is a path, otherwise on
+    address:port over TCP. The connection is opened by the first call and
+    kept for the following ones, so a call costs one round-trip instead
+    of a rpc.py process.
+    """
+
+    def __init__(self, address, port=5260, timeout=60.0):
+        super(JSONRPCClient, self).__init__()
+        self.address = address
+        self.port = port
+        self.timeout = timeout
+        self._sock = None
+        self._clear_buffer()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self.address.startswith('/'):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.address)
+            except Exception:
+                sock.close()
+                raise
+        else:
+            sock = socket.create_connection((self.address, self.port),
+                                            self.timeout)
+        self._sock = sock
+        self._clear_buffer()
+
+    def close(self):
+        """Close the connection, the next call opens a new one."""
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+                self._clear_buffer()
+
+    def _clear_buffer(self):
+        self._buf = bytearray()
+        # Where the scan of the buffer for the end of the next object
+        # stopped, and its nesting depth and string state there.
+        self._scanned = 0
+        self._depth = 0
+        self._in_string = False
+
+    def _is_stale(self):
+        """Whether the app closed the connection since the last call."""
+        try:
+            readable, _w, _x = select.select([self._sock], [], [], 0)
+            return bool(readable) and not self._sock.recv(1, socket.MSG_PEEK)
+        except (socket.error, select.error):
+            return True
+
+    def _send(self, data):
+        if self._sock is not None and self._is_stale():
+            # e.g. the app was restarted, nothing was sent yet so it is
+            # safe to send the requests on a new connection.
+            LOG.debug("Reconnecting to SPDK app at %s", self.address)
+            self.close()
+        if self._sock is None:
+            self._connect()
+        self._sock.sendall(data)
+
+    def _scan(self):
+        """Return the end of the first complete object of the buffer.
+
+        Only the bytes received since the previous scan are read, so that
+        a large response is scanned once instead of being decoded again
+        after each recv().
+
+        :returns: the offset following the object, or None if it is not
+                  complete yet.
+        """
+        scanned = self._scanned
+        for match in _JSON_DELIMITERS.finditer(self._buf, self._scanned):
+            delimiter = match.group()
+            scanned = match.end()
+            if self._in_string:
+                if delimiter == b'"':
+                    self._in_string = False
+            elif delimiter == b'"':
+                self._in_string = True
+            elif delimiter in (b'{', b'['):
+                self._depth += 1
+            elif delimiter in (b'}', b']'):
+                self._depth -= 1
+                if self._depth == 0:
+                    return scanned
+        # A trailing backslash is scanned again with the character it
+        # escapes.
+        if not self._buf.endswith(b'\\') or scanned == len(self._buf):
+            scanned = len(self._buf)
+        self._scanned = scanned
+        return None
+
+    def _recv(self):
+        """Return the next JSON object sent by the app."""
+        while True:
+            end = self._scan()
+            if end is not None:
+                data = bytes(self._buf[:end])
+                buf = self._buf[end:]
+                self._clear_buffer()
+                self._buf = buf
+                return json.loads(data.decode('utf-8'))
+            data = self._sock.recv(4096)
+            if not data:
+                raise socket.error("Connection closed by the SPDK app")
+            self._buf += data
+
+    def call_many(self, calls):
+        """Call several methods and return their results in order.
+
+        The requests are pipelined: all of them are written before the
+        responses are read, so the batch costs a single round-trip.
+
+        :param calls: a list of (method, params) tuples, params being a
+                      dict or None.
+        :returns: the list of the results of the calls.
+        :raise: SPDKRPCError if a call fails or the app is unreachable.
+        """
+        if not calls:
+            return []
+        with self._lock:
+            requests = []
+            for method, params in calls:
+                request = {'jsonrpc': '2.0', 'method': method,
+                           'id': next(self._ids)}
+                if params:
+                    request['params'] = params
+                requests.append(request)
+            data = ''.join(json.dumps(r) for r in requests).encode('utf-8')
+
+            responses = {}
+            try:
+                self._send(data)
+                while len(responses) < len(requests):
+                    response = self._recv()
+                    if response.get('id') is None:
+                        # The app could not parse a request.
+                        raise ValueError(response.get('error'))
+                    responses[response['id']] = response
+            except (socket.error, ValueError) as e:
+                self.close()
+                raise exception.SPDKRPCError(method=calls[0][0], err=str(e))
+
+        results = []
+        for request in requests:
+            response = responses.get(request['id'])
+            if response is None:
+                self.close()
+                raise exception.SPDKRPCError(
+                    method=request['method'], err='no response')
+            if 'error' in response:
+                raise exception.SPDKRPCError(
+                    method=request['method'],
+                    err=response['error'].get('message'))
+            results.append(response.get('result'))
+        return results
+
+    def call(self, method, params=None):
+        """Call a method of the app and return its result.
+
+        :param method: the name of the RPC method.
+        :param params: a dict of the method parameters, or None.
+        :raise: SPDKRPCError if the call fails or the app is unreachable.
+        """
+        return self.call_many([(method, params)])[0]
@@ -30,14 +30,10 @@ class VHOSTDRIVER(SPDKDRIVER):
 
     def get_one_accelerator(self):
         acc_client = VhostTgt(self.py)
-        bdevs = acc_client.get_bdevs()
-        # Display current blockdev list
-        scsi_devices = acc_client.get_scsi_devices()
-        # Display SCSI devices
-        luns = acc_client.get_luns()
-        # Display active LUNs
-        interfaces = acc_client.get_interfaces()
-        # Display current interface list
+        # Get the current blockdev list, SCSI devices, active LUNs and
+        # interface list in a single round-trip.
+        bdevs, scsi_devices, luns, interfaces = acc_client.get_many(
+            ['get_bdevs', 'get_scsi_devices', 'get_luns', 'get_interfaces'])
         accelerator_obj = {
             'server': self.SERVER,
             'bdevs': bdevs,
@@ -0,0 +1,205 @@
+# Copyright 2018 Huawei Technologies Co.,LTD.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""A local cache of the FPGA images downloaded by the agent."""
+
+import collections
+import contextlib
+import hashlib
+import os
+import socket
+import tempfile
+import time
+
+from oslo_concurrency import lockutils
+from oslo_log import log as logging
+from six.moves.urllib import error as url_error
+from six.moves.urllib import parse
+from six.moves.urllib import request
+
+from cyborg.common import exception
+from cyborg.common.i18n import _
+
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_HASH_ALGORITHM = 'sha256'
+
+CHUNK_SIZE = 1024 * 1024
+
+REMOTE_SCHEMES = ('http', 'https')
+
+# The prefix of the partial downloads in the cache directory.
+TEMP_PREFIX = '.download-'
+
+
+def parse_checksum(checksum):
+    """Split an "algorithm:hexdigest" or a sha256 hexdigest checksum."""
+    algorithm, sep, digest = checksum.rpartition(':')
+    algorithm = algorithm or DEFAULT_HASH_ALGORITHM
+    if algorithm not in hashlib.algorithms_available:
+        raise exception.InvalidParameterValue(
+            err=_('Unsupported checksum algorithm %s.') % algorithm)
+    return algorithm, digest.lower()
+
+
+class ImageCache(object):
+    """Content addressed storage of the images with an LRU size cap.
+
+    The images are stored in base_dir under the name of their checksum,
+    so an image is downloaded only once whatever its URL, and a cached
+    image is only looked up by its checksum. Downloads are streamed to a
+    temporary file of base_dir, verified, and then renamed into place so
+    that a partial image is never used.
+
+    :param base_dir: the directory of the cached images.
+    :param max_size: the size in bytes above which the least recently
+                     used images are removed, 0 disables the cap.
+    :param timeout: the number of seconds a download may take, None for
+                    no limit.
+    """
+
+    def __init__(self, base_dir, max_size, timeout=None):
+        self.base_dir = base_dir
+        self.max_size = max_size
+        self.timeout = timeout
+        # The number of users of each cached image, which are not evicted.
+        self._in_use = collections.Counter()
+        if os.path.isdir(base_dir):
+            # Left over by an agent stopped during a download.
+            for name in os.listdir(base_dir):
+                if name.startswith(TEMP_PREFIX):
+                    os.remove(os.path.join(base_dir, name))
+
+    def _path(self, algorithm, digest):
+        return os.path.join(self.base_dir, '%s-%s' % (algorithm, digest))
+
+    @contextlib.contextmanager
+    def fetch(self, image, checksum=None):
+        """Yield the local path of an image, downloading it if needed.
+
+        The image is not evicted from the cache until the context exits.
+
+        :param image: the URL of the image, or the path of a local file
+                      which is used as is.
+        :param checksum: the expected "algorithm:hexdigest" of the image,
+                         e.g. "md5:..." for a glance image checksum. A
+                         cached image is only used when it is given.
+        :raises: ImageChecksumMismatch if the downloaded image does not
+                 match the checksum.
+        :raises: ImageDownloadTimeout if the download takes longer than
+                 the timeout of the cache.
+        """
+        if parse.urlparse(image).scheme not in REMOTE_SCHEMES:
+            yield image
+            return
+        path = self._get(image, checksum)
+        self._in_use[path] += 1
+        try:
+            yield path
+        finally:
+            self._in_use[path] -= 1
+            if not self._in_use[path]:
+                del self._in_use[path]
+
+    def prefetch(self, image, checksum=None):
+        """Download an image into the cache unless it is there already."""
+        with self.fetch(image, checksum):
+            pass
+
+    def _get(self, url, checksum):
+        algorithm, digest = parse_checksum(
+            checksum or DEFAULT_HASH_ALGORITHM + ':')
+        if digest:
+            path = self._path(algorithm, digest)
+            # Concurrent fetches of an image download it once.
+            with lockutils.lock('fpga-image-%s' % path):
+                if not os.path.exists(path):
+                    self._download(url, algorithm, digest)
+                else:
+                    LOG.debug("Using the cached image %s.", path)
+                    os.utime(path, None)
+                return path
+        return self._download(url, algorithm, None)
+
+    def _download(self, url, algorithm, digest):
+        LOG.info("Downloading the image %s.", url)
+        if not os.path.isdir(self.base_dir):
+            os.makedirs(self.base_dir)
+        fd, tmp_path = tempfile.mkstemp(prefix=TEMP_PREFIX,
+                                        dir=self.base_dir)
+        try:
+            hasher = hashlib.new(algorithm)
+            with os.fdopen(fd, 'wb') as f:
+                self._copy(url, f, hasher)
+            actual = hasher.hexdigest()
+            if digest and actual != digest:
+                raise exception.ImageChecksumMismatch(
+                    image=url, expected='%s:%s' % (algorithm, digest),
+                    actual='%s:%s' % (algorithm, actual))
+            path = self._path(algorithm, actual)
+            os.rename(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self._evict(keep=path)
+        return path
+
+    def _copy(self, url, f, hasher):
+        """Write the image at url to f, within the timeout."""
+        # NOTE: The socket timeout bounds each wait for the server, the
+        # deadline a server sending the image too slowly, either way the
+        # download does not hold the lock of the image for ever.
+        deadline = self.timeout and time.time() + self.timeout
+        try:
+            response = request.urlopen(url, timeout=self.timeout)
+            try:
+                for chunk in iter(lambda: response.read(CHUNK_SIZE), b''):
+                    hasher.update(chunk)
+                    f.write(chunk)
+                    if deadline and time.time() > deadline:
+                        raise socket.timeout()
+            finally:
+                response.close()
+        except socket.timeout:
+            raise exception.ImageDownloadTimeout(image=url,
+                                                 timeout=self.timeout)
+        except url_error.URLError as e:
+            # Raised by urlopen when connecting timed out.
+            if isinstance(e.reason, socket.timeout):
+                raise exception.ImageDownloadTimeout(image=url,
+                                                     timeout=self.timeout)
+            raise
+
+    def _evict(self, keep):
+        """Remove the least recently used images above the size cap."""
+        if not self.max_size:
+            return
+        images = []
+        for name in os.listdir(self.base_dir):
+            if name.startswith(TEMP_PREFIX):
+                continue
+            st = os.stat(os.path.join(self.base_dir, name))
+            images.append((st.st_mtime, st.st_size, name))
+        total = sum(image[1] for image in images)
+        for mtime, size, name in sorted(images):
+            if total <= self.max_size:
+                break
+            path = os.path.join(self.base_dir, name)
+            if path == keep or path in self._in_use:
+                continue
+            LOG.info("Removing the cached image %s.", path)
+            os.remove(path)
+            total -= size
@@ -0,0 +1,163 @@
+# Copyright 2018 Huawei Technologies Co.,LTD.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Run the FPGA program jobs of the agent in the background."""
+
+import collections
+import contextlib
+import time
+
+import eventlet
+from eventlet import semaphore
+from oslo_concurrency import lockutils
+from oslo_log import log as logging
+from oslo_utils import uuidutils
+
+from cyborg.common import exception
+
+
+LOG = logging.getLogger(__name__)
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+
+
+@contextlib.contextmanager
+def _local(image):
+    yield image
+
+
+class ProgramJob(object):
+    """The programming of a device with an image."""
+
+    def __init__(self, device, image):
+        self.uuid = uuidutils.generate_uuid()
+        self.device = device
+        self.image = image
+        self.state = JOB_QUEUED
+        self.progress = 0
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def start(self):
+        self.state = JOB_RUNNING
+        self.started_at = time.time()
+
+    def set_progress(self, progress):
+        self.progress = min(max(progress, 0), 100)
+
+    def finish(self, error=None):
+        self.state = JOB_FAILED if error else JOB_SUCCEEDED
+        self.error = error
+        if not error:
+            self.progress = 100
+        self.finished_at = time.time()
+
+    @property
+    def finished(self):
+        return self.state in (JOB_SUCCEEDED, JOB_FAILED)
+
+    def as_dict(self):
+        return {'uuid': self.uuid,
+                'device': self.device,
+                'image': self.image,
+                'state': self.state,
+                'progress': self.progress,
+                'error': self.error,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at}
+
+
+class ProgramJobEngine(object):
+    """Program the FPGAs in green threads.
+
+    The jobs on the regions of a PF run one after another, and at most
+    max_concurrency jobs run at once.
+
+    :param max_concurrency: the maximum number of jobs running at once.
+    :param job_ttl: the number of seconds a finished job is kept for.
+    """
+
+    def __init__(self, max_concurrency, job_ttl):
+        self.job_ttl = job_ttl
+        self._jobs = collections.OrderedDict()
+        self._slots = semaphore.Semaphore(max_concurrency)
+        self._pool = eventlet.GreenPool()
+
+    def submit(self, driver, device, image, fetch=None):
+        """Queue the programming of a device.
+
+        :param driver: the FPGA driver of the device.
+        :param device: the PCI address or sysfs path of the device.
+        :param image: the path of the image file.
+        :param fetch: an optional callable returning a context manager
+                      which yields the local path of the image, e.g.
+                      ImageCache.fetch.
+        :returns: the ProgramJob.
+        """
+        self._prune()
+        # Resolved right away so that a device which does not exist fails
+        # the submission.
+        pf = driver.get_pf_address(device)
+        job = ProgramJob(device, image)
+        self._jobs[job.uuid] = job
+        self._pool.spawn_n(self._run, driver, pf, job, fetch)
+        return job
+
+    def _run(self, driver, pf, job, fetch):
+        try:
+            with (fetch(job.image) if fetch else _local(job.image)) as image:
+                # The PF lock is taken first, so that the jobs waiting for
+                # a busy PF do not hold a slot other PFs could use.
+                with lockutils.lock('fpga-program-%s' % pf):
+                    with self._slots:
+                        job.start()
+                        ret = driver.program(job.device, image,
+                                             progress=job.set_progress)
+                        job.finish(error='Programming exited with code '
+                                   '%s.' % ret if ret else None)
+        except Exception as e:
+            LOG.exception("Failed to program %(device)s with %(image)s.",
+                          {'device': job.device, 'image': job.image})
+            job.finish(error=str(e))
+            return
+        LOG.info("Programmed %(device)s with %(image)s: %(state)s.",
+                 {'device': job.device, 'image': job.image,
+                  'state': job.state})
+
+    def get(self, uuid):
+        try:
+            return self._jobs[uuid]
+        except KeyError:
+            raise exception.FPGAProgramJobNotFound(uuid=uuid)
+
+    def list(self):
+        self._prune()
+        return list(self._jobs.values())
+
+    def wait(self):
+        """Wait for all the jobs to finish."""
+        self._pool.waitall()
+
+    def _prune(self):
+        expired = time.time() - self.job_ttl
+        for uuid, job in list(self._jobs.items()):
+            if job.finished and job.finished_at < expired:
+                del self._jobs[uuid]
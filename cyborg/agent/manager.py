@@ -13,19 +13,32 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import functools
+
+import eventlet
+from oslo_log import log as logging
 import oslo_messaging as messaging
 from oslo_service import periodic_task
+from oslo_utils import units
 
 from cyborg.accelerator.drivers.fpga.base import FPGADriver
+from cyborg.agent.image_cache import ImageCache
+from cyborg.agent.jobs import ProgramJobEngine
 from cyborg.agent.resource_tracker import ResourceTracker
 from cyborg.conductor import rpcapi as cond_api
 from cyborg.conf import CONF
 
+LOG = logging.getLogger(__name__)
+
+# The number of seconds between two checks of the deployable changes
+# queued in the async report mode.
+REPORT_FLUSH_SPACING = 1
+
 
 class AgentManager(periodic_task.PeriodicTasks):
     """Cyborg Agent manager main class."""
 
-    RPC_API_VERSION = '1.0'
+    RPC_API_VERSION = '1.3'
     target = messaging.Target(version=RPC_API_VERSION)
 
     def __init__(self, topic, host=None):
@@ -35,6 +48,12 @@ class AgentManager(periodic_task.PeriodicTasks):
         self.fpga_driver = FPGADriver()
         self.cond_api = cond_api.ConductorAPI()
         self._rt = ResourceTracker(host, self.cond_api)
+        self._program_jobs = ProgramJobEngine(
+            CONF.agent.program_max_concurrency, CONF.agent.program_job_ttl)
+        self._image_cache = ImageCache(
+            CONF.agent.image_cache_dir,
+            CONF.agent.image_cache_size * units.Mi,
+            CONF.agent.image_download_timeout)
 
     def periodic_tasks(self, context, raise_on_error=False):
         return self.run_periodic_tasks(context, raise_on_error=raise_on_error)
@@ -43,13 +62,72 @@ class AgentManager(periodic_task.PeriodicTasks):
         """List installed hardware."""
         pass
 
-    def fpga_program(self, context, accelerator, image):
-        """ Program a FPGA regoin, image can be a url or local file"""
+    def fpga_program(self, context, accelerator, image, checksum=None):
+        """Queue the programming of a FPGA region.
+
+        :param context: request context.
+        :param accelerator: the deployable of the region.
+        :param image: the URL of the image, downloaded through the image
+                      cache, or the path of a local image file.
+        :param checksum: the "algorithm:hexdigest" checksum of the image.
+                         A cached image is only used when it is given.
+        :returns: the status of the program job, see fpga_program_job_get.
+        """
         # TODO (Shaohe Feng) Get image from glance.
         # And add claim and rollback logical.
-        raise NotImplementedError()
+        driver = self.fpga_driver.create(accelerator["vendor"])
+        job = self._program_jobs.submit(
+            driver, accelerator["pcie_address"], image,
+            fetch=functools.partial(self._image_cache.fetch,
+                                    checksum=checksum))
+        return job.as_dict()
+
+    def fpga_image_prefetch(self, context, images):
+        """Download images into the image cache in the background.
+
+        :param context: request context.
+        :param images: a list of dicts with the url and the optional
+                       checksum of each image.
+        """
+        eventlet.spawn_n(self._prefetch_images, images)
+
+    def _prefetch_images(self, images):
+        for image in images:
+            try:
+                self._image_cache.prefetch(image["url"],
+                                           image.get("checksum"))
+            except Exception:
+                LOG.exception("Failed to prefetch the image %s.",
+                              image["url"])
+
+    def fpga_program_job_get(self, context, uuid):
+        """Return the status and progress of a program job.
+
+        :param context: request context.
+        :param uuid: the UUID of the job.
+        :returns: a dict with the uuid, device, image, state (queued,
+                  running, succeeded or failed), progress (percentage),
+                  error and created_at/started_at/finished_at times of
+                  the job.
+        :raises: FPGAProgramJobNotFound
+        """
+        return self._program_jobs.get(uuid).as_dict()
+
+    def deployable_report_ack(self, context, seq, generation, error=None):
+        """Handle conductor acknowledging a batch of deployable changes."""
+        self._rt.report_ack(context, seq, generation, error)
 
     @periodic_task.periodic_task(run_immediately=True)
     def update_available_resource(self, context, startup=True):
         """update all kinds of accelerator resources from their drivers."""
         self._rt.update_usage(context)
+
+    # NOTE: The spacing is fixed, the decorator runs before the config
+    # files are read. The resource tracker checks whether the changes were
+    # queued for [agent]report_batch_interval.
+    @periodic_task.periodic_task(spacing=REPORT_FLUSH_SPACING)
+    def flush_deployable_reports(self, context):
+        """Send the deployable changes queued in the async report mode."""
+        if CONF.agent.report_mode != 'async':
+            return
+        self._rt.flush_reports(context)
@@ -19,12 +19,21 @@ conductor with useful information about availability through the accelerator
 model.
 """
 
+import collections
+import time
+
+import eventlet
+from eventlet import event
+from eventlet import tpool
 from oslo_log import log as logging
-from oslo_messaging.rpc.client import RemoteError
+import oslo_messaging as messaging
 from oslo_utils import uuidutils
 
 from cyborg.accelerator.drivers.fpga.base import FPGADriver
+from cyborg.accelerator.drivers.fpga.base import VENDOR_MAPS
+from cyborg.common import exception
 from cyborg.common import utils
+from cyborg.conf import CONF
 from cyborg import objects
 
 
@@ -42,6 +51,137 @@ DEPLOYABLE_HOST_MAPS = {"assignable": "assignable",
                         "vendor": "vendor_id",
                         "name": "name"}
 
+# The deployable fields a host device is compared with, in a stable order.
+TRACKED_FIELDS = tuple(sorted(DEPLOYABLE_HOST_MAPS))
+
+
+def _tracked_hash(dev):
+    """Return the hash of the tracked fields of a device or deployable."""
+    return hash(tuple(getattr(dev, k) for k in TRACKED_FIELDS))
+
+
+class HostDevice(object):
+    """A device of the host, reduced to the fields of its deployable.
+
+    The driver device dict is only read once, and the hash of the tracked
+    fields is computed then, so that an unchanged device is told from its
+    deployable by comparing a single integer.
+    """
+
+    __slots__ = TRACKED_FIELDS + ('parent_devices', 'hash')
+
+    def __init__(self, dev):
+        for k, v in DEPLOYABLE_HOST_MAPS.items():
+            setattr(self, k, dev[v])
+        self.parent_devices = dev.get("parent_devices")
+        self.hash = _tracked_hash(self)
+
+    def __eq__(self, other):
+        if not isinstance(other, HostDevice) or self.hash != other.hash:
+            return False
+        return all(getattr(self, k) == getattr(other, k)
+                   for k in self.__slots__)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return self.hash
+
+    def __repr__(self):
+        return "HostDevice(%s)" % ", ".join(
+            "%s=%r" % (k, getattr(self, k)) for k in self.__slots__[:-1])
+
+
+class DeployableReportQueue(object):
+    """The changes of the deployables of a host waiting to be reported.
+
+    The changes of a deployable are coalesced: e.g. an update of a
+    deployable whose creation is still queued only replaces the created
+    object, and deleting it drops both. The deployables are kept in the
+    order they were first queued in, so that the parents are created
+    before their children.
+    """
+
+    def __init__(self):
+        # (action, deployable object or UUID) keyed by deployable UUID.
+        self._changes = collections.OrderedDict()
+        # When the oldest change was queued.
+        self.queued_at = None
+
+    def __len__(self):
+        return len(self._changes)
+
+    def _queue(self, uuid, change):
+        if not self._changes:
+            self.queued_at = time.time()
+        self._changes[uuid] = change
+
+    def create(self, obj_dep):
+        self._queue(obj_dep.uuid, ('create', obj_dep))
+
+    def update(self, obj_dep):
+        action = self._changes.get(obj_dep.uuid, ('update',))[0]
+        self._queue(obj_dep.uuid, (action, obj_dep))
+
+    def delete(self, uuid):
+        if self._changes.get(uuid, ('delete',))[0] == 'create':
+            # Never reported, so there is nothing to delete.
+            del self._changes[uuid]
+        else:
+            self._queue(uuid, ('delete', uuid))
+
+    def pop_batch(self, size):
+        """Remove the oldest changes from the queue.
+
+        :param size: the maximum number of changes to remove.
+        :returns: a tuple of the lists of the deployable objects to create
+                  and update and of the UUIDs of the deployables to delete.
+        """
+        batch = {'create': [], 'update': [], 'delete': []}
+        for uuid in list(self._changes)[:size]:
+            action, value = self._changes.pop(uuid)
+            batch[action].append(value)
+        self.queued_at = time.time() if self._changes else None
+        return batch['create'], batch['update'], batch['delete']
+
+    def clear(self):
+        self._changes.clear()
+        self.queued_at = None
+
+
+class CircuitBreaker(object):
+    """Stop calling a failing driver for a while.
+
+    After failure_threshold consecutive failures the breaker opens and
+    the driver is skipped for retry_interval seconds. It is then called
+    once again: a success closes the breaker, a failure opens it again.
+    """
+
+    def __init__(self, failure_threshold, retry_interval):
+        self.failure_threshold = failure_threshold
+        self.retry_interval = retry_interval
+        self.failures = 0
+        self.opened_at = None
+
+    def allow(self):
+        if self.opened_at is None:
+            return True
+        if time.time() - self.opened_at >= self.retry_interval:
+            # Half open, a single failure opens it again.
+            self.opened_at = None
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.time()
+
 
 class ResourceTracker(object):
     """Agent helper class for keeping track of resource usage as instances
@@ -49,29 +189,83 @@ class ResourceTracker(object):
     """
 
     def __init__(self, host, cond_api):
-        # FIXME (Shaohe) local cache for Accelerator.
-        # Will fix it in next release.
-        self.fpgas = None
+        # Local cache of the deployables of the host keyed by PCI address,
+        # and the host generation it matches. None until a resync.
+        self.deployables = None
+        # The hash of the tracked fields of the cached deployables.
+        self._deployable_hashes = {}
+        self.generation = None
+        # The host devices as of the last successful sync with conductor.
+        self._synced_fpgas = None
         self.host = host
         self.conductor_api = cond_api
         self.fpga_driver = FPGADriver()
+        # The changes not reported yet in the async report mode, and the
+        # (sequence number, sending time) of the batch being applied by
+        # conductor. Only one batch is in flight at once, so that they are
+        # applied in order.
+        self._reports = None
+        if CONF.agent.report_mode == 'async':
+            self._reports = DeployableReportQueue()
+        self._report_seq = 0
+        self._report_in_flight = None
+        # The circuit breaker and the duration of the last discovery of
+        # each vendor driver, and the vendors whose last discovery failed.
+        self._breakers = {}
+        self.discovery_latency = {}
+        self._failed_vendors = set()
+        # The event of the discovery still running in a native thread for
+        # each vendor. A timed out discovery keeps its thread until the
+        # driver returns, the vendor is skipped until then so that a hung
+        # driver holds at most one thread of the pool.
+        self._discoveries = {}
 
-    @utils.synchronized(AGENT_RESOURCE_SEMAPHORE)
-    def claim(self, context):
-        pass
+    def claim(self, context, instance_uuid, uuids=None, filters=None,
+              count=1):
+        """Claim deployables of this host for an instance.
+
+        Conductor claims them atomically in the DB, so the concurrent
+        claims need no lock here.
+
+        :param instance_uuid: the UUID of the instance claiming them.
+        :param uuids: the UUIDs of the deployables to claim, or None to
+                      claim any count free deployables of this host
+                      matching filters.
+        :param filters: the filters of the deployables to claim when
+                        uuids is None.
+        :param count: the number of deployables to claim when uuids is
+                      None.
+        :returns: a list of the claimed deployable objects.
+        """
+        if uuids is None:
+            filters = dict(filters or {}, host=self.host)
+        return self.conductor_api.deployable_claim(
+            context, instance_uuid, uuids=uuids, filters=filters, count=count)
+
+    def release(self, context, instance_uuid, uuids=None):
+        """Release the deployables claimed by an instance.
+
+        :param instance_uuid: the UUID of the instance which claimed them.
+        :param uuids: if not None, only these deployables are released.
+        :returns: a list of the released deployable objects.
+        """
+        return self.conductor_api.deployable_release(context, instance_uuid,
+                                                     uuids=uuids)
 
     def _fpga_compare_and_update(self, host_dev, acclerator):
+        if host_dev.hash == self._deployable_hashes.get(host_dev.pcie_address):
+            return False
         need_updated = False
-        for k, v in DEPLOYABLE_HOST_MAPS.items():
-            if acclerator[k] != host_dev[v]:
+        for k in TRACKED_FIELDS:
+            if acclerator[k] != getattr(host_dev, k):
                 need_updated = True
-                acclerator[k] = host_dev[v]
+                acclerator[k] = getattr(host_dev, k)
         return need_updated
 
     def _gen_deployable_from_host_dev(self, host_dev):
         dep = {}
-        for k, v in DEPLOYABLE_HOST_MAPS.items():
-            dep[k] = host_dev[v]
+        for k in TRACKED_FIELDS:
+            dep[k] = getattr(host_dev, k)
         dep["host"] = self.host
         dep["version"] = DEPLOYABLE_VERSION
         dep["availability"] = "free"
@@ -88,66 +282,249 @@ class ResourceTracker(object):
             dep = self._gen_deployable_from_host_dev(fpga)
             # if parent_uuid:
             dep["parent_uuid"] = parent_uuid
-            obj_dep = objects.Deployable(context, **dep)
-            new_dep = self.conductor_api.deployable_create(context, obj_dep)
-            return new_dep
+            return objects.Deployable(context, **dep)
 
         # NOTE(Shaohe Feng) need more agreement on how to keep consistency.
         fpgas = self._get_fpga_devices()
+        if fpgas == self._synced_fpgas:
+            # Nothing was plugged, removed or reconfigured since the last
+            # sync, so there is nothing to tell conductor.
+            return
         bdfs = set(fpgas.keys())
-        deployables = self.conductor_api.deployable_get_by_host(
-            context, self.host)
+        if self.deployables is None:
+            try:
+                self._resync(context)
+            except (messaging.MessagingException,
+                    exception.CyborgException) as e:
+                LOG.error(e)
+                return
 
-        # NOTE(Shaohe Feng) when no "pcie_address" in deployable?
-        accls = dict([(v["pcie_address"], v) for v in deployables])
-        accl_bdfs = set(accls.keys())
+        accls = dict(self.deployables)
+        # The deployables of the drivers which failed are left as they are.
+        accl_bdfs = set(
+            bdf for bdf, accl in accls.items()
+            if VENDOR_MAPS.get(accl["vendor"], accl["vendor"])
+            not in self._failed_vendors)
 
         # Firstly update
+        updates = []
         for mutual in accl_bdfs & bdfs:
             accl = accls[mutual]
             if self._fpga_compare_and_update(fpgas[mutual], accl):
-                try:
-                    self.conductor_api.deployable_update(context, accl)
-                except RemoteError as e:
-                    LOG.error(e)
-        # Add
+                updates.append(accl)
+
+        # Add, the PFs before their VFs so that the parents exist.
+        creates = []
         new = bdfs - accl_bdfs
-        new_pf = set([n for n in new if fpgas[n]["function"] == "pf"])
-        for n in new_pf:
-            new_dep = create_deployable(fpgas, n)
-            accls[n] = new_dep
-            sub_vf = set()
-            if "regions" in n:
-                sub_vf = set([sub["devices"] for sub in fpgas[n]["regions"]])
-            for vf in sub_vf & new:
-                new_dep = create_deployable(fpgas, vf, new_dep["uuid"])
-                accls[vf] = new_dep
-                new.remove(vf)
-        for n in new - new_pf:
-            p_bdf = fpgas[n]["parent_devices"]
-            p_accl = accls[p_bdf]
-            p_uuid = p_accl["uuid"]
+        new_pf = sorted(n for n in new if fpgas[n].type == "pf")
+        for n in new_pf + sorted(new - set(new_pf)):
+            p_bdf = fpgas[n].parent_devices
+            p_uuid = accls[p_bdf]["uuid"] if p_bdf in accls else None
             new_dep = create_deployable(fpgas, n, p_uuid)
+            accls[n] = new_dep
+            creates.append(new_dep)
 
         # Delete
-        for obsolete in accl_bdfs - bdfs:
-            try:
-                self.conductor_api.deployable_delete(context, accls[obsolete])
-            except RemoteError as e:
-                LOG.error(e)
-            del accls[obsolete]
+        deletes = [accls[obsolete]["uuid"] for obsolete in accl_bdfs - bdfs]
+
+        if not (creates or updates or deletes):
+            self._synced_fpgas = fpgas
+            return
+        if self._reports is not None:
+            self._queue_report(context, creates, updates, deletes)
+            self._forget_deployables(accl_bdfs - bdfs)
+            self._cache_deployables(creates + updates)
+            self._synced_fpgas = fpgas
+            return
+        # Send the whole diff in one call, applied in a single transaction.
+        try:
+            result = self.conductor_api.deployable_sync(
+                context, self.host, creates, updates, deletes,
+                self.generation)
+        except (messaging.MessagingException,
+                exception.CyborgException) as e:
+            # The cache may no longer match the DB (e.g. on a generation
+            # conflict or a lost reply), resync on the next run.
+            LOG.error(e)
+            self._invalidate()
+            return
+
+        self._forget_deployables(accl_bdfs - bdfs)
+        self._cache_deployables(result["deployables"])
+        self.generation = result["generation"]
+        self._synced_fpgas = fpgas
+
+    def _resync(self, context):
+        """Reload the local cache of the host deployables from conductor."""
+        inventory = self.conductor_api.deployable_get_host_inventory(
+            context, self.host)
+        # NOTE(Shaohe Feng) when no "pcie_address" in deployable?
+        self.deployables = {}
+        self._deployable_hashes = {}
+        self._cache_deployables(inventory["deployables"])
+        self.generation = inventory["generation"]
+
+    def _cache_deployables(self, deployables):
+        for dep in deployables:
+            self.deployables[dep["pcie_address"]] = dep
+            self._deployable_hashes[dep["pcie_address"]] = _tracked_hash(dep)
+
+    def _forget_deployables(self, bdfs):
+        for bdf in bdfs:
+            del self.deployables[bdf]
+            del self._deployable_hashes[bdf]
+
+    def _invalidate(self):
+        self.deployables = None
+        self._deployable_hashes = {}
+        self.generation = None
+        self._synced_fpgas = None
+        if self._reports is not None:
+            self._reports.clear()
+        self._report_in_flight = None
+
+    def _queue_report(self, context, creates, updates, deletes):
+        for dep in creates:
+            self._reports.create(dep)
+        for dep in updates:
+            self._reports.update(dep)
+        for uuid in deletes:
+            self._reports.delete(uuid)
+        self._flush_reports(context)
+
+    @utils.synchronized(AGENT_RESOURCE_SEMAPHORE)
+    def flush_reports(self, context):
+        """Send the queued changes which waited long enough to conductor."""
+        if self._reports is not None:
+            self._flush_reports(context)
+
+    def _flush_reports(self, context):
+        if self._report_in_flight is not None:
+            seq, sent_at = self._report_in_flight
+            if time.time() - sent_at > CONF.agent.report_ack_timeout:
+                LOG.warning("The batch %(seq)s of deployable changes was "
+                            "not acknowledged by conductor, reloading the "
+                            "deployables of host %(host)s.",
+                            {'seq': seq, 'host': self.host})
+                self._invalidate()
+            return
+        if not self._reports:
+            return
+        if (len(self._reports) < CONF.agent.report_batch_size and
+                time.time() - self._reports.queued_at <
+                CONF.agent.report_batch_interval):
+            return
+        creates, updates, deletes = self._reports.pop_batch(
+            CONF.agent.report_batch_size)
+        self._report_seq += 1
+        try:
+            self.conductor_api.deployable_report(
+                context, self.host, self._report_seq, creates, updates,
+                deletes)
+        except messaging.MessagingException as e:
+            LOG.error(e)
+            self._invalidate()
+            return
+        self._report_in_flight = (self._report_seq, time.time())
+        # The changes are sent, only the later ones must be in the next
+        # batches.
+        for dep in creates + updates:
+            dep.obj_reset_changes()
+
+    @utils.synchronized(AGENT_RESOURCE_SEMAPHORE)
+    def report_ack(self, context, seq, generation, error=None):
+        """Handle the acknowledgement of a batch of changes by conductor.
+
+        :param seq: the sequence number of the batch.
+        :param generation: the generation of the host after the batch.
+        :param error: the error which prevented the batch from being
+                      applied, if any.
+        """
+        if (self._report_in_flight is None or
+                self._report_in_flight[0] != seq):
+            # Acknowledging a batch given up on, the cache was reloaded
+            # or will be.
+            LOG.debug("Ignoring the acknowledgement of the batch %s of "
+                      "deployable changes.", seq)
+            return
+        self._report_in_flight = None
+        if error:
+            LOG.error("Conductor failed to apply the batch %(seq)s of "
+                      "deployable changes of host %(host)s: %(err)s",
+                      {'seq': seq, 'host': self.host, 'err': error})
+            self._invalidate()
+            return
+        self.generation = generation
+        self._flush_reports(context)
+
+    def _discover(self, vendor):
+        """Return the devices found by the driver of a vendor."""
+        driver = self.fpga_driver.create(vendor)
+        start = time.time()
+        done = event.Event()
+        self._discoveries[vendor] = done
+        eventlet.spawn_n(self._run_discovery, vendor, driver, done)
+        try:
+            with eventlet.Timeout(CONF.agent.discovery_timeout):
+                return done.wait()
+        finally:
+            self.discovery_latency[vendor] = time.time() - start
+            LOG.debug("Discovered the %(vendor)s FPGAs in %(time).3fs.",
+                      {'vendor': vendor,
+                       'time': self.discovery_latency[vendor]})
+
+    def _run_discovery(self, vendor, driver, done):
+        try:
+            # In a native thread, as the sysfs reads block. It can not be
+            # interrupted, it outlives the discovery timeout if hung.
+            done.send(tpool.execute(driver.discover))
+        except Exception as e:
+            done.send_exception(e)
+        finally:
+            del self._discoveries[vendor]
 
     def _get_fpga_devices(self):
+        """Return the HostDevice of the host FPGAs keyed by PCI address.
+
+        The vendor drivers discover their devices concurrently. The
+        vendors whose driver failed, timed out, is still running since an
+        earlier discovery or was skipped by its circuit breaker are left in
+        self._failed_vendors.
+        """
 
         def form_dict(devices, fpgas):
             for v in devices:
-                fpgas[v["devices"]] = v
+                fpgas[v["devices"]] = HostDevice(v)
                 if "regions" in v:
                     form_dict(v["regions"], fpgas)
 
         fpgas = {}
-        vendors = self.fpga_driver.discover_vendors()
-        for v in vendors:
-            driver = self.fpga_driver.create(v)
-            form_dict(driver.discover(), fpgas)
+        failed = set()
+        pool = eventlet.GreenPool()
+        discoveries = {}
+        for v in self.fpga_driver.discover_vendors():
+            breaker = self._breakers.setdefault(v, CircuitBreaker(
+                CONF.agent.discovery_failure_threshold,
+                CONF.agent.discovery_retry_interval))
+            if v in self._discoveries:
+                LOG.warning("The discovery of the %(vendor)s FPGAs started "
+                            "earlier is still running, skipping it.",
+                            {'vendor': v})
+                failed.add(v)
+            elif breaker.allow():
+                discoveries[v] = pool.spawn(self._discover, v)
+            else:
+                failed.add(v)
+        for v, discovery in discoveries.items():
+            try:
+                devices = discovery.wait()
+            except (Exception, eventlet.Timeout) as e:
+                LOG.error("Failed to discover the %(vendor)s FPGAs: "
+                          "%(err)s", {'vendor': v, 'err': e})
+                self._breakers[v].record_failure()
+                failed.add(v)
+                continue
+            self._breakers[v].record_success()
+            form_dict(devices, fpgas)
+        self._failed_vendors = failed
         return fpgas
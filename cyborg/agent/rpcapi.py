@@ -32,10 +32,13 @@ class AgentAPI(object):
     API version history:
 
     |    1.0 - Initial version.
+    |    1.1 - Add deployable_report_ack.
+    |    1.2 - Add fpga_program and fpga_program_job_get.
+    |    1.3 - Add checksum to fpga_program, add fpga_image_prefetch.
 
     """
 
-    RPC_API_VERSION = '1.0'
+    RPC_API_VERSION = '1.3'
 
     def __init__(self, topic=None):
         super(AgentAPI, self).__init__()
@@ -50,3 +53,64 @@ class AgentAPI(object):
     def hardware_list(self, context, values):
         """Signal the agent to find local hardware."""
         pass
+
+    def deployable_report_ack(self, context, host, seq, generation,
+                              error=None):
+        """Signal the agent of a host that a batch of changes was handled.
+
+        :param context: request context.
+        :param host: the host of the agent.
+        :param seq: the sequence number of the batch.
+        :param generation: the generation of the host after the batch, or
+                           None if it could not be applied.
+        :param error: the error which prevented the batch from being
+                      applied, if any.
+        """
+        cctxt = self.client.prepare(server=host, version='1.1')
+        cctxt.cast(context, 'deployable_report_ack', seq=seq,
+                   generation=generation, error=error)
+
+    def fpga_program(self, context, host, accelerator, image,
+                     checksum=None):
+        """Signal the agent of a host to program a FPGA region.
+
+        The programming runs in the background, its progress is polled
+        with fpga_program_job_get.
+
+        :param context: request context.
+        :param host: the host of the FPGA.
+        :param accelerator: the deployable of the region.
+        :param image: the URL of the image, or the path of the image file
+                      on the host.
+        :param checksum: the "algorithm:hexdigest" checksum of the image.
+        :returns: the status of the program job.
+        """
+        kwargs = {'accelerator': accelerator, 'image': image}
+        version = '1.2'
+        if checksum:
+            kwargs['checksum'] = checksum
+            version = '1.3'
+        cctxt = self.client.prepare(server=host, version=version)
+        return cctxt.call(context, 'fpga_program', **kwargs)
+
+    def fpga_program_job_get(self, context, host, uuid):
+        """Return the status and progress of a program job.
+
+        :param context: request context.
+        :param host: the host the job runs on.
+        :param uuid: the UUID of the job.
+        :returns: the status of the program job.
+        """
+        cctxt = self.client.prepare(server=host, version='1.2')
+        return cctxt.call(context, 'fpga_program_job_get', uuid=uuid)
+
+    def fpga_image_prefetch(self, context, host, images):
+        """Signal the agent of a host to download images into its cache.
+
+        :param context: request context.
+        :param host: the host to download the images on.
+        :param images: a list of dicts with the url and the optional
+                       checksum of each image.
+        """
+        cctxt = self.client.prepare(server=host, version='1.3')
+        cctxt.cast(context, 'fpga_image_prefetch', images=images)
@@ -46,3 +46,20 @@ class Link(base.APIBase):
         href = build_url(resource, resource_args,
                          bookmark=bookmark, base_url=url)
         return Link(href=href, rel=rel_name, type=type)
+
+    @staticmethod
+    def make_self_links(resource, url):
+        """Return a callable building the links of a resource from its UUID.
+
+        The callable returns the self and bookmark links. Their URL
+        prefixes are built once, so that a collection only concatenates
+        strings per item.
+        """
+        self_prefix = build_url(resource, '', base_url=url)
+        bookmark_prefix = build_url(resource, '', bookmark=True, base_url=url)
+
+        def make_links(uuid):
+            return [Link(href=self_prefix + uuid, rel='self'),
+                    Link(href=bookmark_prefix + uuid, rel='bookmark')]
+
+        return make_links
@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import functools
+
 import pecan
 from pecan import rest
 from six.moves import http_client
@@ -81,14 +83,11 @@ class Accelerator(base.APIBase):
             setattr(self, field, kwargs.get(field, wtypes.Unset))
 
     @classmethod
-    def convert_with_links(cls, obj_acc):
+    def convert_with_links(cls, obj_acc, make_links=None):
         api_acc = cls(**obj_acc.as_dict())
-        url = pecan.request.public_url
-        api_acc.links = [
-            link.Link.make_link('self', url, 'accelerators', api_acc.uuid),
-            link.Link.make_link('bookmark', url, 'accelerators', api_acc.uuid,
-                                bookmark=True)
-            ]
+        make_links = make_links or link.Link.make_self_links(
+            'accelerators', pecan.request.public_url)
+        api_acc.links = make_links(api_acc.uuid)
         return api_acc
 
 
@@ -101,10 +100,27 @@ class AcceleratorCollection(base.APIBase):
     @classmethod
     def convert_with_links(cls, obj_accs):
         collection = cls()
-        collection.accelerators = [Accelerator.convert_with_links(obj_acc)
-                                   for obj_acc in obj_accs]
+        make_links = link.Link.make_self_links('accelerators',
+                                               pecan.request.public_url)
+        collection.accelerators = [
+            Accelerator.convert_with_links(obj_acc, make_links)
+            for obj_acc in obj_accs]
         return collection
 
+    @classmethod
+    def stream_with_links(cls, obj_accs):
+        """Return the collection as a JSONStream.
+
+        :param obj_accs: an iterable of the accelerator objects.
+        """
+        make_links = link.Link.make_self_links('accelerators',
+                                               pecan.request.public_url)
+        return expose.JSONStream(
+            'accelerators', Accelerator, obj_accs,
+            functools.partial(Accelerator.convert_with_links,
+                              make_links=make_links),
+            pecan.request.cfg.api.stream_batch_size)
+
 
 class AcceleratorPatchType(types.JsonPatchType):
 
@@ -120,11 +136,15 @@ class AcceleratorPatchType(types.JsonPatchType):
 
 class AcceleratorsControllerBase(rest.RestController):
 
-    _resource = None
-
     def _get_resource(self, uuid):
-        self._resource = objects.Accelerator.get(pecan.request.context, uuid)
-        return self._resource
+        # NOTE: The accelerator loaded for the policy check is kept on the
+        # request for the handler to reuse, not on the controller which is
+        # shared by all the requests.
+        resource = getattr(pecan.request, 'resource', None)
+        if resource is None or resource.uuid != uuid:
+            resource = objects.Accelerator.get(pecan.request.context, uuid)
+            pecan.request.resource = resource
+        return resource
 
 
 class AcceleratorsController(AcceleratorsControllerBase):
@@ -144,6 +164,7 @@ class AcceleratorsController(AcceleratorsControllerBase):
                                                                  obj_acc)
         # Set the HTTP Location Header
         pecan.response.location = link.build_url('accelerators', new_acc.uuid)
+        api_utils.set_etag(new_acc)
         return Accelerator.convert_with_links(new_acc)
 
     @policy.authorize_wsgi("cyborg:accelerator", "get")
@@ -153,7 +174,8 @@ class AcceleratorsController(AcceleratorsControllerBase):
 
         :param uuid: UUID of an accelerator.
         """
-        obj_acc = self._resource or self._get_resource(uuid)
+        obj_acc = self._get_resource(uuid)
+        api_utils.set_etag(obj_acc)
         return Accelerator.convert_with_links(obj_acc)
 
     @expose.expose(AcceleratorCollection, int, types.uuid, wtypes.text,
@@ -182,10 +204,19 @@ class AcceleratorsController(AcceleratorsControllerBase):
 
         marker_obj = None
         if marker:
-            marker_obj = objects.Accelerator.get(context, marker)
+            marker_obj = objects.Accelerator.get(context, marker,
+                                                 use_slave=True)
+
+        if pecan.request.cfg.api.stream_collections:
+            obj_accs = objects.Accelerator.stream(
+                context, limit, marker_obj, sort_key, sort_dir, project_only,
+                use_slave=True,
+                batch_size=pecan.request.cfg.api.stream_batch_size)
+            return AcceleratorCollection.stream_with_links(obj_accs)
 
         obj_accs = objects.Accelerator.list(context, limit, marker_obj,
-                                            sort_key, sort_dir, project_only)
+                                            sort_key, sort_dir, project_only,
+                                            use_slave=True)
         return AcceleratorCollection.convert_with_links(obj_accs)
 
     @policy.authorize_wsgi("cyborg:accelerator", "update")
@@ -193,10 +224,14 @@ class AcceleratorsController(AcceleratorsControllerBase):
     def patch(self, uuid, patch):
         """Update an accelerator.
 
+        The accelerator is only updated if it did not change since it was
+        read here, and if If-Match is sent, since that ETag was returned.
+
         :param uuid: UUID of an accelerator.
         :param patch: a json PATCH document to apply to this accelerator.
         """
-        obj_acc = self._resource or self._get_resource(uuid)
+        obj_acc = self._get_resource(uuid)
+        api_utils.check_if_match('Accelerator', obj_acc)
         try:
             api_acc = Accelerator(
                 **api_utils.apply_jsonpatch(obj_acc.as_dict(), patch))
@@ -218,6 +253,7 @@ class AcceleratorsController(AcceleratorsControllerBase):
         context = pecan.request.context
         new_acc = pecan.request.conductor_api.accelerator_update(context,
                                                                  obj_acc)
+        api_utils.set_etag(new_acc)
         return Accelerator.convert_with_links(new_acc)
 
     @policy.authorize_wsgi("cyborg:accelerator", "delete")
@@ -227,6 +263,6 @@ class AcceleratorsController(AcceleratorsControllerBase):
 
         :param uuid: UUID of an accelerator.
         """
-        obj_acc = self._resource or self._get_resource(uuid)
+        obj_acc = self._get_resource(uuid)
         context = pecan.request.context
         pecan.request.conductor_api.accelerator_delete(context, obj_acc)
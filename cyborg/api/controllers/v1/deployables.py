@@ -13,10 +13,15 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import datetime
+import functools
+
 import pecan
 from pecan import rest
 from six.moves import http_client
 import wsme
+from wsme.rest import json as wsme_json
 from wsme import types as wtypes
 
 from cyborg.api.controllers import base
@@ -25,6 +30,7 @@ from cyborg.api.controllers.v1 import types
 from cyborg.api.controllers.v1 import utils as api_utils
 from cyborg.api import expose
 from cyborg.common import exception
+from cyborg.common.i18n import _
 from cyborg.common import policy
 from cyborg import objects
 
@@ -87,30 +93,169 @@ class Deployable(base.APIBase):
             setattr(self, field, kwargs.get(field, wtypes.Unset))
 
     @classmethod
-    def convert_with_links(cls, obj_dep):
+    def convert_with_links(cls, obj_dep, make_links=None):
         api_dep = cls(**obj_dep.as_dict())
-        url = pecan.request.public_url
-        api_dep.links = [
-            link.Link.make_link('self', url, 'deployables', api_dep.uuid),
-            link.Link.make_link('bookmark', url, 'deployables', api_dep.uuid,
-                                bookmark=True)
-            ]
+        make_links = make_links or link.Link.make_self_links(
+            'deployables', pecan.request.public_url)
+        api_dep.links = make_links(api_dep.uuid)
         return api_dep
 
 
+class DeployableTree(Deployable, wtypes.DynamicBase):
+    """API representation of a deployable and its descendants."""
+
+    @classmethod
+    def convert_with_links(cls, obj_deps, uuid):
+        """Nest the deployables of a tree under the given deployable.
+
+        :param obj_deps: all the deployable objects of a tree.
+        :param uuid: UUID of the deployable at the top of the result.
+        """
+        children = collections.defaultdict(list)
+        for obj_dep in obj_deps:
+            children[obj_dep.parent_uuid].append(obj_dep)
+        make_links = link.Link.make_self_links('deployables',
+                                               pecan.request.public_url)
+
+        def convert(obj_dep):
+            api_dep = super(DeployableTree, cls).convert_with_links(
+                obj_dep, make_links)
+            api_dep.children = [convert(child)
+                                for child in children[obj_dep.uuid]]
+            return api_dep
+
+        return convert([obj_dep for obj_dep in obj_deps
+                        if obj_dep.uuid == uuid][0])
+
+
+DeployableTree.add_attributes(children=[DeployableTree])
+
+
+class DeletedDeployable(base.APIBase):
+    """API representation of a deleted deployable."""
+
+    uuid = types.uuid
+    """The UUID of the deployable"""
+
+    host = wtypes.text
+    """The host on which the deployable was located"""
+
+    deleted_at = datetime.datetime
+    """The time in UTC at which the deployable was deleted"""
+
+
 class DeployableCollection(base.APIBase):
     """API representation of a collection of deployables."""
 
     deployables = [Deployable]
     """A list containing deployable objects"""
 
+    deleted = [DeletedDeployable]
+    """The deployables deleted since changes_since, if it is given"""
+
+    next = wtypes.text
+    """A link to retrieve the next subset of the collection"""
+
     @classmethod
-    def convert_with_links(cls, obj_deps):
+    def convert_with_links(cls, obj_deps, limit=None, deleted=None,
+                           **kwargs):
+        """Convert deployable objects to a collection.
+
+        :param obj_deps: a list of the deployable objects.
+        :param deleted: an optional list of the deleted deployables, as
+                        returned by Deployable.get_deleted_since.
+        """
         collection = cls()
-        collection.deployables = [Deployable.convert_with_links(obj_dep)
-                                  for obj_dep in obj_deps]
+        make_links = link.Link.make_self_links('deployables',
+                                               pecan.request.public_url)
+        collection.deployables = [
+            Deployable.convert_with_links(obj_dep, make_links)
+            for obj_dep in obj_deps]
+        if deleted is not None:
+            collection.deleted = [DeletedDeployable(**dep)
+                                  for dep in deleted]
+        collection.next = collection.get_next(limit, **kwargs)
         return collection
 
+    @classmethod
+    def stream_with_links(cls, obj_deps, limit=None, deleted=None,
+                          **kwargs):
+        """Return the collection as a JSONStream.
+
+        :param obj_deps: an iterable of the deployable objects.
+        :param deleted: see convert_with_links.
+        """
+        # NOTE: The stream is sent once the request is handled, when
+        # pecan.request is no longer available.
+        url = pecan.request.public_url
+        make_links = link.Link.make_self_links('deployables', url)
+
+        def extra_members(count, api_dep):
+            members = {}
+            if deleted is not None:
+                members['deleted'] = [
+                    wsme_json.tojson(DeletedDeployable,
+                                     DeletedDeployable(**dep))
+                    for dep in deleted]
+            next_link = cls._next_link(url, limit, count, api_dep, **kwargs)
+            if next_link is not wtypes.Unset:
+                members['next'] = next_link
+            return members
+
+        return expose.JSONStream(
+            'deployables', Deployable, obj_deps,
+            functools.partial(Deployable.convert_with_links,
+                              make_links=make_links),
+            pecan.request.cfg.api.stream_batch_size, extra_members)
+
+    def get_next(self, limit, **kwargs):
+        """Return a link to the next subset of the collection."""
+        return self._next_link(
+            pecan.request.public_url, limit, len(self.deployables),
+            self.deployables[-1] if self.deployables else None, **kwargs)
+
+    @staticmethod
+    def _next_link(url, limit, count, last, **kwargs):
+        if not limit or count != limit:
+            return wtypes.Unset
+
+        q_args = ''.join(['%s=%s&' % (key, kwargs[key])
+                          for key in sorted(kwargs)
+                          if kwargs[key] is not None])
+        next_args = '?%(args)slimit=%(limit)d&marker=%(marker)s' % {
+            'args': q_args, 'limit': limit,
+            'marker': last.uuid}
+        return link.Link.make_link('next', url, 'deployables',
+                                   next_args).href
+
+
+class DeployableGroup(base.APIBase):
+    """API representation of the number of deployables of a group.
+
+    Only the fields the deployables are grouped by are set.
+    """
+
+    host = wtypes.text
+    board = wtypes.text
+    vendor = wtypes.text
+    version = wtypes.text
+    type = wtypes.text
+    assignable = types.boolean
+    availability = wtypes.text
+
+    count = int
+    """The number of deployables of the group"""
+
+
+class DeployableSummary(base.APIBase):
+    """API representation of the number of deployables per group."""
+
+    group_by = [wtypes.text]
+    """The fields the deployables are grouped by"""
+
+    groups = [DeployableGroup]
+    """A list containing the groups and their number of deployables"""
+
 
 class DeployablePatchType(types.JsonPatchType):
 
@@ -122,9 +267,38 @@ class DeployablePatchType(types.JsonPatchType):
         return defaults + ['/pcie_address', '/host', '/type']
 
 
+def _get_attribute_filters(attributes):
+    """Parse a "key1:value1,key2:value2" string into a filters dict."""
+    filters = {}
+    if not attributes:
+        return filters
+    for pair in attributes.split(','):
+        key, sep, value = pair.partition(':')
+        if not sep or not key:
+            msg = _("Invalid attribute filter '%s', expected key:value")
+            raise wsme.exc.ClientSideError(msg % pair)
+        filters[key] = value
+    return filters
+
+
+def _get_filters(host, type, vendor, availability, attributes):
+    """Return the filters dict of the deployable query parameters."""
+    filters = _get_attribute_filters(attributes)
+    for key, value in (('host', host), ('type', type),
+                       ('vendor', vendor), ('availability', availability)):
+        if value is not None:
+            filters[key] = value
+    return filters
+
+
 class DeployablesController(rest.RestController):
     """REST controller for Deployables."""
 
+    _custom_actions = {
+        'tree': ['GET'],
+        'summary': ['GET'],
+    }
+
     @policy.authorize_wsgi("cyborg:deployable", "create", False)
     @expose.expose(Deployable, body=types.jsontype,
                    status_code=http_client.CREATED)
@@ -139,6 +313,7 @@ class DeployablesController(rest.RestController):
                                                                 obj_dep)
         # Set the HTTP Location Header
         pecan.response.location = link.build_url('deployables', new_dep.uuid)
+        api_utils.set_etag(new_dep)
         return Deployable.convert_with_links(new_dep)
 
     @policy.authorize_wsgi("cyborg:deployable", "get_one")
@@ -150,26 +325,151 @@ class DeployablesController(rest.RestController):
         """
 
         obj_dep = objects.Deployable.get(pecan.request.context, uuid)
+        api_utils.set_etag(obj_dep)
         return Deployable.convert_with_links(obj_dep)
 
+    @policy.authorize_wsgi("cyborg:deployable", "get_one")
+    @expose.expose(DeployableTree, types.uuid)
+    def tree(self, uuid):
+        """Retrieve a deployable and all its descendants.
+
+        The descendants of every deployable are nested in its "children".
+        The whole tree is read at once.
+
+        :param uuid: UUID of a deployable.
+        """
+        obj_deps = objects.Deployable.get_tree(pecan.request.context, uuid,
+                                               use_slave=True)
+        return DeployableTree.convert_with_links(obj_deps, uuid)
+
     @policy.authorize_wsgi("cyborg:deployable", "get_all")
     @expose.expose(DeployableCollection, int, types.uuid, wtypes.text,
-                   wtypes.text, types.boolean)
-    def get_all(self):
-        """Retrieve a list of deployables."""
-        obj_deps = objects.Deployable.list(pecan.request.context)
-        return DeployableCollection.convert_with_links(obj_deps)
+                   wtypes.text, wtypes.text, wtypes.text, wtypes.text,
+                   wtypes.text, wtypes.text, wtypes.text)
+    def get_all(self, limit=None, marker=None, sort_key='id', sort_dir='asc',
+                host=None, type=None, vendor=None, availability=None,
+                attributes=None, changes_since=None):
+        """Retrieve a list of deployables.
+
+        :param limit: Optional, to determinate the maximum number of
+                      deployables to return.
+        :param marker: Optional, to display a list of deployables after this
+                       marker.
+        :param sort_key: Optional, to sort the returned deployables list by
+                         this specified key value.
+        :param sort_dir: Optional, to return a list of deployables with this
+                         sort direction.
+        :param host: Optional, only return the deployables on this host.
+        :param type: Optional, only return the deployables of this type.
+        :param vendor: Optional, only return the deployables of this vendor.
+        :param availability: Optional, only return the deployables with this
+                             availability.
+        :param attributes: Optional, a comma separated list of key:value
+                           pairs, only return the deployables having all
+                           these attributes.
+        :param changes_since: Optional, an ISO 8601 time, only return the
+                              deployables created or updated since then.
+                              The first page also lists the deployables
+                              deleted since then in "deleted". Only the
+                              host filter can be combined with it.
+        """
+        context = pecan.request.context
+        stream = pecan.request.cfg.api.stream_collections
+        limit = api_utils.validate_limit(limit, capped=not stream)
+        sort_dir = api_utils.validate_sort_dir(sort_dir)
+        since = api_utils.validate_changes_since(
+            changes_since,
+            pecan.request.cfg.conductor.deployable_tombstone_ttl)
+
+        filters = _get_filters(host, type, vendor, availability, attributes)
+        deleted = None
+        if since is not None:
+            # NOTE: The deletions only record the host of the deployables,
+            # they could not be filtered by anything else.
+            if set(filters) - set(['host']):
+                raise wsme.exc.ClientSideError(
+                    _("changes_since can only be combined with the host "
+                      "filter."))
+            # The next links carry the normalized time.
+            changes_since = since.isoformat()
+            if not marker:
+                deleted = objects.Deployable.get_deleted_since(
+                    context, since, host=host, use_slave=True)
+
+        marker_obj = None
+        if marker:
+            marker_obj = objects.Deployable.get(context, marker,
+                                                use_slave=True)
+
+        if stream:
+            obj_deps = objects.Deployable.stream(
+                context, filters=filters, limit=limit, marker=marker_obj,
+                sort_key=sort_key, sort_dir=sort_dir, use_slave=True,
+                batch_size=pecan.request.cfg.api.stream_batch_size,
+                changes_since=since)
+            return DeployableCollection.stream_with_links(
+                obj_deps, limit=limit, deleted=deleted, sort_key=sort_key,
+                sort_dir=sort_dir, host=host, type=type, vendor=vendor,
+                availability=availability, attributes=attributes,
+                changes_since=changes_since)
+
+        obj_deps = objects.Deployable.list(context, filters=filters,
+                                           limit=limit, marker=marker_obj,
+                                           sort_key=sort_key,
+                                           sort_dir=sort_dir, use_slave=True,
+                                           changes_since=since)
+        return DeployableCollection.convert_with_links(
+            obj_deps, limit=limit, deleted=deleted, sort_key=sort_key,
+            sort_dir=sort_dir, host=host, type=type, vendor=vendor,
+            availability=availability, attributes=attributes,
+            changes_since=changes_since)
+
+    @policy.authorize_wsgi("cyborg:deployable", "get_all")
+    @expose.expose(DeployableSummary, wtypes.text, wtypes.text, wtypes.text,
+                   wtypes.text, wtypes.text, wtypes.text)
+    def summary(self, group_by=None, host=None, type=None, vendor=None,
+                availability=None, attributes=None):
+        """Retrieve the number of deployables per group.
+
+        The deployables are counted by the database, only the counts are
+        returned.
+
+        :param group_by: Optional, a comma separated list of the fields to
+                         group the deployables by, among host, board,
+                         vendor, version, type, assignable and
+                         availability. Without any, all the deployables
+                         form one group.
+        :param host: Optional, only count the deployables on this host.
+        :param type: Optional, only count the deployables of this type.
+        :param vendor: Optional, only count the deployables of this vendor.
+        :param availability: Optional, only count the deployables with this
+                             availability.
+        :param attributes: Optional, a comma separated list of key:value
+                           pairs, only count the deployables having all
+                           these attributes.
+        """
+        group_by = [key for key in (group_by or '').split(',') if key]
+        filters = _get_filters(host, type, vendor, availability, attributes)
+        groups = pecan.request.conductor_api.deployable_summary(
+            pecan.request.context, group_by, filters)
+        return DeployableSummary(
+            group_by=group_by,
+            groups=[DeployableGroup(**group) for group in groups])
 
     @policy.authorize_wsgi("cyborg:deployable", "update")
     @expose.expose(Deployable, types.uuid, body=[DeployablePatchType])
     def patch(self, uuid, patch):
         """Update a deployable.
 
+        The deployable is only updated if it did not change since it was
+        read here, and if If-Match is sent, since that ETag was returned.
+
         :param uuid: UUID of a deployable.
         :param patch: a json PATCH document to apply to this deployable.
         """
         context = pecan.request.context
         obj_dep = objects.Deployable.get(context, uuid)
+        api_utils.check_if_match('Deployable', obj_dep)
 
         try:
             api_dep = Deployable(
@@ -191,6 +491,7 @@ class DeployablesController(rest.RestController):
 
         new_dep = pecan.request.conductor_api.deployable_update(context,
                                                                 obj_dep)
+        api_utils.set_etag(new_dep)
         return Deployable.convert_with_links(new_dep)
 
     @policy.authorize_wsgi("cyborg:deployable", "delete")
@@ -118,7 +118,8 @@ class JsonPatchType(wtypes.Base):
         method may be overwritten by derived class.
 
         """
-        return ['/created_at', '/id', '/links', '/updated_at', '/uuid']
+        return ['/created_at', '/generation', '/id', '/links', '/updated_at',
+                '/uuid']
 
     @classmethod
     def non_removable_attrs(cls):
@@ -13,10 +13,15 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
+
 import jsonpatch
+from oslo_utils import timeutils
+import pecan
 import wsme
 
 
+from cyborg.common import exception
 from cyborg.common.i18n import _
 
 
@@ -33,3 +38,71 @@ def apply_jsonpatch(doc, patch):
                         ' the resource is not allowed')
                 raise wsme.exc.ClientSideError(msg % p['path'])
     return jsonpatch.apply_patch(doc, jsonpatch.JsonPatch(patch))
+
+
+def validate_limit(limit, capped=True):
+    """Return the number of items of a collection to return.
+
+    :param limit: the limit given by the request, or None.
+    :param capped: whether the limit is capped by [api]max_limit. A
+                   streamed collection is not, its memory use does not
+                   grow with its size.
+    """
+    if limit is None:
+        return pecan.request.cfg.api.max_limit if capped else None
+
+    if limit <= 0:
+        raise wsme.exc.ClientSideError(_("Limit must be positive"))
+
+    if not capped:
+        return limit
+    return min(pecan.request.cfg.api.max_limit, limit)
+
+
+def validate_sort_dir(sort_dir):
+    if sort_dir not in ['asc', 'desc']:
+        raise wsme.exc.ClientSideError(_("Invalid sort direction: %s. "
+                                         "Acceptable values are "
+                                         "'asc' or 'desc'") % sort_dir)
+    return sort_dir
+
+
+def validate_changes_since(changes_since, max_age):
+    """Parse a changes_since ISO 8601 time into a naive UTC datetime.
+
+    :param changes_since: the time, or None.
+    :param max_age: the number of seconds changes_since can be in the past.
+    """
+    if changes_since is None:
+        return None
+    try:
+        since = timeutils.normalize_time(
+            timeutils.parse_isotime(changes_since))
+    except ValueError:
+        raise wsme.exc.ClientSideError(
+            _("Invalid changes_since: %s, expected an ISO 8601 time.")
+            % changes_since)
+    if since < timeutils.utcnow() - datetime.timedelta(seconds=max_age):
+        raise wsme.exc.ClientSideError(
+            _("changes_since cannot be more than %d seconds in the past.")
+            % max_age)
+    return since
+
+
+def set_etag(obj):
+    """Send the generation of an object as the ETag of the response."""
+    pecan.response.etag = str(obj.generation)
+
+
+def check_if_match(resource, obj):
+    """Check the If-Match header of the request against an object.
+
+    A request without If-Match always matches.
+
+    :param resource: the name of the resource of the object.
+    :param obj: an object with a generation.
+    :raises: PreconditionFailed if the generation of the object is not
+             one of the ETags of If-Match.
+    """
+    if str(obj.generation) not in pecan.request.if_match:
+        raise exception.PreconditionFailed(resource=resource, uuid=obj.uuid)
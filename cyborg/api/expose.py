@@ -13,11 +13,87 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import functools
+import json
+
+import pecan
+from wsme.rest import json as wsme_json
 import wsmeext.pecan as wsme_pecan
 
 
+class JSONStream(object):
+    """A JSON collection sent in chunks as its items are serialized.
+
+    The document is {"<name>": [<items>]} followed by the members
+    returned by extra_members once all the items were sent.
+
+    :param name: the name of the list of the items.
+    :param datatype: the WSME type of the items.
+    :param items: an iterable of the items, converted to datatype by
+                  convert.
+    :param convert: a callable converting an item to datatype.
+    :param batch_size: the number of items sent per chunk.
+    :param extra_members: an optional callable, given the number of items
+                          and the last converted item, returning a dict of
+                          the other members of the document.
+    """
+
+    def __init__(self, name, datatype, items, convert, batch_size,
+                 extra_members=None):
+        self.name = name
+        self.datatype = datatype
+        self.items = items
+        self.convert = convert
+        self.batch_size = batch_size
+        self.extra_members = extra_members
+
+    def __iter__(self):
+        chunk = ['{%s: [' % json.dumps(self.name)]
+        count = 0
+        item = None
+        for obj in self.items:
+            item = self.convert(obj)
+            if count:
+                chunk.append(', ')
+            chunk.append(json.dumps(wsme_json.tojson(self.datatype, item)))
+            count += 1
+            if not count % self.batch_size:
+                yield ''.join(chunk).encode('utf-8')
+                chunk = []
+        chunk.append(']')
+        if self.extra_members:
+            for key, value in sorted(self.extra_members(count, item).items()):
+                chunk.append(', %s: %s' % (json.dumps(key), json.dumps(value)))
+        chunk.append('}')
+        yield ''.join(chunk).encode('utf-8')
+
+
 def expose(*args, **kwargs):
-    """Ensure that only JSON, and not XML, is supported."""
+    """Ensure that only JSON, and not XML, is supported.
+
+    The exposed function may also return a JSONStream, which is sent as
+    the response body as it is generated instead of being rendered by
+    WSME.
+    """
     if 'rest_content_types' not in kwargs:
         kwargs['rest_content_types'] = ('json',)
-    return wsme_pecan.wsexpose(*args, **kwargs)
+    wsexpose = wsme_pecan.wsexpose(*args, **kwargs)
+
+    def decorate(f):
+        callfunction = wsexpose(f)
+
+        @functools.wraps(callfunction)
+        def stream_or_render(self, *args, **kwargs):
+            result = callfunction(self, *args, **kwargs)
+            if (isinstance(result, dict) and
+                    isinstance(result.get('result'), JSONStream)):
+                pecan.response.content_type = 'application/json'
+                # NOTE: pecan reads the whole body of the responses
+                # whose app_iter is not a generator.
+                pecan.response.app_iter = iter(result['result'])
+                return pecan.response
+            return result
+
+        return stream_or_render
+
+    return decorate
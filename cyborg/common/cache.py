@@ -0,0 +1,96 @@
+# Copyright 2018 Huawei Technologies Co.,LTD.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""An in-process LRU cache whose entries expire."""
+
+import collections
+import threading
+import time
+
+
+class LRUCache(object):
+    """A size bounded LRU cache whose entries expire after a TTL.
+
+    Values are loaded through get_or_load. A value loaded while the
+    cache was invalidated is returned but not cached, so that a load
+    racing with a write cannot cache the data the write replaced.
+
+    :param max_size: the maximum number of entries, 0 disables the cache.
+    :param ttl: the number of seconds an entry is valid for.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        # (expiry time, value) keyed by cache key, least recently used
+        # first.
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        # Incremented by every invalidation.
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_load(self, key, loader):
+        """Return the value cached for key, loading it if needed.
+
+        :param key: a hashable key.
+        :param loader: a callable returning the value of key. Its
+                       exceptions are raised, and nothing is cached.
+        """
+        if not self.max_size:
+            return loader()
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None and entry[0] > time.time():
+                self._entries[key] = entry
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            epoch = self._epoch
+        value = loader()
+        with self._lock:
+            if epoch == self._epoch:
+                self._entries.pop(key, None)
+                self._entries[key] = (time.time() + self.ttl, value)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def invalidate(self, *keys):
+        """Drop the given keys from the cache."""
+        with self._lock:
+            self._epoch += 1
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        """Return the size and the hit/miss counters of the cache."""
+        with self._lock:
+            return {'size': len(self._entries),
+                    'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'invalidations': self.invalidations}
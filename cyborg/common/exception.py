@@ -164,6 +164,35 @@ class DuplicateDeployableName(Conflict):
     _msg_fmt = _("A deployable with name %(name)s already exists.")
 
 
+class AcceleratorGenerationConflict(Conflict):
+    _msg_fmt = _("Accelerator %(uuid)s changed since generation "
+                 "%(generation)s.")
+
+
+class DeployableGenerationConflict(Conflict):
+    _msg_fmt = _("Deployable %(uuid)s changed since generation "
+                 "%(generation)s.")
+
+
+class PreconditionFailed(CyborgException):
+    _msg_fmt = _("%(resource)s %(uuid)s does not match If-Match.")
+    code = http_client.PRECONDITION_FAILED
+
+
+class DeployableHostGenerationConflict(Conflict):
+    _msg_fmt = _("The deployables of host %(host)s changed since "
+                 "generation %(generation)s.")
+
+
+class DeployableNotAvailable(Conflict):
+    _msg_fmt = _("Deployables %(uuids)s are not available.")
+
+
+class DeployableClaimFailed(Conflict):
+    _msg_fmt = _("%(count)d free deployables matching %(filters)s could "
+                 "not be claimed.")
+
+
 class PlacementEndpointNotFound(NotFound):
     message = _("Placement API endpoint not found")
 
@@ -182,6 +211,11 @@ class PlacementInventoryUpdateConflict(Conflict):
                 "%(resource_provider)s, resource class %(resource_class)s.")
 
 
+class PlacementResourceProviderConflict(Conflict):
+    message = _("Placement resource provider %(resource_provider)s could not "
+                "be created, another one is named %(name)s.")
+
+
 class ObjectActionError(CyborgException):
     _msg_fmt = _('Object action %(action)s failed because: %(reason)s')
 
@@ -196,3 +230,17 @@ class AttributeInvalid(CyborgException):
 
 class AttributeAlreadyExists(CyborgException):
     _msg_fmt = _("Attribute with uuid %(uuid)s already exists.")
+
+
+class FPGAProgramJobNotFound(NotFound):
+    _msg_fmt = _("FPGA program job %(uuid)s could not be found.")
+
+
+class ImageDownloadTimeout(CyborgException):
+    _msg_fmt = _("Download of image %(image)s did not complete within "
+                 "%(timeout)s seconds.")
+
+
+class ImageChecksumMismatch(CyborgException):
+    _msg_fmt = _("Image %(image)s has the checksum %(actual)s instead of "
+                 "%(expected)s.")
@@ -26,10 +26,13 @@ from oslo_versionedobjects import base as object_base
 import pecan
 import wsme
 
+from cyborg.common import cache
 from cyborg.common import exception
 
 
 _ENFORCER = None
+# The recent policy decisions, see authorize().
+_DECISIONS = None
 CONF = cfg.CONF
 LOG = log.getLogger(__name__)
 
@@ -127,10 +130,14 @@ def init_enforcer(policy_file=None, rules=None,
 
     """
     global _ENFORCER
+    global _DECISIONS
 
     if _ENFORCER:
         return
 
+    _DECISIONS = cache.LRUCache(CONF.api.policy_cache_size,
+                                CONF.api.policy_cache_ttl)
+
     # NOTE: Register defaults for policy-in-code here so that they are
     # loaded exactly once - when this module-global is initialized.
     # Defining these in the relevant API modules won't work
@@ -158,18 +165,43 @@ def get_enforcer():
 # at module-load time.
 
 
+def _freeze(values):
+    return tuple(sorted(
+        (k, tuple(v) if isinstance(v, list) else v)
+        for k, v in values.items()))
+
+
 def authorize(rule, target, creds, do_raise=False, *args, **kwargs):
     """A shortcut for policy.Enforcer.authorize()
 
     Checks authorization of a rule against the target and credentials, and
     raises an exception if the rule is not defined.
+
+    The decisions are cached for [api]policy_cache_ttl seconds, so that
+    the same check for the same user and target is only evaluated once in
+    that time.
     """
     enforcer = get_enforcer()
-    try:
-        return enforcer.authorize(rule, target, creds, do_raise=do_raise,
-                                  *args, **kwargs)
-    except policy.PolicyNotAuthorized:
+    key = None
+    if not (args or kwargs):
+        try:
+            key = (rule, _freeze(target), _freeze(creds))
+            hash(key)
+        except TypeError:
+            # Values the key can not be made of, do not cache.
+            key = None
+    if key is None:
+        try:
+            return enforcer.authorize(rule, target, creds,
+                                      do_raise=do_raise, *args, **kwargs)
+        except policy.PolicyNotAuthorized:
+            raise exception.HTTPForbidden(resource=rule)
+
+    allowed = _DECISIONS.get_or_load(
+        key, lambda: enforcer.authorize(rule, target, creds))
+    if do_raise and not allowed:
         raise exception.HTTPForbidden(resource=rule)
+    return allowed
 
 
 # This decorator MUST appear first (the outermost decorator)
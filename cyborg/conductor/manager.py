@@ -13,25 +13,74 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import datetime
+
+from oslo_log import log as logging
 import oslo_messaging as messaging
+from oslo_utils import timeutils
 
+from cyborg.agent import rpcapi as agent_rpcapi
+from cyborg.common import cache
 from cyborg.conf import CONF
 from cyborg import objects
 
 
+LOG = logging.getLogger(__name__)
+
+
 class ConductorManager(object):
     """Cyborg Conductor manager main class."""
 
-    RPC_API_VERSION = '1.0'
+    RPC_API_VERSION = '1.6'
     target = messaging.Target(version=RPC_API_VERSION)
 
     def __init__(self, topic, host=None):
         super(ConductorManager, self).__init__()
         self.topic = topic
         self.host = host or CONF.host
+        self.agent_api = agent_rpcapi.AgentAPI()
+        # The results of the deployable queries keyed by ("uuid", uuid),
+        # ("host", host) or ("list",). They are dropped by the writes made
+        # through this conductor, and expire for the other ones.
+        self._query_cache = cache.LRUCache(CONF.conductor.query_cache_size,
+                                           CONF.conductor.query_cache_ttl)
 
     def periodic_tasks(self, context, raise_on_error=False):
-        pass
+        LOG.debug("Deployable query cache stats: %s",
+                  self._query_cache.stats())
+        try:
+            self._purge_deleted_deployables(context)
+        except Exception:
+            if raise_on_error:
+                raise
+            LOG.exception("Failed to purge the deployable deletions.")
+
+    def _purge_deleted_deployables(self, context):
+        """Forget the deployables deleted for longer than their TTL."""
+        before = timeutils.utcnow() - datetime.timedelta(
+            seconds=CONF.conductor.deployable_tombstone_ttl)
+        count = objects.Deployable.purge_deleted(context, before)
+        if count:
+            LOG.info("Purged %d deployable deletions older than %s.",
+                     count, before)
+
+    def _invalidate_deployables(self, host, uuids):
+        """Drop the cached queries a change of deployables can affect.
+
+        :param host: the host of the changed deployables.
+        :param uuids: the UUIDs of the changed deployables.
+        """
+        keys = [('uuid', uuid) for uuid in uuids]
+        self._query_cache.invalidate(('host', host), ('list',), *keys)
+
+    def _invalidate_changed(self, deployables):
+        """Drop the cached queries the given changed deployables affect."""
+        hosts = collections.defaultdict(list)
+        for obj_dep in deployables:
+            hosts[obj_dep.host].append(obj_dep.uuid)
+        for host, uuids in hosts.items():
+            self._invalidate_deployables(host, uuids)
 
     def accelerator_create(self, context, obj_acc):
         """Create a new accelerator.
@@ -65,6 +114,8 @@ class ConductorManager(object):
         :param obj_acc: an accelerator object to delete.
         """
         obj_acc.destroy(context)
+        # Its deployables are deleted in cascade.
+        self._query_cache.clear()
 
     def deployable_create(self, context, obj_dep):
         """Create a new deployable.
@@ -74,6 +125,7 @@ class ConductorManager(object):
         :returns: created obj_dep object.
         """
         obj_dep.create(context)
+        self._invalidate_deployables(obj_dep.host, [obj_dep.uuid])
         return obj_dep
 
     def deployable_update(self, context, obj_dep):
@@ -84,6 +136,8 @@ class ConductorManager(object):
         :returns: updated deployable object.
         """
         obj_dep.save(context)
+        # NOTE: The host of a deployable is not updatable from the API.
+        self._invalidate_deployables(obj_dep.host, [obj_dep.uuid])
         return obj_dep
 
     def deployable_delete(self, context, obj_dep):
@@ -93,6 +147,107 @@ class ConductorManager(object):
         :param obj_dep: a deployable object to delete.
         """
         obj_dep.destroy(context)
+        self._invalidate_deployables(obj_dep.host, [obj_dep.uuid])
+
+    def deployable_sync(self, context, host, creates, updates, deletes,
+                        generation=None):
+        """Create, update and delete the deployables of a host at once.
+
+        :param context: request context.
+        :param host: host on which the deployables are located.
+        :param creates: a list of changed (but not saved) deployable objects.
+        :param updates: a list of deployable objects to update.
+        :param deletes: a list of UUIDs of deployables to delete.
+        :param generation: if not None, the generation of the host the
+                           changes were computed against.
+        :returns: a dict with the created and updated deployable objects
+                  as "deployables" and the new host generation as
+                  "generation".
+        """
+        deployables, generation = objects.Deployable.sync(
+            context, host, creates, updates, deletes, generation)
+        self._invalidate_deployables(
+            host, [d.uuid for d in creates + updates] + deletes)
+        return {"deployables": deployables, "generation": generation}
+
+    def deployable_report(self, context, host, seq, creates, updates,
+                          deletes):
+        """Apply a batch of changes of the deployables of a host.
+
+        The batch is acknowledged to the agent of the host with its
+        sequence number, along with the new host generation or the error
+        which prevented it from being applied.
+
+        :param context: request context.
+        :param host: host on which the deployables are located.
+        :param seq: the sequence number of the batch for the host.
+        :param creates: a list of changed (but not saved) deployable objects.
+        :param updates: a list of deployable objects to update.
+        :param deletes: a list of UUIDs of deployables to delete.
+        """
+        generation = None
+        error = None
+        try:
+            generation = objects.Deployable.sync(
+                context, host, creates, updates, deletes)[1]
+            self._invalidate_deployables(
+                host, [d.uuid for d in creates + updates] + deletes)
+        except Exception as e:
+            # NOTE: Nobody waits for this call, the agent resyncs when
+            # it gets the error.
+            LOG.exception("Failed to apply the batch %(seq)s of deployable "
+                          "changes of host %(host)s.",
+                          {'seq': seq, 'host': host})
+            error = str(e)
+        self.agent_api.deployable_report_ack(context, host, seq, generation,
+                                             error)
+
+    def deployable_claim(self, context, instance_uuid, uuids=None,
+                         filters=None, count=1):
+        """Claim free deployables for an instance.
+
+        :param context: request context.
+        :param instance_uuid: the UUID of the instance claiming them.
+        :param uuids: the UUIDs of the deployables to claim, or None to
+                      claim any count free deployables matching filters.
+        :param filters: the filters of the deployables to claim when uuids
+                        is None.
+        :param count: the number of deployables to claim when uuids is
+                      None.
+        :returns: a list of the claimed deployable objects.
+        """
+        deployables = objects.Deployable.claim(context, instance_uuid, uuids,
+                                               filters, count)
+        self._invalidate_changed(deployables)
+        return deployables
+
+    def deployable_release(self, context, instance_uuid, uuids=None):
+        """Release the deployables claimed by an instance.
+
+        :param context: request context.
+        :param instance_uuid: the UUID of the instance which claimed them.
+        :param uuids: if not None, only these deployables are released.
+        :returns: a list of the released deployable objects.
+        """
+        deployables = objects.Deployable.release(context, instance_uuid,
+                                                 uuids)
+        self._invalidate_changed(deployables)
+        return deployables
+
+    def deployable_get_host_inventory(self, context, host):
+        """Retrieve all the deployables of a host with their generation.
+
+        :param context: request context.
+        :param host: host on which the deployables are located.
+        :returns: a dict with the deployable objects of the host as
+                  "deployables" and the host generation as "generation".
+        """
+        # NOTE: Read the generation first, so that a change racing with
+        # this call can only make the generation older than the list,
+        # which makes the next sync of the agent fail and resync.
+        generation = objects.Deployable.get_host_generation(context, host)
+        deployables = objects.Deployable.get_by_host(context, host)
+        return {"deployables": deployables, "generation": generation}
 
     def deployable_get(self, context, uuid):
         """Retrieve a deployable.
@@ -101,7 +256,8 @@ class ConductorManager(object):
         :param uuid: UUID of a deployable.
         :returns: requested deployable object.
         """
-        return objects.Deployable.get(context, uuid)
+        return self._query_cache.get_or_load(
+            ('uuid', uuid), lambda: objects.Deployable.get(context, uuid))
 
     def deployable_get_by_host(self, context, host):
         """Retrieve a deployable.
@@ -110,7 +266,29 @@ class ConductorManager(object):
         :param host: host on which the deployable is located.
         :returns: requested deployable object.
         """
-        return objects.Deployable.get_by_host(context, host)
+        return self._query_cache.get_or_load(
+            ('host', host),
+            lambda: objects.Deployable.get_by_host(context, host))
+
+    def deployable_get_tree(self, context, uuid):
+        """Retrieve all the deployables of the tree of a deployable.
+
+        :param context: request context.
+        :param uuid: UUID of a deployable.
+        :returns: the deployable objects of the tree, the parents before
+                  their children.
+        """
+        return objects.Deployable.get_tree(context, uuid)
+
+    def deployable_get_trees_by_host(self, context, host):
+        """Retrieve all the deployables of the trees rooted on a host.
+
+        :param context: request context.
+        :param host: host on which the deployables are located.
+        :returns: the deployable objects of the trees, the parents before
+                  their children.
+        """
+        return objects.Deployable.get_trees_by_host(context, host)
 
     def deployable_list(self, context):
         """Retrieve a list of deployables.
@@ -118,4 +296,19 @@ class ConductorManager(object):
         :param context: request context.
         :returns: a list of deployable objects.
         """
-        return objects.Deployable.list(context)
+        return self._query_cache.get_or_load(
+            ('list',), lambda: objects.Deployable.list(context))
+
+    def deployable_summary(self, context, group_by, filters=None):
+        """Count the deployables per group.
+
+        :param context: request context.
+        :param group_by: the list of the fields to group the deployables by.
+        :param filters: the filters the counted deployables must match.
+        :returns: a list of dicts with the group_by fields of a group and
+                  its number of deployables as "count".
+        """
+        # NOTE: The counts are only a snapshot, read them from the slave
+        # database if any.
+        return objects.Deployable.summary(context, group_by, filters,
+                                          use_slave=True)
@@ -32,10 +32,17 @@ class ConductorAPI(object):
     API version history:
 
     |    1.0 - Initial version.
+    |    1.1 - Add deployable_sync.
+    |    1.2 - Add generation to deployable_sync, add
+    |          deployable_get_host_inventory.
+    |    1.3 - Add deployable_report.
+    |    1.4 - Add deployable_get_tree and deployable_get_trees_by_host.
+    |    1.5 - Add deployable_claim and deployable_release.
+    |    1.6 - Add deployable_summary.
 
     """
 
-    RPC_API_VERSION = '1.0'
+    RPC_API_VERSION = '1.6'
 
     def __init__(self, topic=None):
         super(ConductorAPI, self).__init__()
@@ -126,6 +133,95 @@ class ConductorAPI(object):
         cctxt = self.client.prepare(topic=self.topic)
         cctxt.call(context, 'deployable_delete', obj_dep=obj_dep)
 
+    def deployable_sync(self, context, host, creates, updates, deletes,
+                        generation=None):
+        """Signal to conductor service to sync the deployables of a host.
+
+        All the changes are applied in a single transaction.
+
+        :param context: request context.
+        :param host: host on which the deployables are located.
+        :param creates: a list of created (but not saved) deployable objects.
+        :param updates: a list of deployable objects to update.
+        :param deletes: a list of UUIDs of deployables to delete.
+        :param generation: if not None, the generation of the host the
+                           changes were computed against.
+        :returns: a dict with the created and updated deployable objects
+                  as "deployables" and the new host generation as
+                  "generation".
+        :raises: DeployableHostGenerationConflict if generation is stale.
+        """
+        cctxt = self.client.prepare(topic=self.topic, version='1.2')
+        return cctxt.call(context, 'deployable_sync', host=host,
+                          creates=creates, updates=updates, deletes=deletes,
+                          generation=generation)
+
+    def deployable_report(self, context, host, seq, creates, updates,
+                          deletes):
+        """Signal to conductor service to apply a batch of host changes.
+
+        This does not wait for the changes to be applied: conductor
+        acknowledges the batch by calling deployable_report_ack on the
+        agent of the host.
+
+        :param context: request context.
+        :param host: host on which the deployables are located.
+        :param seq: the sequence number of the batch for the host.
+        :param creates: a list of created (but not saved) deployable objects.
+        :param updates: a list of deployable objects to update.
+        :param deletes: a list of UUIDs of deployables to delete.
+        """
+        cctxt = self.client.prepare(topic=self.topic, version='1.3')
+        cctxt.cast(context, 'deployable_report', host=host, seq=seq,
+                   creates=creates, updates=updates, deletes=deletes)
+
+    def deployable_claim(self, context, instance_uuid, uuids=None,
+                         filters=None, count=1):
+        """Signal to conductor service to claim deployables for an instance.
+
+        All the deployables are claimed in a single transaction, without
+        locking them: a deployable is only claimed if it is still free.
+
+        :param context: request context.
+        :param instance_uuid: the UUID of the instance claiming them.
+        :param uuids: the UUIDs of the deployables to claim, or None to
+                      claim any count free deployables matching filters.
+        :param filters: the filters of the deployables to claim when uuids
+                        is None.
+        :param count: the number of deployables to claim when uuids is
+                      None.
+        :returns: a list of the claimed deployable objects.
+        :raises: DeployableNotAvailable or DeployableClaimFailed when the
+                 deployables could not all be claimed.
+        """
+        cctxt = self.client.prepare(topic=self.topic, version='1.5')
+        return cctxt.call(context, 'deployable_claim',
+                          instance_uuid=instance_uuid, uuids=uuids,
+                          filters=filters, count=count)
+
+    def deployable_release(self, context, instance_uuid, uuids=None):
+        """Signal to conductor service to release the deployables claimed.
+
+        :param context: request context.
+        :param instance_uuid: the UUID of the instance which claimed them.
+        :param uuids: if not None, only these deployables are released.
+        :returns: a list of the released deployable objects.
+        """
+        cctxt = self.client.prepare(topic=self.topic, version='1.5')
+        return cctxt.call(context, 'deployable_release',
+                          instance_uuid=instance_uuid, uuids=uuids)
+
+    def deployable_get_host_inventory(self, context, host):
+        """Signal to conductor service to get all the deployables of a host.
+
+        :param context: request context.
+        :param host: host on which the deployables are located.
+        :returns: a dict with the deployable objects of the host as
+                  "deployables" and the host generation as "generation".
+        """
+        cctxt = self.client.prepare(topic=self.topic, version='1.2')
+        return cctxt.call(context, 'deployable_get_host_inventory', host=host)
+
     def deployable_get(self, context, uuid):
         """Signal to conductor service to get a deployable.
 
@@ -146,6 +242,28 @@ class ConductorAPI(object):
         cctxt = self.client.prepare(topic=self.topic)
         return cctxt.call(context, 'deployable_get_by_host', host=host)
 
+    def deployable_get_tree(self, context, uuid):
+        """Signal to conductor service to get the tree of a deployable.
+
+        :param context: request context.
+        :param uuid: UUID of a deployable.
+        :returns: all the deployable objects of the tree the deployable
+                  belongs to, the parents before their children.
+        """
+        cctxt = self.client.prepare(topic=self.topic, version='1.4')
+        return cctxt.call(context, 'deployable_get_tree', uuid=uuid)
+
+    def deployable_get_trees_by_host(self, context, host):
+        """Signal to conductor service to get the deployable trees of a host.
+
+        :param context: request context.
+        :param host: host on which the deployables are located.
+        :returns: all the deployable objects of the trees rooted on the
+                  host, the parents before their children.
+        """
+        cctxt = self.client.prepare(topic=self.topic, version='1.4')
+        return cctxt.call(context, 'deployable_get_trees_by_host', host=host)
+
     def deployable_list(self, context):
         """Signal to conductor service to get a list of deployables.
 
@@ -154,3 +272,16 @@ class ConductorAPI(object):
         """
         cctxt = self.client.prepare(topic=self.topic)
         return cctxt.call(context, 'deployable_list')
+
+    def deployable_summary(self, context, group_by, filters=None):
+        """Signal to conductor service to count the deployables per group.
+
+        :param context: request context.
+        :param group_by: the list of the fields to group the deployables by.
+        :param filters: the filters the counted deployables must match.
+        :returns: a list of dicts with the group_by fields of a group and
+                  its number of deployables as "count".
+        """
+        cctxt = self.client.prepare(topic=self.topic, version='1.6')
+        return cctxt.call(context, 'deployable_summary', group_by=group_by,
+                          filters=filters)
@@ -15,14 +15,18 @@
 
 from oslo_config import cfg
 
+from cyborg.conf import agent
 from cyborg.conf import api
+from cyborg.conf import conductor
 from cyborg.conf import database
 from cyborg.conf import default
 
 
 CONF = cfg.CONF
 
+agent.register_opts(CONF)
 api.register_opts(CONF)
+conductor.register_opts(CONF)
 database.register_opts(CONF)
 default.register_opts(CONF)
 default.register_placement_opts(CONF)
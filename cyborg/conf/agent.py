@@ -0,0 +1,113 @@
+# Copyright 2018 Huawei Technologies Co.,LTD.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_config import cfg
+
+from cyborg.common.i18n import _
+
+
+opts = [
+    cfg.StrOpt('report_mode',
+               default='sync',
+               choices=['sync', 'async'],
+               help=_('How the agent reports the changes of the '
+                      'deployables of its host to cyborg-conductor. "sync" '
+                      'waits for conductor to apply each change set. '
+                      '"async" queues the changes and sends them in batches '
+                      'without waiting, conductor acknowledges each batch '
+                      'and a batch not acknowledged makes the agent reload '
+                      'the deployables of its host.')),
+    cfg.IntOpt('report_batch_size',
+               default=100,
+               min=1,
+               help=_('Maximum number of deployable changes sent in one '
+                      'batch in the async report mode. The changes are sent '
+                      'as soon as that many are queued.')),
+    cfg.IntOpt('report_batch_interval',
+               default=10,
+               min=1,
+               help=_('Maximum number of seconds a deployable change is '
+                      'queued before being sent in the async report mode.')),
+    cfg.IntOpt('report_ack_timeout',
+               default=120,
+               min=1,
+               help=_('Number of seconds after which a batch of deployable '
+                      'changes not acknowledged by conductor is considered '
+                      'lost, in the async report mode.')),
+    cfg.IntOpt('discovery_timeout',
+               default=60,
+               min=1,
+               help=_('Number of seconds the driver of a vendor is given to '
+                      'discover its devices. The drivers run concurrently, '
+                      'and the devices of the drivers which time out or fail '
+                      'are left as they were in the last report.')),
+    cfg.IntOpt('discovery_failure_threshold',
+               default=3,
+               min=1,
+               help=_('Number of consecutive discovery failures after which '
+                      'the driver of a vendor is no longer called for '
+                      'discovery_retry_interval seconds.')),
+    cfg.IntOpt('discovery_retry_interval',
+               default=300,
+               min=0,
+               help=_('Number of seconds a driver which failed '
+                      'discovery_failure_threshold times in a row is '
+                      'skipped for, before it is tried again.')),
+    cfg.IntOpt('program_max_concurrency',
+               default=4,
+               min=1,
+               help=_('Maximum number of FPGAs programmed at once. The '
+                      'regions of a PF are always programmed one after '
+                      'another.')),
+    cfg.IntOpt('program_job_ttl',
+               default=3600,
+               min=0,
+               help=_('Number of seconds the status of a finished FPGA '
+                      'program job is kept for.')),
+    cfg.StrOpt('image_cache_dir',
+               default='$state_path/fpga_images',
+               help=_('Directory where the FPGA images downloaded by the '
+                      'agent are cached.')),
+    cfg.IntOpt('image_cache_size',
+               default=10240,
+               min=0,
+               help=_('Size in MiB above which the least recently used FPGA '
+                      'images are removed from the image cache, 0 means no '
+                      'limit.')),
+    cfg.IntOpt('image_download_timeout',
+               default=600,
+               min=1,
+               help=_('Number of seconds the download of an FPGA image may '
+                      'take, and may wait for the image server. A download '
+                      'which takes longer fails, and so does the program '
+                      'job waiting for it.')),
+]
+
+opt_group = cfg.OptGroup(name='agent',
+                         title='Options for the cyborg-agent service')
+
+
+AGENT_OPTS = (opts)
+
+
+def register_opts(conf):
+    conf.register_group(opt_group)
+    conf.register_opts(opts, group=opt_group)
+
+
+def list_opts():
+    return {
+        opt_group: AGENT_OPTS
+    }
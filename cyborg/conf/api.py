@@ -45,9 +45,45 @@ opts = [
                       "host URL. If the API is operating behind a proxy, you "
                       "will want to change this to represent the proxy's URL. "
                       "Defaults to None.")),
+    cfg.IntOpt('max_limit',
+               default=1000,
+               min=1,
+               help=_('The maximum number of items returned in a single '
+                      'response from a collection resource, also when the '
+                      'request gives no limit. A truncated response has a '
+                      '"next" link to the following items. The streamed '
+                      'collections, see stream_collections, are not '
+                      'capped.')),
     cfg.StrOpt('api_paste_config',
                default="api-paste.ini",
                help="Configuration file for WSGI definition of API."),
+    cfg.BoolOpt('stream_collections',
+                default=False,
+                help=_('Send the accelerator and deployable collections '
+                       'in chunks, serialized as their rows are read from '
+                       'the database, instead of building the whole '
+                       'response first. This bounds the memory used by '
+                       'large collections, but an error while reading '
+                       'them truncates a response already started. The '
+                       'streamed collections are not capped by '
+                       'max_limit.')),
+    cfg.IntOpt('stream_batch_size',
+               default=500,
+               min=1,
+               help=_('Number of rows read from the database and sent at '
+                      'once when streaming the collections.')),
+    cfg.IntOpt('policy_cache_size',
+               default=1000,
+               min=0,
+               help=_('Maximum number of policy decisions cached, keyed by '
+                      'rule, target and credentials. 0 disables the '
+                      'cache.')),
+    cfg.IntOpt('policy_cache_ttl',
+               default=5,
+               min=0,
+               help=_('Number of seconds a policy decision is cached for. '
+                      'This bounds how long a change of the policy file '
+                      'takes to apply.')),
 ]
 
 opt_group = cfg.OptGroup(name='api',
@@ -0,0 +1,60 @@
+# Copyright 2018 Huawei Technologies Co.,LTD.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_config import cfg
+
+from cyborg.common.i18n import _
+
+
+opts = [
+    cfg.IntOpt('query_cache_size',
+               default=1000,
+               min=0,
+               help=_('Maximum number of deployable queries whose results '
+                      'are cached by cyborg-conductor. The results are '
+                      'dropped when conductor changes the deployables. 0 '
+                      'disables the cache.')),
+    cfg.IntOpt('query_cache_ttl',
+               default=30,
+               min=1,
+               help=_('Number of seconds the result of a deployable query '
+                      'is cached by cyborg-conductor. This bounds how long '
+                      'a change made through another conductor can be '
+                      'missed.')),
+    cfg.IntOpt('deployable_tombstone_ttl',
+               default=7 * 24 * 3600,
+               min=1,
+               help=_('Number of seconds the deletion of a deployable is '
+                      'reported by GET /v1/deployables?changes_since for. '
+                      'Older deletions are purged by cyborg-conductor, and '
+                      'changes_since cannot be older than that.')),
+]
+
+opt_group = cfg.OptGroup(name='conductor',
+                         title='Options for the cyborg-conductor service')
+
+
+CONDUCTOR_OPTS = (opts)
+
+
+def register_opts(conf):
+    conf.register_group(opt_group)
+    conf.register_opts(opts, group=opt_group)
+
+
+def list_opts():
+    return {
+        opt_group: CONDUCTOR_OPTS
+    }
@@ -74,6 +74,14 @@ placement_opts = [
                help=_('Type of the placement endpoint to use.  This endpoint '
                       'will be looked up in the keystone catalog and should '
                       'be one of public, internal or admin.')),
+    cfg.IntOpt('resource_provider_cache_ttl',
+               default=300,
+               min=0,
+               help=_('Number of seconds the generation and inventories of '
+                      'a resource provider are cached before being refreshed '
+                      'from placement. They are also refreshed after an '
+                      'update conflict. 0 refreshes them before each '
+                      'update.')),
 ]
 
 
@@ -47,17 +47,21 @@ class Connection(object):
         """Create a new accelerator."""
 
     @abc.abstractmethod
-    def accelerator_get(self, context, uuid):
+    def accelerator_get(self, context, uuid, use_slave=False):
         """Get requested accelerator."""
 
     @abc.abstractmethod
     def accelerator_list(self, context, limit, marker, sort_key, sort_dir,
-                         project_only):
-        """Get requested list of accelerators."""
+                         project_only, use_slave=False, yield_per=None):
+        """Get requested list of accelerators.
+
+        When yield_per is set, an iterator fetching the accelerators that
+        many at a time is returned instead of a list.
+        """
 
     @abc.abstractmethod
-    def accelerator_update(self, context, uuid, values):
-        """Update an accelerator."""
+    def accelerator_update(self, context, uuid, values, generation=None):
+        """Update an accelerator, if it is still at generation when given."""
 
     @abc.abstractmethod
     def accelerator_delete(self, context, uuid):
@@ -69,7 +73,7 @@ class Connection(object):
         """Create a new deployable."""
 
     @abc.abstractmethod
-    def deployable_get(self, context, uuid):
+    def deployable_get(self, context, uuid, use_slave=False):
         """Get requested deployable."""
 
     @abc.abstractmethod
@@ -77,17 +81,68 @@ class Connection(object):
         """Get requested deployable by host."""
 
     @abc.abstractmethod
-    def deployable_list(self, context):
+    def deployable_get_tree(self, context, uuid, use_slave=False):
+        """Get all the deployables of the tree a deployable belongs to."""
+
+    @abc.abstractmethod
+    def deployable_get_trees_by_host(self, context, host):
+        """Get all the deployables of the trees rooted on a host."""
+
+    @abc.abstractmethod
+    def deployable_list(self, context, use_slave=False):
         """Get requested list of deployables."""
 
     @abc.abstractmethod
-    def deployable_update(self, context, uuid, values):
-        """Update a deployable."""
+    def deployable_update(self, context, uuid, values, generation=None):
+        """Update a deployable, if it is still at generation when given."""
 
     @abc.abstractmethod
     def deployable_delete(self, context, uuid):
         """Delete a deployable."""
 
+    @abc.abstractmethod
+    def deployable_sync(self, context, host, creates, updates, deletes,
+                        generation=None):
+        """Create, update and delete deployables of a host at once."""
+
+    @abc.abstractmethod
+    def deployable_claim(self, context, instance_uuid, uuids):
+        """Claim the given free deployables for an instance at once."""
+
+    @abc.abstractmethod
+    def deployable_claim_by_filters(self, context, instance_uuid, filters,
+                                    count=1):
+        """Claim free deployables matching filters for an instance."""
+
+    @abc.abstractmethod
+    def deployable_release(self, context, instance_uuid, uuids=None):
+        """Release the deployables claimed by an instance."""
+
+    @abc.abstractmethod
+    def deployable_get_host_generation(self, context, host):
+        """Get the generation of the deployables of a host."""
+
+    @abc.abstractmethod
+    def deployable_get_changed_since(self, context, since, filters=None,
+                                     limit=None, marker=None, sort_keys=None,
+                                     sort_dirs=None, use_slave=False,
+                                     yield_per=None):
+        """Get the deployables created or updated since a time."""
+
+    @abc.abstractmethod
+    def deployable_tombstone_get_since(self, context, since, host=None,
+                                       use_slave=False):
+        """Get the tombstones of the deployables deleted since a time."""
+
+    @abc.abstractmethod
+    def deployable_tombstone_purge(self, context, before):
+        """Delete the tombstones of the deployables deleted before a time."""
+
+    @abc.abstractmethod
+    def deployable_summary(self, context, group_by, filters=None,
+                           use_slave=False):
+        """Count the deployables matching filters per group."""
+
     @abc.abstractmethod
     def deployable_get_by_filters(self, context,
                                   filters, sort_key='created_at',
@@ -95,6 +150,17 @@ class Connection(object):
                                   marker=None, columns_to_join=None):
         """Get requested deployable by filters."""
 
+    @abc.abstractmethod
+    def deployable_get_by_filters_sort(self, context, filters, limit=None,
+                                       marker=None, join_columns=None,
+                                       sort_keys=None, sort_dirs=None,
+                                       use_slave=False, yield_per=None):
+        """Get a sorted page of deployables matching filters.
+
+        When yield_per is set, an iterator fetching the deployables that
+        many at a time is returned instead of a list.
+        """
+
     @abc.abstractmethod
     def deployable_get_by_filters_with_attributes(self, context,
                                                   filters):
@@ -112,6 +178,11 @@ class Connection(object):
     def attribute_get_by_deployable_id(self, context, deployable_id):
         """Get requested attribute by attribute id."""
 
+    @abc.abstractmethod
+    def attribute_get_by_deployable_ids(self, context, deployable_ids,
+                                        use_slave=False):
+        """Get the attributes of all the given deployables."""
+
     @abc.abstractmethod
     def attribute_get_by_filter(self, context, filters):
         """Get requested attribute by kv pair and attribute id."""
@@ -0,0 +1,33 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""add attributes key value index.
+
+Revision ID: 1e5c2a4b7d3f
+Revises: f50980397351
+Create Date: 2018-04-20 10:12:37.214852
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '1e5c2a4b7d3f'
+down_revision = 'f50980397351'
+
+
+from alembic import op
+
+
+def upgrade():
+    # key and value are TEXT columns, MySQL can only index a prefix of them.
+    op.create_index('attributes_key_value_deployable_id_idx', 'attributes',
+                    ['key', 'value', 'deployable_id'],
+                    mysql_length={'key': 255, 'value': 255})
@@ -0,0 +1,33 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""add generation to accelerators and deployables.
+
+Revision ID: 4c7a9e2b5d18
+Revises: 1e5c2a4b7d3f
+Create Date: 2018-05-14 16:41:08.593127
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '4c7a9e2b5d18'
+down_revision = '1e5c2a4b7d3f'
+
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    for table in ('accelerators', 'deployables'):
+        op.add_column(table, sa.Column('generation', sa.Integer(),
+                                       nullable=False, server_default='1'))
@@ -0,0 +1,45 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""add deployable hosts generation.
+
+Revision ID: 5a3d8c2f6e91
+Revises: 9b4f6d1e3a72
+Create Date: 2018-06-04 10:21:47.305214
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '5a3d8c2f6e91'
+down_revision = '9b4f6d1e3a72'
+
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.create_table(
+        'deployable_hosts',
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('host', sa.String(length=255), nullable=False),
+        sa.Column('generation', sa.Integer(), nullable=False,
+                  server_default='1'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('host', name='uniq_deployable_hosts0host'),
+        mysql_ENGINE='InnoDB',
+        mysql_DEFAULT_CHARSET='UTF8'
+    )
+    op.execute('INSERT INTO deployable_hosts (host) '
+               'SELECT DISTINCT host FROM deployables')
@@ -0,0 +1,41 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""add deployables host and capacity indexes.
+
+Revision ID: 7d2e4b8a1f63
+Revises: 4c7a9e2b5d18
+Create Date: 2018-05-22 09:27:51.306418
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '7d2e4b8a1f63'
+down_revision = '4c7a9e2b5d18'
+
+
+from alembic import op
+
+
+def upgrade():
+    # The host lookups of the agents use the leading column of the first
+    # index, a separate index on host alone would be redundant.
+    # These columns were created as TEXT, MySQL can only index a prefix of
+    # them.
+    op.create_index('deployables_host_availability_type_idx', 'deployables',
+                    ['host', 'availability', 'type'],
+                    mysql_length={'host': 255, 'availability': 255,
+                                  'type': 255})
+    op.create_index('deployables_vendor_type_availability_idx',
+                    'deployables', ['vendor', 'type', 'availability'],
+                    mysql_length={'vendor': 255, 'type': 255,
+                                  'availability': 255})
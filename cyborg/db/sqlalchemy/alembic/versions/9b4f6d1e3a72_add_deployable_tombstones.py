@@ -0,0 +1,47 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""add deployable tombstones and changes indexes.
+
+Revision ID: 9b4f6d1e3a72
+Revises: 7d2e4b8a1f63
+Create Date: 2018-05-29 14:03:26.817540
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '9b4f6d1e3a72'
+down_revision = '7d2e4b8a1f63'
+
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.create_index('deployables_created_at_idx', 'deployables',
+                    ['created_at'])
+    op.create_index('deployables_updated_at_idx', 'deployables',
+                    ['updated_at'])
+
+    op.create_table(
+        'deployable_tombstones',
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('uuid', sa.String(length=36), nullable=False),
+        sa.Column('host', sa.String(length=255), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.Index('deployable_tombstones_created_at_idx', 'created_at'),
+        mysql_ENGINE='InnoDB',
+        mysql_DEFAULT_CHARSET='UTF8'
+    )
@@ -15,8 +15,8 @@
 
 """SQLAlchemy storage backend."""
 
+import random
 import threading
-import copy
 
 from oslo_db import api as oslo_db_api
 from oslo_db import exception as db_exc
@@ -26,24 +26,83 @@ from oslo_log import log
 from oslo_utils import strutils
 from oslo_utils import uuidutils
 from sqlalchemy.orm.exc import NoResultFound
+from sqlalchemy.orm.exc import StaleDataError
 
 from cyborg.common import exception
 from cyborg.common.i18n import _
 from cyborg.db import api
 from cyborg.db.sqlalchemy import models
-from sqlalchemy import or_
 from sqlalchemy import and_
+from sqlalchemy import exists
+from sqlalchemy import func
+from sqlalchemy import or_
 
 _CONTEXT = threading.local()
 LOG = log.getLogger(__name__)
 
 
+# The deployable filters matched against the deployables columns, the
+# other ones are matched against their attributes.
+DEPLOYABLE_EXACT_FILTER_NAMES = ['uuid', 'name',
+                                 'parent_uuid', 'root_uuid',
+                                 'pcie_address', 'host',
+                                 'board', 'vendor', 'version',
+                                 'type', 'assignable', 'instance_uuid',
+                                 'availability', 'accelerator_id']
+
+# The deployable columns the deployables can be counted by.
+DEPLOYABLE_SUMMARY_GROUP_BY = ['host', 'board', 'vendor', 'version', 'type',
+                               'assignable', 'availability']
+
+# The deployable columns reported by the agents. Only their changes
+# increment the generation of the host, a claim or a release does not.
+DEPLOYABLE_HOST_TRACKED_NAMES = ['name', 'parent_uuid', 'pcie_address',
+                                 'host', 'board', 'vendor', 'version',
+                                 'type', 'assignable']
+
+# The number of free deployables fetched per deployable to claim, among
+# which concurrent claimers pick at random.
+CLAIM_CANDIDATES_PER_DEPLOYABLE = 16
+
+
+def _split_deployable_filters(filters):
+    """Split deployable filters into column and attribute filters.
+
+    The given dict is left untouched, the two returned ones are new.
+    """
+    column_filters = {}
+    attribute_filters = {}
+    for key, value in filters.items():
+        if key in DEPLOYABLE_EXACT_FILTER_NAMES:
+            column_filters[key] = value
+        else:
+            attribute_filters[key] = value
+    return column_filters, attribute_filters
+
+
+def _add_deployable_tombstones(query):
+    """Record the deletion of the deployables matched by a query.
+
+    Must be called in the transaction deleting them, before they are.
+    """
+    tombstones = [{'uuid': uuid, 'host': host} for uuid, host in
+                  query.with_entities(models.Deployable.uuid,
+                                      models.Deployable.host)]
+    if tombstones:
+        query.session.bulk_insert_mappings(models.DeployableTombstone,
+                                           tombstones)
+
+
 def get_backend():
     """The backend is this module itself."""
     return Connection()
 
 
-def _session_for_read():
+def _session_for_read(use_slave=False):
+    if use_slave:
+        # Served by [database]slave_connection when it is set, so the
+        # data may lag behind the latest writes.
+        return enginefacade.reader.async_.using(_CONTEXT)
     return enginefacade.reader.using(_CONTEXT)
 
 
@@ -65,12 +124,16 @@ def model_query(context, model, *args, **kwargs):
       if set to False or absent, then will not do query filter with context's
       project_id.
     :type project_only: bool
+    :keyword use_slave:
+      If set to True, then the query may be run on the slave_connection
+      database, whose data can be stale.
+    :type use_slave: bool
     """
 
     if kwargs.pop("project_only", False):
         kwargs["project_id"] = context.tenant
 
-    with _session_for_read() as session:
+    with _session_for_read(kwargs.pop("use_slave", False)) as session:
         query = sqlalchemyutils.model_query(
             model, session, args, **kwargs)
         return query
@@ -94,7 +157,67 @@ def add_identity_filter(query, value):
         raise exception.InvalidIdentity(identity=value)
 
 
-def _paginate_query(context, model, limit, marker, sort_key, sort_dir, query):
+def _update_generation(query, model, values, generation=None):
+    """Update the rows of a query and increment their generation.
+
+    This is a single UPDATE statement, taking no lock beforehand.
+
+    :param values: the changed values of the rows.
+    :param generation: if not None, only the rows still at this
+                       generation are updated.
+    :returns: the number of updated rows.
+    """
+    if generation is not None:
+        query = query.filter(model.generation == generation)
+    values = dict(values, generation=model.generation + 1)
+    return query.update(values, synchronize_session=False)
+
+
+def _bump_deployable_host_generation(context, host, generation=None):
+    """Increment the generation of the deployables of a host.
+
+    The conditional UPDATE locks the row of the host until the end of the
+    transaction, so the writes to the deployables of a host are serialized
+    and the generation can not be read in between.
+
+    :param generation: if not None, the generation the host must still be
+                       at, 0 for a host without deployables yet.
+    :returns: the new generation of the host.
+    :raises: DeployableHostGenerationConflict if generation is stale.
+    """
+    query = model_query(context, models.DeployableHost).filter_by(host=host)
+    if _update_generation(query, models.DeployableHost, {}, generation):
+        return query.with_entities(models.DeployableHost.generation).scalar()
+    if generation:
+        raise exception.DeployableHostGenerationConflict(
+            host=host, generation=generation)
+    # The first write to the deployables of the host.
+    with _session_for_write() as session:
+        try:
+            with session.begin_nested():
+                session.add(models.DeployableHost(host=host))
+        except db_exc.DBDuplicateEntry:
+            # Created concurrently.
+            if generation is not None:
+                raise exception.DeployableHostGenerationConflict(
+                    host=host, generation=generation)
+            return _bump_deployable_host_generation(context, host)
+    return 1
+
+
+def _bump_deployable_hosts_generation(context, query):
+    """Increment the generation of the hosts of the deployables of a query.
+
+    The hosts are locked in order, so that concurrent writers spanning
+    several hosts do not deadlock.
+    """
+    hosts = query.with_entities(models.Deployable.host).distinct()
+    for host in sorted(row.host for row in hosts):
+        _bump_deployable_host_generation(context, host)
+
+
+def _paginate_query(context, model, limit, marker, sort_key, sort_dir, query,
+                    yield_per=None):
     sort_keys = ['id']
     if sort_key and sort_key not in sort_keys:
         sort_keys.insert(0, sort_key)
@@ -106,6 +229,8 @@ def _paginate_query(context, model, limit, marker, sort_key, sort_dir, query):
         raise exception.InvalidParameterValue(
             _('The sort_key value "%(key)s" is an invalid field for sorting')
             % {'key': sort_key})
+    if yield_per:
+        return query.yield_per(yield_per)
     return query.all()
 
 
@@ -130,51 +255,64 @@ class Connection(api.Connection):
                 raise exception.AcceleratorAlreadyExists(uuid=values['uuid'])
             return accelerator
 
-    def accelerator_get(self, context, uuid):
+    def accelerator_get(self, context, uuid, use_slave=False):
         query = model_query(
             context,
-            models.Accelerator).filter_by(uuid=uuid)
+            models.Accelerator, use_slave=use_slave).filter_by(uuid=uuid)
         try:
             return query.one()
         except NoResultFound:
             raise exception.AcceleratorNotFound(uuid=uuid)
 
     def accelerator_list(self, context, limit, marker, sort_key, sort_dir,
-                         project_only):
+                         project_only, use_slave=False, yield_per=None):
         query = model_query(context, models.Accelerator,
-                            project_only=project_only)
+                            project_only=project_only, use_slave=use_slave)
         return _paginate_query(context, models.Accelerator, limit, marker,
-                               sort_key, sort_dir, query)
+                               sort_key, sort_dir, query, yield_per=yield_per)
+
+    def accelerator_update(self, context, uuid, values, generation=None):
+        """Update an accelerator.
 
-    def accelerator_update(self, context, uuid, values):
+        :param generation: if not None, the accelerator is only updated
+                           when it is still at this generation.
+        :raises: AcceleratorGenerationConflict if generation is stale.
+        """
         if 'uuid' in values:
             msg = _("Cannot overwrite UUID for an existing Accelerator.")
             raise exception.InvalidParameterValue(err=msg)
 
         try:
-            return self._do_update_accelerator(context, uuid, values)
+            return self._do_update_accelerator(context, uuid, values,
+                                               generation)
         except db_exc.DBDuplicateEntry as e:
             if 'name' in e.columns:
                 raise exception.DuplicateAcceleratorName(name=values['name'])
 
     @oslo_db_api.retry_on_deadlock
-    def _do_update_accelerator(self, context, uuid, values):
+    def _do_update_accelerator(self, context, uuid, values, generation=None):
         with _session_for_write():
-            query = model_query(context, models.Accelerator)
-            query = add_identity_filter(query, uuid)
-            try:
-                ref = query.with_lockmode('update').one()
-            except NoResultFound:
+            query = add_identity_filter(
+                model_query(context, models.Accelerator), uuid)
+            if not _update_generation(query, models.Accelerator, values,
+                                      generation):
+                if generation is not None and query.count():
+                    raise exception.AcceleratorGenerationConflict(
+                        uuid=uuid, generation=generation)
                 raise exception.AcceleratorNotFound(uuid=uuid)
-
-            ref.update(values)
-        return ref
+            return query.one()
 
     @oslo_db_api.retry_on_deadlock
     def accelerator_delete(self, context, uuid):
         with _session_for_write():
             query = model_query(context, models.Accelerator)
             query = add_identity_filter(query, uuid)
+            # The deployables of the accelerator are deleted in cascade.
+            deployables = model_query(context, models.Deployable).filter(
+                models.Deployable.accelerator_id.in_(
+                    query.with_entities(models.Accelerator.id)))
+            _bump_deployable_hosts_generation(context, deployables)
+            _add_deployable_tombstones(deployables)
             count = query.delete()
             if count != 1:
                 raise exception.AcceleratorNotFound(uuid=uuid)
@@ -188,6 +326,8 @@ class Connection(api.Connection):
         deployable.update(values)
 
         with _session_for_write() as session:
+            if deployable.host:
+                _bump_deployable_host_generation(context, deployable.host)
             try:
                 session.add(deployable)
                 session.flush()
@@ -195,10 +335,10 @@ class Connection(api.Connection):
                 raise exception.DeployableAlreadyExists(uuid=values['uuid'])
             return deployable
 
-    def deployable_get(self, context, uuid):
+    def deployable_get(self, context, uuid, use_slave=False):
         query = model_query(
             context,
-            models.Deployable).filter_by(uuid=uuid)
+            models.Deployable, use_slave=use_slave).filter_by(uuid=uuid)
         try:
             return query.one()
         except NoResultFound:
@@ -210,70 +350,301 @@ class Connection(api.Connection):
             models.Deployable).filter_by(host=host)
         return query.all()
 
-    def deployable_list(self, context):
-        query = model_query(context, models.Deployable)
+    def deployable_get_tree(self, context, uuid, use_slave=False):
+        """Return all the deployables of the tree a deployable belongs to.
+
+        The tree is read with a single query on the root_uuid index, the
+        deployables are ordered by id so that parents, created first,
+        come before their children.
+        """
+        root_uuid = model_query(
+            context, models.Deployable, models.Deployable.root_uuid,
+            use_slave=use_slave).filter_by(uuid=uuid)
+        query = model_query(context, models.Deployable,
+                            use_slave=use_slave).filter(
+            models.Deployable.root_uuid.in_(root_uuid.subquery())).order_by(
+            models.Deployable.id)
+        deployables = query.all()
+        if not deployables:
+            raise exception.DeployableNotFound(uuid=uuid)
+        return deployables
+
+    def deployable_get_trees_by_host(self, context, host):
+        """Return all the deployables of the trees rooted on a host.
+
+        See deployable_get_tree, the trees are read with a single query.
+        """
+        root_uuids = model_query(
+            context, models.Deployable, models.Deployable.uuid
+        ).filter_by(host=host, parent_uuid=None)
+        query = model_query(context, models.Deployable).filter(
+            models.Deployable.root_uuid.in_(root_uuids.subquery())).order_by(
+            models.Deployable.id)
         return query.all()
 
-    def deployable_update(self, context, uuid, values):
+    def deployable_list(self, context, use_slave=False):
+        query = model_query(context, models.Deployable, use_slave=use_slave)
+        return query.all()
+
+    def deployable_update(self, context, uuid, values, generation=None):
+        """Update a deployable.
+
+        :param generation: if not None, the deployable is only updated
+                           when it is still at this generation.
+        :raises: DeployableGenerationConflict if generation is stale.
+        """
         if 'uuid' in values:
             msg = _("Cannot overwrite UUID for an existing Deployable.")
             raise exception.InvalidParameterValue(err=msg)
 
         try:
-            return self._do_update_deployable(context, uuid, values)
+            return self._do_update_deployable(context, uuid, values,
+                                              generation)
         except db_exc.DBDuplicateEntry as e:
             if 'name' in e.columns:
                 raise exception.DuplicateDeployableName(name=values['name'])
 
     @oslo_db_api.retry_on_deadlock
-    def _do_update_deployable(self, context, uuid, values):
+    def _do_update_deployable(self, context, uuid, values, generation=None):
         with _session_for_write():
-            query = model_query(context, models.Deployable)
-            # query = add_identity_filter(query, uuid)
-            query = query.filter_by(uuid=uuid)
-            try:
-                ref = query.with_lockmode('update').one()
-            except NoResultFound:
+            query = model_query(context, models.Deployable).filter_by(
+                uuid=uuid)
+            hosts = set()
+            if set(values) & set(DEPLOYABLE_HOST_TRACKED_NAMES):
+                hosts.update(row.host for row in query.with_entities(
+                    models.Deployable.host))
+            if hosts and values.get('host'):
+                # Moved to another host.
+                hosts.add(values['host'])
+            for host in sorted(hosts):
+                _bump_deployable_host_generation(context, host)
+            if not _update_generation(query, models.Deployable, values,
+                                      generation):
+                if generation is not None and query.count():
+                    raise exception.DeployableGenerationConflict(
+                        uuid=uuid, generation=generation)
                 raise exception.DeployableNotFound(uuid=uuid)
-
-            ref.update(values)
-        return ref
+            return query.one()
 
     @oslo_db_api.retry_on_deadlock
     def deployable_delete(self, context, uuid):
         with _session_for_write():
             query = model_query(context, models.Deployable)
             query = add_identity_filter(query, uuid)
+            _bump_deployable_hosts_generation(context, query)
+            _add_deployable_tombstones(query)
             query.update({'root_uuid': None})
             count = query.delete()
             if count != 1:
                 raise exception.DeployableNotFound(uuid=uuid)
 
-    def deployable_get_by_filters_with_attributes(self, context,
-                                                  filters):
+    def deployable_get_host_generation(self, context, host):
+        """Return the generation of the deployables of a host.
+
+        The generation is an integer incremented by every transaction
+        creating or deleting deployables of the host, or updating their
+        columns reported by the agent, 0 for a host without deployables
+        yet. Claims and releases leave it unchanged. It is stored in the
+        DB, so it holds for all the conductors sharing it.
+        """
+        generation = model_query(
+            context, models.DeployableHost,
+            models.DeployableHost.generation).filter_by(host=host).scalar()
+        return generation or 0
+
+    def deployable_sync(self, context, host, creates, updates, deletes,
+                        generation=None):
+        """Create, update and delete deployables of a host in one transaction.
+
+        :param host: the host owning all the deployables to update or delete.
+        :param creates: a list of value dicts of the deployables to create.
+        :param updates: a dict mapping the uuids of the deployables to update
+                        to their changed values.
+        :param deletes: a list of the uuids of the deployables to delete.
+        :param generation: if not None, the changes are only applied when
+                           it is still the generation of the host.
+        :returns: a tuple of the created and updated deployables and the new
+                  generation of the host.
+        :raises: DeployableHostGenerationConflict if generation is stale.
+        """
+        updates = dict(updates)
+        for uuid, values in updates.items():
+            if 'uuid' in values:
+                msg = _("Cannot overwrite UUID for an existing Deployable.")
+                raise exception.InvalidParameterValue(err=msg)
+            # NOTE: The generation is maintained by the DB: flushing the
+            # updated deployables increments it, and fails if they changed
+            # since they were read.
+            updates[uuid] = dict(values)
+            updates[uuid].pop('generation', None)
+
+        refs = []
+        with _session_for_write() as session:
+            # First, so that the host stays at the checked generation until
+            # the changes are committed.
+            new_generation = _bump_deployable_host_generation(
+                context, host, generation)
+
+            if deletes:
+                query = model_query(context, models.Deployable).filter_by(
+                    host=host).filter(models.Deployable.uuid.in_(deletes))
+                _add_deployable_tombstones(query)
+                query.update({'parent_uuid': None, 'root_uuid': None},
+                             synchronize_session=False)
+                count = query.delete(synchronize_session=False)
+                if count != len(set(deletes)):
+                    raise exception.DeployableNotFound(uuid=deletes)
+
+            if updates:
+                query = model_query(context, models.Deployable).filter_by(
+                    host=host).filter(
+                    models.Deployable.uuid.in_(list(updates)))
+                for ref in query.all():
+                    ref.update(updates.pop(ref.uuid))
+                    refs.append(ref)
+                if updates:
+                    raise exception.DeployableNotFound(uuid=list(updates))
+
+            for values in creates:
+                values = dict(values)
+                if not values.get('uuid'):
+                    values['uuid'] = uuidutils.generate_uuid()
+                values.pop('id', None)
+                values.pop('generation', None)
+                deployable = models.Deployable()
+                deployable.update(values)
+                session.add(deployable)
+                refs.append(deployable)
+            try:
+                session.flush()
+            except db_exc.DBDuplicateEntry as e:
+                raise exception.DeployableAlreadyExists(uuid=e.value)
+            except StaleDataError:
+                raise exception.DeployableHostGenerationConflict(
+                    host=host, generation=generation)
+        return refs, new_generation
 
-        exact_match_filter_names = ['uuid', 'name',
-                                    'parent_uuid', 'root_uuid',
-                                    'pcie_address', 'host',
-                                    'board', 'vendor', 'version',
-                                    'type', 'assignable', 'instance_uuid',
-                                    'availability', 'accelerator_id']
-        attribute_filters = {}
-        filters_copy = copy.deepcopy(filters)
-        for key, value in filters_copy.iteritems():
-            if key not in exact_match_filter_names:
-                # This key is not in the deployable regular fields
-                value = filters.pop(key)
-                attribute_filters.update({key: value})
+    @oslo_db_api.retry_on_deadlock
+    def deployable_claim(self, context, instance_uuid, uuids):
+        """Claim the given deployables for an instance in one transaction.
+
+        Each deployable is flipped from free to claimed by a conditional
+        UPDATE, so that concurrent claims need no lock taken beforehand,
+        neither on the deployables nor on their host: the claim of a
+        deployable fails when another one changed it first.
+
+        :param instance_uuid: the UUID of the instance claiming them.
+        :param uuids: the UUIDs of the deployables to claim.
+        :returns: the claimed deployables.
+        :raises: DeployableNotAvailable if any of the deployables is not
+                 free, nothing is claimed then.
+        """
+        uuids = set(uuids)
+        with _session_for_write():
+            query = model_query(context, models.Deployable).filter(
+                models.Deployable.uuid.in_(uuids))
+            count = _update_generation(
+                query.filter_by(availability='free'), models.Deployable,
+                {'availability': 'claimed', 'instance_uuid': instance_uuid})
+            refs = query.all()
+            if count != len(uuids):
+                raise exception.DeployableNotAvailable(uuids=sorted(
+                    uuids - set(ref.uuid for ref in refs
+                                if ref.instance_uuid == instance_uuid)))
+        return refs
 
+    @oslo_db_api.retry_on_deadlock
+    def deployable_claim_by_filters(self, context, instance_uuid, filters,
+                                    count=1):
+        """Claim free deployables matching filters for an instance.
+
+        The free deployables are tried in a random order, so that
+        concurrent claimers rarely race for the same ones, and each one
+        is claimed by a conditional UPDATE as in deployable_claim. A
+        deployable claimed by someone else in between is skipped.
+
+        :param instance_uuid: the UUID of the instance claiming them.
+        :param filters: the column and attribute filters the deployables
+                        must match.
+        :param count: the number of deployables to claim, all of them are
+                      claimed in one transaction.
+        :returns: the claimed deployables.
+        :raises: DeployableClaimFailed if fewer than count deployables
+                 could be claimed, nothing is claimed then.
+        """
+        column_filters, attribute_filters = _split_deployable_filters(
+            filters)
+        column_filters['availability'] = 'free'
+        with _session_for_write():
+            query = self._exact_deployable_filter_with_attributes(
+                model_query(context, models.Deployable),
+                column_filters, DEPLOYABLE_EXACT_FILTER_NAMES,
+                attribute_filters)
+            claimed = []
+            tried = set()
+            while query is not None and len(claimed) < count:
+                # The candidates are fetched a window at a time, skipping
+                # the ones already tried which may still look free in
+                # this transaction.
+                window = query.with_entities(models.Deployable.id)
+                if tried:
+                    window = window.filter(~models.Deployable.id.in_(tried))
+                candidates = [row.id for row in window.limit(
+                    (count - len(claimed)) * CLAIM_CANDIDATES_PER_DEPLOYABLE)]
+                if not candidates:
+                    break
+                random.shuffle(candidates)
+                for dep_id in candidates:
+                    tried.add(dep_id)
+                    if _update_generation(
+                            model_query(context, models.Deployable).filter_by(
+                                id=dep_id, availability='free'),
+                            models.Deployable,
+                            {'availability': 'claimed',
+                             'instance_uuid': instance_uuid}):
+                        claimed.append(dep_id)
+                        if len(claimed) == count:
+                            break
+            if len(claimed) != count:
+                raise exception.DeployableClaimFailed(count=count,
+                                                      filters=filters)
+            return model_query(context, models.Deployable).filter(
+                models.Deployable.id.in_(claimed)).all()
+
+    @oslo_db_api.retry_on_deadlock
+    def deployable_release(self, context, instance_uuid, uuids=None):
+        """Release the deployables claimed by an instance.
+
+        :param instance_uuid: the UUID of the instance which claimed them.
+        :param uuids: if not None, only these deployables are released.
+        :returns: the released deployables.
+        """
+        with _session_for_write():
+            query = model_query(context, models.Deployable).filter_by(
+                instance_uuid=instance_uuid, availability='claimed')
+            if uuids is not None:
+                query = query.filter(models.Deployable.uuid.in_(uuids))
+            ids = [row.id for row in query.with_entities(
+                models.Deployable.id)]
+            if not ids:
+                return []
+            _update_generation(
+                query.filter(models.Deployable.id.in_(ids)),
+                models.Deployable,
+                {'availability': 'free', 'instance_uuid': None})
+            return model_query(context, models.Deployable).filter(
+                models.Deployable.id.in_(ids)).all()
+
+    def deployable_get_by_filters_with_attributes(self, context,
+                                                  filters):
+        filters, attribute_filters = _split_deployable_filters(filters)
         query_prefix = model_query(context, models.Deployable)
-        filters = copy.deepcopy(filters)
 
         # Filter the query
         query_prefix = self._exact_deployable_filter_with_attributes(
             query_prefix,
             filters,
-            exact_match_filter_names,
+            DEPLOYABLE_EXACT_FILTER_NAMES,
             attribute_filters
             )
         if query_prefix is None:
@@ -281,6 +652,43 @@ class Connection(api.Connection):
         deployables = query_prefix.all()
         return deployables
 
+    def deployable_summary(self, context, group_by, filters=None,
+                           use_slave=False):
+        """Count the deployables per group, in a single GROUP BY query.
+
+        :param group_by: the list of the columns to group the deployables
+                         by, from DEPLOYABLE_SUMMARY_GROUP_BY. Without
+                         any, all the deployables form one group.
+        :param filters: the column and attribute filters the counted
+                        deployables must match.
+        :returns: a list of dicts with the group_by columns of a group and
+                  its number of deployables as "count", ordered by group.
+        :raises: InvalidParameterValue if a column cannot be grouped by.
+        """
+        invalid = [key for key in group_by
+                   if key not in DEPLOYABLE_SUMMARY_GROUP_BY]
+        if invalid:
+            msg = _("Cannot group deployables by %(keys)s, only by "
+                    "%(valid)s.") % {
+                'keys': ', '.join(invalid),
+                'valid': ', '.join(DEPLOYABLE_SUMMARY_GROUP_BY)}
+            raise exception.InvalidParameterValue(err=msg)
+
+        columns = [getattr(models.Deployable, key) for key in group_by]
+        query = model_query(context, models.Deployable, *(
+            columns + [func.count(models.Deployable.id)]),
+            use_slave=use_slave)
+        column_filters, attribute_filters = _split_deployable_filters(
+            filters or {})
+        query = self._exact_deployable_filter_with_attributes(
+            query, column_filters, DEPLOYABLE_EXACT_FILTER_NAMES,
+            attribute_filters)
+        if query is None:
+            return []
+        query = query.group_by(*columns).order_by(*columns)
+        return [dict(zip(list(group_by) + ['count'], row))
+                for row in query]
+
     def deployable_get_by_filters(self, context,
                                   filters, sort_key='created_at',
                                   sort_dir='desc', limit=None,
@@ -334,11 +742,13 @@ class Connection(api.Connection):
         if filter_dict:
             query = query.filter(*[getattr(models.Deployable, k) == v
                                    for k, v in filter_dict.items()])
-        if attribute_filters:
-            query = query.outerjoin(models.Attribute)
-            query = query.filter(or_(*[and_(models.Attribute.key == k,
-                                       models.Attribute.value == v)
-                                       for k, v in attribute_filters.items()]))
+        # A deployable must have all the attributes, each one is checked
+        # by an EXISTS subquery using the (key, value, deployable_id) index.
+        for k, v in attribute_filters.items():
+            query = query.filter(exists().where(and_(
+                models.Attribute.deployable_id == models.Deployable.id,
+                models.Attribute.key == k,
+                models.Attribute.value == v)))
         return query
 
     def _exact_deployable_filter(self, query, filters, legal_keys):
@@ -381,12 +791,43 @@ class Connection(api.Connection):
 
     def deployable_get_by_filters_sort(self, context, filters, limit=None,
                                        marker=None, join_columns=None,
-                                       sort_keys=None, sort_dirs=None):
+                                       sort_keys=None, sort_dirs=None,
+                                       use_slave=False, yield_per=None):
         """Return deployables that match all filters sorted by the given
         keys. Deleted deployables will be returned by default, unless
         there's a filter that says otherwise.
-        """
 
+        Keys of filters which are not deployable fields are matched
+        against the deployable's attributes. When a marker deployable is
+        given, only the deployables after it in the sort order are
+        returned, at most limit of them. When yield_per is set, the
+        deployables are fetched that many at a time as the returned
+        iterator is consumed.
+        """
+        return self._deployable_get_by_filters_sort(
+            context, filters, limit=limit, marker=marker,
+            sort_keys=sort_keys, sort_dirs=sort_dirs, use_slave=use_slave,
+            yield_per=yield_per)
+
+    def deployable_get_changed_since(self, context, since, filters=None,
+                                     limit=None, marker=None, sort_keys=None,
+                                     sort_dirs=None, use_slave=False,
+                                     yield_per=None):
+        """Return the deployables created or updated at or after since.
+
+        The created_at and updated_at indexes serve this query. The other
+        arguments are those of deployable_get_by_filters_sort, see
+        deployable_tombstone_get_since for the deleted deployables.
+        """
+        return self._deployable_get_by_filters_sort(
+            context, filters or {}, limit=limit, marker=marker,
+            sort_keys=sort_keys, sort_dirs=sort_dirs, use_slave=use_slave,
+            yield_per=yield_per, changed_since=since)
+
+    def _deployable_get_by_filters_sort(self, context, filters, limit=None,
+                                        marker=None, sort_keys=None,
+                                        sort_dirs=None, use_slave=False,
+                                        yield_per=None, changed_since=None):
         if limit == 0:
             return []
 
@@ -394,25 +835,66 @@ class Connection(api.Connection):
                                                         sort_dirs,
                                                         default_dir='desc')
 
-        query_prefix = model_query(context, models.Deployable)
-        filters = copy.deepcopy(filters)
-
-        exact_match_filter_names = ['uuid', 'name',
-                                    'parent_uuid', 'root_uuid',
-                                    'pcie_address', 'host',
-                                    'board', 'vendor', 'version',
-                                    'type', 'assignable', 'instance_uuid',
-                                    'availability', 'accelerator_id']
+        query_prefix = model_query(context, models.Deployable,
+                                   use_slave=use_slave)
+        filters, attribute_filters = _split_deployable_filters(filters)
 
         # Filter the query
-        query_prefix = self._exact_deployable_filter(query_prefix,
-                                                     filters,
-                                                     exact_match_filter_names)
+        query_prefix = self._exact_deployable_filter_with_attributes(
+            query_prefix,
+            filters,
+            DEPLOYABLE_EXACT_FILTER_NAMES,
+            attribute_filters
+            )
         if query_prefix is None:
             return []
+        if changed_since is not None:
+            query_prefix = query_prefix.filter(or_(
+                models.Deployable.created_at >= changed_since,
+                models.Deployable.updated_at >= changed_since))
+        try:
+            query_prefix = sqlalchemyutils.paginate_query(
+                query_prefix, models.Deployable, limit, sort_keys,
+                marker=marker, sort_dirs=sort_dirs)
+        except db_exc.InvalidSortKey:
+            raise exception.InvalidParameterValue(
+                _('The sort_key value "%(key)s" is an invalid field for '
+                  'sorting') % {'key': sort_keys[0]})
+        if yield_per:
+            return query_prefix.yield_per(yield_per)
         deployables = query_prefix.all()
         return deployables
 
+    def deployable_tombstone_get_since(self, context, since, host=None,
+                                       use_slave=False):
+        """Return the tombstones of the deployables deleted since a time.
+
+        :param since: only the deployables deleted at or after this time
+                      are returned.
+        :param host: if not None, only the deployables of this host are
+                     returned.
+        :returns: the tombstones, whose created_at is the deletion time,
+                  in the order of the deletions.
+        """
+        query = model_query(context, models.DeployableTombstone,
+                            use_slave=use_slave).filter(
+            models.DeployableTombstone.created_at >= since)
+        if host is not None:
+            query = query.filter_by(host=host)
+        return query.order_by(models.DeployableTombstone.created_at,
+                              models.DeployableTombstone.id).all()
+
+    @oslo_db_api.retry_on_deadlock
+    def deployable_tombstone_purge(self, context, before):
+        """Delete the tombstones of the deployables deleted before a time.
+
+        :returns: the number of tombstones deleted.
+        """
+        with _session_for_write():
+            return model_query(context, models.DeployableTombstone).filter(
+                models.DeployableTombstone.created_at < before).delete(
+                synchronize_session=False)
+
     def attribute_create(self, context, values):
         if not values.get('uuid'):
             values['uuid'] = uuidutils.generate_uuid()
@@ -448,6 +930,20 @@ class Connection(api.Connection):
         except NoResultFound:
             raise exception.AttributeNotFound(uuid=uuid)
 
+    def attribute_get_by_deployable_ids(self, context, deployable_ids,
+                                        use_slave=False):
+        """Return the attributes of all the given deployables.
+
+        The attributes are fetched with a single IN query so that callers
+        loading many deployables do not issue one query per deployable.
+        """
+        if not deployable_ids:
+            return []
+        query = model_query(context, models.Attribute,
+                            use_slave=use_slave).filter(
+            models.Attribute.deployable_id.in_(deployable_ids))
+        return query.all()
+
     def attribute_get_by_filter(self, context, filters):
         """Return attributes that matches the filters
         """
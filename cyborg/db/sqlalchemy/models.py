@@ -73,6 +73,10 @@ class Accelerator(Base):
     vendor_id = Column(String(255), nullable=False)
     product_id = Column(String(255), nullable=False)
     remotable = Column(Integer, nullable=False)
+    # Incremented by every update, which can be made conditional on it.
+    generation = Column(Integer, nullable=False, server_default='1')
+
+    __mapper_args__ = {'version_id_col': generation}
 
 
 class Deployable(Base):
@@ -84,6 +88,13 @@ class Deployable(Base):
         Index('deployables_parent_uuid_idx', 'parent_uuid'),
         Index('deployables_root_uuid_idx', 'root_uuid'),
         Index('deployables_accelerator_id_idx', 'accelerator_id'),
+        # Also serves the lookups on host alone.
+        Index('deployables_host_availability_type_idx',
+              'host', 'availability', 'type'),
+        Index('deployables_vendor_type_availability_idx',
+              'vendor', 'type', 'availability'),
+        Index('deployables_created_at_idx', 'created_at'),
+        Index('deployables_updated_at_idx', 'updated_at'),
         table_args()
     )
 
@@ -106,6 +117,41 @@ class Deployable(Base):
     accelerator_id = Column(Integer,
                             ForeignKey('accelerators.id', ondelete="CASCADE"),
                             nullable=False)
+    # Incremented by every update, which can be made conditional on it.
+    generation = Column(Integer, nullable=False, server_default='1')
+
+    __mapper_args__ = {'version_id_col': generation}
+
+
+class DeployableHost(Base):
+    """Represents the generation of the deployables of a host."""
+
+    __tablename__ = 'deployable_hosts'
+    __table_args__ = (
+        schema.UniqueConstraint('host', name='uniq_deployable_hosts0host'),
+        table_args()
+    )
+
+    id = Column(Integer, primary_key=True)
+    host = Column(String(255), nullable=False)
+    # Incremented by every write to the deployables of the host.
+    generation = Column(Integer, nullable=False, server_default='1')
+
+    __mapper_args__ = {'version_id_col': generation}
+
+
+class DeployableTombstone(Base):
+    """Represents a deleted deployable, created_at being its deletion time."""
+
+    __tablename__ = 'deployable_tombstones'
+    __table_args__ = (
+        Index('deployable_tombstones_created_at_idx', 'created_at'),
+        table_args()
+    )
+
+    id = Column(Integer, primary_key=True)
+    uuid = Column(String(36), nullable=False)
+    host = Column(String(255), nullable=False)
 
 
 class Attribute(Base):
@@ -113,6 +159,9 @@ class Attribute(Base):
     __table_args__ = (
         schema.UniqueConstraint('uuid', name='uniq_attributes0uuid'),
         Index('attributes_deployable_id_idx', 'deployable_id'),
+        Index('attributes_key_value_deployable_id_idx',
+              'key', 'value', 'deployable_id',
+              mysql_length={'key': 255, 'value': 255}),
         table_args()
     )
 
@@ -14,6 +14,7 @@
 #    under the License.
 
 from oslo_log import log as logging
+from oslo_utils import versionutils
 from oslo_versionedobjects import base as object_base
 
 from cyborg.db import api as dbapi
@@ -27,7 +28,8 @@ LOG = logging.getLogger(__name__)
 @base.CyborgObjectRegistry.register
 class Accelerator(base.CyborgObject, object_base.VersionedObjectDictCompat):
     # Version 1.0: Initial version
-    VERSION = '1.0'
+    # Version 1.1: Add generation
+    VERSION = '1.1'
 
     dbapi = dbapi.get_instance()
 
@@ -50,6 +52,8 @@ class Accelerator(base.CyborgObject, object_base.VersionedObjectDictCompat):
         # product_id refers to ids like P100
         'remotable': object_fields.IntegerField(nullable=False),
         # remotable ids if remote accelerator is supported
+        'generation': object_fields.IntegerField(nullable=False),
+        # incremented by every update of the accelerator
     }
 
     def create(self, context):
@@ -59,23 +63,58 @@ class Accelerator(base.CyborgObject, object_base.VersionedObjectDictCompat):
         self._from_db_object(self, db_acc)
 
     @classmethod
-    def get(cls, context, uuid):
+    def get(cls, context, uuid, use_slave=False):
         """Find a DB Accelerator and return an Obj Accelerator."""
-        db_acc = cls.dbapi.accelerator_get(context, uuid)
+        db_acc = cls.dbapi.accelerator_get(context, uuid, use_slave=use_slave)
         obj_acc = cls._from_db_object(cls(context), db_acc)
         return obj_acc
 
     @classmethod
-    def list(cls, context, limit, marker, sort_key, sort_dir, project_only):
-        """Return a list of Accelerator objects."""
+    def list(cls, context, limit, marker, sort_key, sort_dir, project_only,
+             use_slave=False):
+        """Return a list of Accelerator objects.
+
+        :param use_slave: read from the slave database, which may be stale,
+                          as GET /v1/accelerators does.
+        """
         db_accs = cls.dbapi.accelerator_list(context, limit, marker, sort_key,
-                                             sort_dir, project_only)
+                                             sort_dir, project_only,
+                                             use_slave=use_slave)
         return cls._from_db_object_list(db_accs, context)
 
+    @classmethod
+    def stream(cls, context, limit, marker, sort_key, sort_dir, project_only,
+               use_slave=False, batch_size=1000):
+        """Yield Accelerator objects as they are read from the DB.
+
+        The arguments are those of list(), the accelerators are fetched
+        batch_size at a time.
+        """
+        for db_acc in cls.dbapi.accelerator_list(
+                context, limit, marker, sort_key, sort_dir, project_only,
+                use_slave=use_slave, yield_per=batch_size):
+            yield cls._from_db_object(cls(context), db_acc)
+
+    def obj_make_compatible(self, primitive, target_version):
+        super(Accelerator, self).obj_make_compatible(primitive, target_version)
+        target_version = versionutils.convert_version_to_tuple(target_version)
+        if target_version < (1, 1):
+            primitive.pop('generation', None)
+
     def save(self, context):
-        """Update an Accelerator record in the DB."""
+        """Update an Accelerator record in the DB.
+
+        The record is only updated if it is still at the generation the
+        Accelerator was read at, if any.
+
+        :raises: AcceleratorGenerationConflict if the record changed since.
+        """
         updates = self.obj_get_changes()
-        db_acc = self.dbapi.accelerator_update(context, self.uuid, updates)
+        generation = updates.pop('generation', None)
+        if generation is None and self.obj_attr_is_set('generation'):
+            generation = self.generation
+        db_acc = self.dbapi.accelerator_update(context, self.uuid, updates,
+                                               generation=generation)
         self._from_db_object(self, db_acc)
 
     def destroy(self, context):
@@ -64,6 +64,13 @@ class Attribute(base.CyborgObject, object_base.VersionedObjectDictCompat):
                                                            deployable_id)
         return cls._from_db_object_list(db_attr, context)
 
+    @classmethod
+    def get_by_deployable_ids(cls, context, deployable_ids, use_slave=False):
+        """Get the attributes of all the given deployables in one query"""
+        db_attrs = cls.dbapi.attribute_get_by_deployable_ids(
+            context, deployable_ids, use_slave=use_slave)
+        return cls._from_db_object_list(db_attrs, context)
+
     @classmethod
     def get_by_filter(cls, context, filters):
         """Get a attribute by specified filters"""
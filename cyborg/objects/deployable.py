@@ -13,8 +13,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import copy
 from oslo_log import log as logging
+from oslo_utils import versionutils
 from oslo_versionedobjects import base as object_base
 
 from cyborg.common import exception
@@ -29,7 +31,8 @@ LOG = logging.getLogger(__name__)
 @base.CyborgObjectRegistry.register
 class Deployable(base.CyborgObject, object_base.VersionedObjectDictCompat):
     # Version 1.0: Initial version
-    VERSION = '1.0'
+    # Version 1.1: Add generation
+    VERSION = '1.1'
 
     dbapi = dbapi.get_instance()
     attributes_list = []
@@ -56,8 +59,10 @@ class Deployable(base.CyborgObject, object_base.VersionedObjectDictCompat):
         # The id of the virtualized accelerator instance
         'availability': object_fields.StringField(nullable=False),
         # identify the state of acc, e.g released/claimed/...
-        'accelerator_id': object_fields.IntegerField(nullable=False)
+        'accelerator_id': object_fields.IntegerField(nullable=False),
         # Foreign key constrain to reference accelerator table
+        'generation': object_fields.IntegerField(nullable=False),
+        # incremented by every update of the deployable
     }
 
     def _get_parent_root_uuid(self):
@@ -82,15 +87,16 @@ class Deployable(base.CyborgObject, object_base.VersionedObjectDictCompat):
         del self.attributes_list[:]
 
     @classmethod
-    def get(cls, context, uuid):
-        """Find a DB Deployable and return an Obj Deployable."""
-        db_dep = cls.dbapi.deployable_get(context, uuid)
+    def get(cls, context, uuid, use_slave=False):
+        """Find a DB Deployable and return an Obj Deployable.
+
+        :param use_slave: read from the slave database, which may be
+                          stale.
+        """
+        db_dep = cls.dbapi.deployable_get(context, uuid, use_slave=use_slave)
         obj_dep = cls._from_db_object(cls(context), db_dep)
         # retrieve all the attrobutes for this deployable
-        query = {"deployable_id": obj_dep.id}
-        attr_get_list = Attribute.get_by_filter(context,
-                                                query)
-        obj_dep.attributes_list = attr_get_list
+        cls._load_attributes_list(context, [obj_dep], use_slave=use_slave)
         return obj_dep
 
     @classmethod
@@ -98,30 +104,230 @@ class Deployable(base.CyborgObject, object_base.VersionedObjectDictCompat):
         """Get a Deployable by host."""
         db_deps = cls.dbapi.deployable_get_by_host(context, host)
         obj_dpl_list = cls._from_db_object_list(db_deps, context)
-        for obj_dpl in obj_dpl_list:
-            query = {"deployable_id": obj_dpl.id}
-            attr_get_list = Attribute.get_by_filter(context,
-                                                    query)
-            obj_dpl.attributes_list = attr_get_list
+        cls._load_attributes_list(context, obj_dpl_list)
         return obj_dpl_list
 
     @classmethod
-    def list(cls, context):
-        """Return a list of Deployable objects."""
-        db_deps = cls.dbapi.deployable_list(context)
+    def get_tree(cls, context, uuid, use_slave=False):
+        """Get all the Deployables of the tree a Deployable belongs to.
 
+        The Deployables and their attributes are loaded in two queries,
+        the parents come before their children.
+
+        :param use_slave: read from the slave database, which may be
+                          stale.
+        """
+        db_deps = cls.dbapi.deployable_get_tree(context, uuid,
+                                                use_slave=use_slave)
         obj_dpl_list = cls._from_db_object_list(db_deps, context)
-        for obj_dpl in obj_dpl_list:
-            query = {"deployable_id": obj_dpl.id}
-            attr_get_list = Attribute.get_by_filter(context,
-                                                    query)
-            obj_dpl.attributes_list = attr_get_list
+        cls._load_attributes_list(context, obj_dpl_list, use_slave=use_slave)
         return obj_dpl_list
 
+    @classmethod
+    def stream(cls, context, filters=None, limit=None, marker=None,
+               sort_key=None, sort_dir=None, use_slave=False,
+               batch_size=1000, changes_since=None):
+        """Yield Deployable objects as they are read from the DB.
+
+        The arguments are those of list(), the deployables are fetched
+        batch_size at a time. Their attributes_list is not loaded.
+        """
+        for db_dep in cls._get_by_filters_sort(
+                context, filters, limit, marker, sort_key, sort_dir,
+                use_slave, changes_since, yield_per=batch_size):
+            yield cls._from_db_object(cls(context), db_dep)
+
+    @classmethod
+    def _get_by_filters_sort(cls, context, filters, limit, marker, sort_key,
+                             sort_dir, use_slave, changes_since,
+                             yield_per=None):
+        kwargs = dict(limit=limit, marker=marker,
+                      sort_keys=[sort_key] if sort_key else None,
+                      sort_dirs=[sort_dir] if sort_dir else None,
+                      use_slave=use_slave, yield_per=yield_per)
+        if changes_since is not None:
+            return cls.dbapi.deployable_get_changed_since(
+                context, changes_since, filters or {}, **kwargs)
+        return cls.dbapi.deployable_get_by_filters_sort(
+            context, filters or {}, **kwargs)
+
+    @classmethod
+    def get_trees_by_host(cls, context, host):
+        """Get all the Deployables of the trees rooted on a host.
+
+        See get_tree.
+        """
+        db_deps = cls.dbapi.deployable_get_trees_by_host(context, host)
+        obj_dpl_list = cls._from_db_object_list(db_deps, context)
+        cls._load_attributes_list(context, obj_dpl_list)
+        return obj_dpl_list
+
+    @classmethod
+    def list(cls, context, filters=None, limit=None, marker=None,
+             sort_key=None, sort_dir=None, use_slave=False,
+             changes_since=None):
+        """Return a list of Deployable objects.
+
+        :param filters: Optional dict of filters; keys which are not
+                        deployable fields are matched against attributes.
+        :param limit: Optional maximum number of deployables to return.
+        :param marker: Optional deployable object after which to start.
+        :param sort_key: Optional field to sort the deployables by.
+        :param sort_dir: Optional sort direction, 'asc' or 'desc'.
+        :param use_slave: Optional, read from the slave database, which
+                          may be stale. The API listings do, a listing is
+                          allowed to lag behind the latest writes.
+        :param changes_since: Optional datetime, only return the
+                              deployables created or updated since then.
+        """
+        if (filters is None and limit is None and marker is None and
+                sort_key is None and changes_since is None):
+            db_deps = cls.dbapi.deployable_list(context, use_slave=use_slave)
+        else:
+            db_deps = cls._get_by_filters_sort(
+                context, filters, limit, marker, sort_key, sort_dir,
+                use_slave, changes_since)
+
+        obj_dpl_list = cls._from_db_object_list(db_deps, context)
+        cls._load_attributes_list(context, obj_dpl_list, use_slave=use_slave)
+        return obj_dpl_list
+
+    @classmethod
+    def summary(cls, context, group_by, filters=None, use_slave=False):
+        """Count the Deployables matching filters per group.
+
+        :param group_by: the list of the fields to group the Deployables by.
+        :param filters: the column and attribute filters of the Deployables.
+        :param use_slave: read from the slave database, which may be
+                          stale.
+        :returns: a list of dicts with the group_by fields of a group and
+                  its number of Deployables as "count".
+        """
+        return cls.dbapi.deployable_summary(context, group_by, filters,
+                                            use_slave=use_slave)
+
+    @classmethod
+    def get_deleted_since(cls, context, since, host=None, use_slave=False):
+        """Get the Deployables deleted since a time.
+
+        The deletions are kept for [conductor]deployable_tombstone_ttl
+        seconds.
+
+        :param host: if not None, only return the Deployables of this host.
+        :returns: a list of dicts with the "uuid", "host" and "deleted_at"
+                  of the Deployables, in the order of their deletion.
+        """
+        return [{'uuid': tombstone.uuid, 'host': tombstone.host,
+                 'deleted_at': tombstone.created_at}
+                for tombstone in cls.dbapi.deployable_tombstone_get_since(
+                    context, since, host=host, use_slave=use_slave)]
+
+    @classmethod
+    def purge_deleted(cls, context, before):
+        """Forget the Deployables deleted before a time.
+
+        :returns: the number of deletions forgotten.
+        """
+        return cls.dbapi.deployable_tombstone_purge(context, before)
+
+    @classmethod
+    def get_host_generation(cls, context, host):
+        """Get the generation of the Deployables of a host."""
+        return cls.dbapi.deployable_get_host_generation(context, host)
+
+    @classmethod
+    def sync(cls, context, host, creates, updates, deletes, generation=None):
+        """Create, update and delete the Deployables of a host at once.
+
+        All the changes are applied in a single DB transaction. Parents
+        must come before their children in creates.
+
+        :param host: the host owning the deployables.
+        :param creates: a list of (not saved) Deployable objects to create.
+        :param updates: a list of changed Deployable objects to save.
+        :param deletes: a list of the uuids of the Deployables to delete.
+        :param generation: if not None, the generation the host must still
+                           be at for the changes to be applied.
+        :returns: a tuple of the list of the created and updated Deployable
+                  objects and the new generation of the host.
+        """
+        root_uuids = {}
+        create_values = []
+        for obj_dep in creates:
+            if 'uuid' not in obj_dep:
+                raise exception.ObjectActionError(action='sync',
+                                                  reason='uuid is required')
+            if obj_dep.parent_uuid is None:
+                obj_dep.root_uuid = obj_dep.uuid
+            elif obj_dep.parent_uuid in root_uuids:
+                obj_dep.root_uuid = root_uuids[obj_dep.parent_uuid]
+            else:
+                obj_dep.root_uuid = obj_dep._get_parent_root_uuid()
+            root_uuids[obj_dep.uuid] = obj_dep.root_uuid
+            create_values.append(obj_dep.obj_get_changes())
+
+        update_values = dict((obj_dep.uuid, obj_dep.obj_get_changes())
+                             for obj_dep in updates)
+
+        db_deps, generation = cls.dbapi.deployable_sync(
+            context, host, create_values, update_values, deletes, generation)
+        return cls._from_db_object_list(db_deps, context), generation
+
+    @classmethod
+    def claim(cls, context, instance_uuid, uuids=None, filters=None,
+              count=1):
+        """Claim free Deployables for an instance in one transaction.
+
+        :param instance_uuid: the UUID of the instance claiming them.
+        :param uuids: the UUIDs of the Deployables to claim, or None to
+                      claim any count free Deployables matching filters.
+        :param filters: the filters of the Deployables to claim when
+                        uuids is None.
+        :param count: the number of Deployables to claim when uuids is
+                      None.
+        :returns: a list of the claimed Deployable objects.
+        :raises: DeployableNotAvailable or DeployableClaimFailed when the
+                 Deployables could not all be claimed.
+        """
+        if uuids is not None:
+            db_deps = cls.dbapi.deployable_claim(context, instance_uuid,
+                                                 uuids)
+        else:
+            db_deps = cls.dbapi.deployable_claim_by_filters(
+                context, instance_uuid, filters or {}, count)
+        return cls._from_db_object_list(db_deps, context)
+
+    @classmethod
+    def release(cls, context, instance_uuid, uuids=None):
+        """Release the Deployables claimed by an instance.
+
+        :param instance_uuid: the UUID of the instance which claimed them.
+        :param uuids: if not None, only these Deployables are released.
+        :returns: a list of the released Deployable objects.
+        """
+        db_deps = cls.dbapi.deployable_release(context, instance_uuid, uuids)
+        return cls._from_db_object_list(db_deps, context)
+
+    def obj_make_compatible(self, primitive, target_version):
+        super(Deployable, self).obj_make_compatible(primitive, target_version)
+        target_version = versionutils.convert_version_to_tuple(target_version)
+        if target_version < (1, 1):
+            primitive.pop('generation', None)
+
     def save(self, context):
-        """Update a Deployable record in the DB."""
+        """Update a Deployable record in the DB.
+
+        The record is only updated if it is still at the generation the
+        Deployable was read at, if any.
+
+        :raises: DeployableGenerationConflict if the record changed since.
+        """
         updates = self.obj_get_changes()
-        db_dep = self.dbapi.deployable_update(context, self.uuid, updates)
+        generation = updates.pop('generation', None)
+        if generation is None and self.obj_attr_is_set('generation'):
+            generation = self.generation
+        db_dep = self.dbapi.deployable_update(context, self.uuid, updates,
+                                              generation=generation)
         self._from_db_object(self, db_dep)
 
     def destroy(self, context):
@@ -169,14 +375,26 @@ class Deployable(base.CyborgObject, object_base.VersionedObjectDictCompat):
         if db_dpl_list:
             for db_dpl in db_dpl_list:
                 obj_dpl = cls._from_db_object(cls(context), db_dpl)
-                query = {"deployable_id": obj_dpl.id}
-                attr_get_list = Attribute.get_by_filter(context,
-                                                        query)
-                obj_dpl.attributes_list = attr_get_list
                 obj_dpl_list.append(obj_dpl)
+            cls._load_attributes_list(context, obj_dpl_list)
 
         return obj_dpl_list
 
+    @classmethod
+    def _load_attributes_list(cls, context, obj_dpl_list, use_slave=False):
+        """Fill the attributes_list of every given deployable.
+
+        All the attributes are fetched in a single query and grouped by
+        deployable in memory, instead of one query per deployable.
+        """
+        dpl_ids = [obj_dpl.id for obj_dpl in obj_dpl_list]
+        attrs_by_dpl = collections.defaultdict(list)
+        for attr in Attribute.get_by_deployable_ids(context, dpl_ids,
+                                                    use_slave=use_slave):
+            attrs_by_dpl[attr.deployable_id].append(attr)
+        for obj_dpl in obj_dpl_list:
+            obj_dpl.attributes_list = attrs_by_dpl[obj_dpl.id]
+
     @classmethod
     def _from_db_object(cls, obj, db_obj):
         """Converts a deployable to a formal object.
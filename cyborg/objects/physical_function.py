@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import copy
 from oslo_log import log as logging
 from oslo_versionedobjects import base as object_base
@@ -91,14 +92,7 @@ class PhysicalFunction(Deployable):
         """
         db_pf = cls.dbapi.deployable_get(context, uuid)
         obj_pf = cls._from_db_object(cls(context), db_pf)
-        pf_uuid = obj_pf.uuid
-
-        query = {"parent_uuid": pf_uuid, "type": "vf"}
-        db_vf_list = cls.dbapi.deployable_get_by_filters(context, query)
-
-        for db_vf in db_vf_list:
-            obj_vf = VirtualFunction.get(context, db_vf.uuid)
-            obj_pf.virtual_function_list.append(obj_vf)
+        cls._load_trees(context, [obj_pf])
         return obj_pf
 
     @classmethod
@@ -106,7 +100,6 @@ class PhysicalFunction(Deployable):
                       filters, sort_key='created_at',
                       sort_dir='desc', limit=None,
                       marker=None, join=None):
-        obj_dpl_list = []
         filters['type'] = 'pf'
         db_dpl_list = cls.dbapi.deployable_get_by_filters(context, filters,
                                                           sort_key=sort_key,
@@ -114,15 +107,33 @@ class PhysicalFunction(Deployable):
                                                           limit=limit,
                                                           marker=marker,
                                                           join_columns=join)
-        for db_dpl in db_dpl_list:
-            obj_dpl = cls._from_db_object(cls(context), db_dpl)
-            query = {"parent_uuid": obj_dpl.uuid}
-            vf_get_list = VirtualFunction.get_by_filter(context,
-                                                        query)
-            obj_dpl.virtual_function_list = vf_get_list
-            obj_dpl_list.append(obj_dpl)
+        obj_dpl_list = [cls._from_db_object(cls(context), db_dpl)
+                        for db_dpl in db_dpl_list]
+        cls._load_trees(context, obj_dpl_list)
         return obj_dpl_list
 
+    @classmethod
+    def _load_trees(cls, context, obj_pf_list):
+        """Fill the virtual_function_list of every given physical function.
+
+        The VFs of all the PFs are fetched in a single query, then the
+        attributes of all the PFs and VFs in another one, whatever the
+        number of PFs and VFs.
+        """
+        if not obj_pf_list:
+            return
+        query = {"parent_uuid": [obj_pf.uuid for obj_pf in obj_pf_list],
+                 "type": "vf"}
+        db_vf_list = cls.dbapi.deployable_get_by_filters(context, query)
+        obj_vf_list = VirtualFunction._from_db_object_list(db_vf_list,
+                                                           context)
+        vfs_by_pf = collections.defaultdict(list)
+        for obj_vf in obj_vf_list:
+            vfs_by_pf[obj_vf.parent_uuid].append(obj_vf)
+        for obj_pf in obj_pf_list:
+            obj_pf.virtual_function_list = vfs_by_pf[obj_pf.uuid]
+        cls._load_attributes_list(context, obj_pf_list + obj_vf_list)
+
     @classmethod
     def _from_db_object(cls, obj, db_obj):
         """Converts a physical function to a formal object.
@@ -14,11 +14,13 @@
 #    under the License.
 
 import functools
+import time
 
 from keystoneauth1 import exceptions as k_exc
 from keystoneauth1 import loading as k_loading
 from oslo_config import cfg
 from cyborg.common import exception as c_exc
+from cyborg.common.i18n import _
 
 from oslo_concurrency import lockutils
 
@@ -52,6 +54,9 @@ class SchedulerReportClient(object):
     resource_provider = {'name': 'rp_name', 'uuid': 'uuid'}
     p_client.create_resource_provider(resource_provider)
 
+    To keep a whole tree of providers up to date, use
+    update_provider_tree(), which only sends the inventories that
+    changed since the last call.
     """
 
     keystone_filter = {'service_type': 'placement',
@@ -59,12 +64,15 @@ class SchedulerReportClient(object):
 
     def __init__(self):
         self.association_refresh_time = {}
+        self._provider_cache = {}
         self._client = self._create_client()
         self._disabled = False
 
     def _create_client(self):
         """Create the HTTP session accessing the placement service."""
+        # Forget the cached providers, they are reloaded from placement.
         self.association_refresh_time = {}
+        self._provider_cache = {}
         auth_plugin = k_loading.load_auth_from_conf_options(
             cfg.CONF, 'placement')
         client = k_loading.load_session_from_conf_options(
@@ -173,3 +181,116 @@ class SchedulerReportClient(object):
             raise c_exc.PlacementInventoryUpdateConflict(
                 resource_provider=resource_provider_uuid,
                 resource_class=resource_class)
+
+    def _provider_is_stale(self, rp_uuid):
+        refreshed = self.association_refresh_time.get(rp_uuid)
+        return (refreshed is None or time.time() - refreshed >
+                cfg.CONF.placement.resource_provider_cache_ttl)
+
+    def _cache_provider(self, rp_uuid, generation, inventories):
+        self._provider_cache[rp_uuid] = {'generation': generation,
+                                         'inventories': inventories}
+        self.association_refresh_time[rp_uuid] = time.time()
+
+    def _refresh_provider(self, rp_uuid):
+        """Reload the generation and inventories of a provider.
+
+        :returns: False if the provider does not exist.
+        """
+        url = '/resource_providers/%s/inventories' % rp_uuid
+        try:
+            resp = self._get(url).json()
+        except k_exc.NotFound:
+            self._provider_cache.pop(rp_uuid, None)
+            self.association_refresh_time.pop(rp_uuid, None)
+            return False
+        self._cache_provider(rp_uuid, resp['resource_provider_generation'],
+                             resp['inventories'])
+        return True
+
+    def _ensure_resource_provider(self, rp_uuid, name,
+                                  parent_provider_uuid=None):
+        """Make sure a provider exists and is in the cache."""
+        if not self._provider_is_stale(rp_uuid):
+            return
+        if self._refresh_provider(rp_uuid):
+            return
+        provider = {'uuid': rp_uuid, 'name': name}
+        if parent_provider_uuid:
+            provider['parent_provider_uuid'] = parent_provider_uuid
+        try:
+            # Nested providers need placement 1.14.
+            self._post('/resource_providers', provider, microversion='1.14')
+        except k_exc.Conflict:
+            # Created concurrently since it was looked up, e.g. by another
+            # conductor, load it as it is now.
+            if not self._refresh_provider(rp_uuid):
+                raise c_exc.PlacementResourceProviderConflict(
+                    resource_provider=rp_uuid, name=name)
+            return
+        self._cache_provider(rp_uuid, 0, {})
+
+    @staticmethod
+    def _inventories_equal(current, desired):
+        # Placement fills in the fields left out by the caller, so only
+        # compare the ones which were asked for.
+        if set(current) != set(desired):
+            return False
+        return all(current[rc].get(k) == v
+                   for rc, inv in desired.items() for k, v in inv.items())
+
+    @check_placement_api_available
+    def set_inventory_for_provider(self, rp_uuid, name, inventories,
+                                   parent_provider_uuid=None):
+        """Make the inventories of a provider match the given ones.
+
+        The provider is created if needed. Nothing is sent to placement
+        when the cached inventories already match, otherwise they are all
+        replaced with a single request.
+
+        :param rp_uuid: UUID of the resource provider
+        :param name: name of the resource provider, used if it is created
+        :param inventories: dict of inventory dicts keyed by resource class
+        :param parent_provider_uuid: UUID of the parent provider, if any
+        :returns: True if the inventories were updated.
+        :raises c_exc.PlacementInventoryUpdateConflict: if the update still
+          conflicts after refreshing the provider
+        """
+        self._ensure_resource_provider(rp_uuid, name, parent_provider_uuid)
+        url = '/resource_providers/%s/inventories' % rp_uuid
+        for retry in (True, False):
+            cached = self._provider_cache[rp_uuid]
+            if self._inventories_equal(cached['inventories'], inventories):
+                return False
+            payload = {'resource_provider_generation': cached['generation'],
+                       'inventories': inventories}
+            try:
+                resp = self._put(url, payload).json()
+            except k_exc.Conflict:
+                # The provider was changed by someone else, refresh it and
+                # try again once.
+                if not (retry and self._refresh_provider(rp_uuid)):
+                    raise c_exc.PlacementInventoryUpdateConflict(
+                        resource_provider=rp_uuid,
+                        resource_class=','.join(sorted(inventories)))
+                continue
+            self._cache_provider(rp_uuid, resp['resource_provider_generation'],
+                                 resp['inventories'])
+            return True
+
+    def update_provider_tree(self, providers):
+        """Sync a tree of resource providers with placement.
+
+        :param providers: list of dicts with the uuid, name, inventories
+          and optional parent_provider_uuid of the providers. Parents must
+          come before their children.
+        :returns: the UUIDs of the providers whose inventories were updated.
+        """
+        updated = []
+        for provider in providers:
+            if self.set_inventory_for_provider(
+                    provider['uuid'], provider['name'],
+                    provider['inventories'],
+                    provider.get('parent_provider_uuid')):
+                updated.append(provider['uuid'])
+        return updated
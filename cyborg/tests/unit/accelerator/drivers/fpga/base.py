@@ -17,6 +17,7 @@ import os
 import subprocess
 
 import fixtures
+import six
 
 from cyborg.accelerator.drivers.fpga.base import FPGADriver
 from cyborg.accelerator.drivers.fpga.intel import sysinfo
@@ -85,6 +86,7 @@ class TestFPGADriver(base.TestCase):
 
         class p(object):
             returncode = 0
+            stdout = six.BytesIO(b"Programming 100%\n")
 
             def wait(self):
                 pass
@@ -98,8 +100,10 @@ class TestFPGADriver(base.TestCase):
         intel = FPGADriver.create("intel")
         # program VF
         intel.program("0000:5e:00.1", "/path/image")
-        mock_popen.assert_called_with(expect_cmd, stdout=subprocess.PIPE)
+        mock_popen.assert_called_with(expect_cmd, stdout=subprocess.PIPE,
+                                      stderr=subprocess.STDOUT)
 
         # program PF
         intel.program("0000:5e:00.0", "/path/image")
-        mock_popen.assert_called_with(expect_cmd, stdout=subprocess.PIPE)
+        mock_popen.assert_called_with(expect_cmd, stdout=subprocess.PIPE,
+                                      stderr=subprocess.STDOUT)
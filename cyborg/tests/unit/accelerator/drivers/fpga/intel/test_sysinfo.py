@@ -0,0 +1,72 @@
+# Copyright 2018 Intel, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import mock
+import os
+
+import fixtures
+
+from cyborg.accelerator.drivers.fpga.intel import sysinfo
+from cyborg.tests import base
+from cyborg.tests.unit.accelerator.drivers.fpga.intel import prepare_test_data
+
+
+class TestSysinfo(base.TestCase):
+
+    def setUp(self):
+        super(TestSysinfo, self).setUp()
+        self.syspath = sysinfo.SYS_FPGA
+        sysinfo.SYS_FPGA = "/sys/class/fpga"
+        tmp_sys_dir = self.useFixture(fixtures.TempDir())
+        prepare_test_data.create_fake_sysfs(tmp_sys_dir.path)
+        sysinfo.SYS_FPGA = os.path.join(
+            tmp_sys_dir.path, sysinfo.SYS_FPGA.split("/", 1)[-1])
+
+    def tearDown(self):
+        super(TestSysinfo, self).tearDown()
+        sysinfo.SYS_FPGA = self.syspath
+
+    def _set_numvfs(self, name, numvfs):
+        path = os.path.join(sysinfo.SYS_FPGA, name, "device", "sriov_numvfs")
+        with open(path, "w") as f:
+            f.write(numvfs)
+
+    def test_fpga_tree_not_rescanned_when_unchanged(self):
+        tree = sysinfo.fpga_tree()
+        with mock.patch.object(sysinfo, "fpga_device",
+                               wraps=sysinfo.fpga_device) as mock_dev:
+            self.assertEqual(tree, sysinfo.fpga_tree())
+            self.assertFalse(mock_dev.called)
+
+    def test_fpga_tree_returns_a_copy(self):
+        tree = sysinfo.fpga_tree()
+        tree[0]["name"] = "changed"
+        self.assertNotEqual("changed", sysinfo.fpga_tree()[0]["name"])
+
+    def test_fpga_tree_rescans_changed_device_only(self):
+        sysinfo.fpga_tree()
+        self._set_numvfs("intel-fpga-dev.1", "1")
+        with mock.patch.object(sysinfo, "fpga_device",
+                               wraps=sysinfo.fpga_device) as mock_dev:
+            tree = sysinfo.fpga_tree()
+            mock_dev.assert_called_once_with(os.path.realpath(
+                os.path.join(sysinfo.SYS_FPGA, "intel-fpga-dev.1", "device")))
+        fpga = [d for d in tree if d["name"] == "intel-fpga-dev.1"][0]
+        self.assertEqual("1", fpga["pr_num"])
+
+    def test_target_symbolic_map_built_once(self):
+        with mock.patch.object(sysinfo, "target_symbolic_map",
+                               wraps=sysinfo.target_symbolic_map) as mock_map:
+            sysinfo.fpga_tree()
+            self.assertEqual(1, mock_map.call_count)
@@ -0,0 +1,100 @@
+# Copyright 2018 Intel, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""A fake SPDK app answering JSON-RPC 2.0 requests on a Unix socket."""
+
+import json
+import socket
+import threading
+
+
+class FakeSPDKServer(object):
+    """Serve the given methods like a SPDK app does on its RPC socket.
+
+    :param path: the Unix socket path to listen to.
+    :param methods: a dict mapping the method names to callables taking
+                    the params dict (or None) and returning the result.
+    """
+
+    def __init__(self, path, methods):
+        self.path = path
+        self.methods = methods
+        # All the requests received, and the number of connections.
+        self.requests = []
+        self.connections = 0
+        self._conns = []
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(path)
+        self._sock.listen(5)
+        self._thread = threading.Thread(target=self._serve)
+        self._thread.daemon = True
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self.drop_connections()
+        self._sock.close()
+
+    def drop_connections(self):
+        """Close the open connections, like a restarted app would."""
+        for conn in self._conns:
+            conn.close()
+        del self._conns[:]
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _addr = self._sock.accept()
+            except (socket.error, OSError):
+                return
+            self.connections += 1
+            self._conns.append(conn)
+            t = threading.Thread(target=self._handle, args=(conn, ))
+            t.daemon = True
+            t.start()
+
+    def _handle(self, conn):
+        decoder = json.JSONDecoder()
+        buf = ''
+        while True:
+            try:
+                data = conn.recv(4096)
+            except (socket.error, OSError):
+                return
+            if not data:
+                return
+            buf += data.decode('utf-8')
+            while buf.strip():
+                try:
+                    request, end = decoder.raw_decode(buf.lstrip())
+                except ValueError:
+                    break
+                buf = buf.lstrip()[end:]
+                self.requests.append(request)
+                try:
+                    conn.sendall(json.dumps(
+                        self._response(request)).encode('utf-8'))
+                except (socket.error, OSError):
+                    return
+
+    def _response(self, request):
+        response = {'jsonrpc': '2.0', 'id': request['id']}
+        method = self.methods.get(request['method'])
+        if method is None:
+            response['error'] = {'code': -32601,
+                                 'message': 'Method not found'}
+        else:
+            response['result'] = method(request.get('params'))
+        return response
@@ -0,0 +1,101 @@
+# Copyright 2018 Intel, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+
+import mock
+
+from cyborg.accelerator.common import exception
+from cyborg.accelerator.drivers.spdk.util.pyspdk import liveness
+from cyborg.tests import base
+
+
+class FakeProcess(object):
+
+    def __init__(self, pid, cmdline):
+        self.pid = pid
+        self.cmdline = cmdline
+
+    def as_dict(self, attrs):
+        return {'pid': self.pid, 'cmdline': self.cmdline}
+
+
+class TestProcessLiveness(base.TestCase):
+
+    def setUp(self):
+        super(TestProcessLiveness, self).setUp()
+        liveness.ProcessLiveness._cache.clear()
+        self.procs = [FakeProcess(1, ['/sbin/init']),
+                      FakeProcess(42, ['./nvmf_tgt', '-c', 'nvmf.conf'])]
+        self.start_times = {1: 10, 42: 1000}
+        patcher = mock.patch.object(liveness.psutil, 'process_iter',
+                                    side_effect=lambda: iter(self.procs))
+        self.mock_iter = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(liveness, 'process_start_time',
+                                    side_effect=self.start_times.get)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pid_is_cached(self):
+        live = liveness.ProcessLiveness('nvmf')
+        self.assertEqual(42, live.get_pid())
+        self.assertTrue(live.is_alive())
+        # Shared by the other instances.
+        self.assertTrue(liveness.ProcessLiveness('nvmf').is_alive())
+        self.assertEqual(1, self.mock_iter.call_count)
+
+    def test_process_restarted(self):
+        live = liveness.ProcessLiveness('nvmf')
+        live.get_pid()
+        # The pid is now used by another process.
+        self.start_times[42] = 2000
+        self.procs[1] = FakeProcess(43, ['./nvmf_tgt'])
+        self.start_times[43] = 2001
+        self.assertEqual(43, live.get_pid())
+        self.assertEqual(2, self.mock_iter.call_count)
+
+    def test_process_gone(self):
+        live = liveness.ProcessLiveness('nvmf')
+        live.get_pid()
+        del self.start_times[42]
+        del self.procs[1]
+        self.assertFalse(live.is_alive())
+        self.assertIsNone(live.get_pid())
+
+    def test_ping(self):
+        ping = mock.Mock()
+        live = liveness.ProcessLiveness('nvmf', ping=ping)
+        self.assertTrue(live.is_alive())
+        self.assertFalse(ping.called)
+        self.assertTrue(live.is_alive(check_rpc=True))
+        ping.side_effect = exception.SPDKRPCError(method='get_rpc_methods',
+                                                  err='timed out')
+        self.assertFalse(live.is_alive(check_rpc=True))
+
+
+class TestProcessStartTime(base.TestCase):
+
+    def test_process_start_time(self):
+        self.assertEqual(liveness.process_start_time(os.getpid()),
+                         liveness.process_start_time(os.getpid()))
+        self.assertIsNotNone(liveness.process_start_time(os.getpid()))
+
+    def test_process_start_time_no_process(self):
+        with mock.patch.object(liveness, 'open', create=True,
+                               side_effect=IOError):
+            with mock.patch.object(liveness.psutil, 'Process',
+                                   side_effect=liveness.psutil.NoSuchProcess(
+                                       1)):
+                self.assertIsNone(liveness.process_start_time(1))
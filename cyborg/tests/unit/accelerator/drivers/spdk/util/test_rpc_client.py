@@ -0,0 +1,117 @@
+# Copyright 2018 Intel, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+
+import fixtures
+
+from cyborg.accelerator.common import exception
+from cyborg.accelerator import configuration
+from cyborg.accelerator.drivers.spdk.util import common_fun
+from cyborg.accelerator.drivers.spdk.util.pyspdk.nvmf_client import NvmfTgt
+from cyborg.accelerator.drivers.spdk.util.pyspdk.py_spdk import PySPDK
+from cyborg.accelerator.drivers.spdk.util.pyspdk.rpc_client import \
+    JSONRPCClient
+from cyborg.tests import base
+from cyborg.tests.unit.accelerator.drivers.spdk.util import fake_spdk
+
+
+class TestJSONRPCClient(base.TestCase):
+
+    def setUp(self):
+        super(TestJSONRPCClient, self).setUp()
+        tmp_dir = self.useFixture(fixtures.TempDir())
+        self.path = os.path.join(tmp_dir.path, 'spdk.sock')
+        self.bdevs = [{"num_blocks": 131072, "name": "nvme1",
+                       "block_size": 512}]
+        self.server = fake_spdk.FakeSPDKServer(self.path, {
+            'get_bdevs': lambda params: self.bdevs,
+            'get_nvmf_subsystems': lambda params: [],
+            'delete_bdev': lambda params: True,
+            'construct_nvmf_subsystem': lambda params: True,
+        })
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.client = JSONRPCClient(self.path, timeout=5)
+        self.addCleanup(self.client.close)
+
+    def test_call(self):
+        self.assertEqual(self.bdevs, self.client.call('get_bdevs'))
+        self.assertTrue(self.client.call('delete_bdev', {'name': 'nvme1'}))
+        self.assertEqual({'name': 'nvme1'},
+                         self.server.requests[-1]['params'])
+        self.assertEqual('2.0', self.server.requests[-1]['jsonrpc'])
+
+    def test_connection_is_reused(self):
+        for i in range(3):
+            self.client.call('get_bdevs')
+        self.assertEqual(1, self.server.connections)
+        self.assertEqual(3, len(self.server.requests))
+
+    def test_call_many(self):
+        results = self.client.call_many([('get_bdevs', None),
+                                         ('get_nvmf_subsystems', None),
+                                         ('delete_bdev', {'name': 'nvme1'})])
+        self.assertEqual([self.bdevs, [], True], results)
+        self.assertEqual(1, self.server.connections)
+        self.assertEqual([], self.client.call_many([]))
+
+    def test_call_large_result(self):
+        self.bdevs = [{"name": "nvme%d" % i, "block_size": 512,
+                       "aliases": ['{"[\\', u'caf\xe9 "%d"]}' % i]}
+                      for i in range(5000)]
+        results = self.client.call_many([('get_bdevs', None),
+                                         ('get_nvmf_subsystems', None)])
+        self.assertEqual([self.bdevs, []], results)
+
+    def test_call_error(self):
+        self.assertRaises(exception.SPDKRPCError,
+                          self.client.call, 'no_such_method')
+        # The connection is still usable.
+        self.assertEqual(self.bdevs, self.client.call('get_bdevs'))
+
+    def test_reconnect_after_app_restart(self):
+        self.client.call('get_bdevs')
+        self.server.drop_connections()
+        self.assertEqual(self.bdevs, self.client.call('get_bdevs'))
+        self.assertEqual(2, self.server.connections)
+
+    def test_app_unreachable(self):
+        client = JSONRPCClient(self.path + '.missing', timeout=5)
+        self.assertRaises(exception.SPDKRPCError, client.call, 'get_bdevs')
+
+    def test_py_client_is_shared(self):
+        self.config(rpc_server_address=self.path,
+                    group=configuration.SHARED_CONF_GROUP)
+        self.addCleanup(common_fun._PY_CLIENTS.clear)
+        py = common_fun.get_py_client('nvmf')
+        self.assertIs(py, common_fun.get_py_client('nvmf'))
+        self.assertIsNot(py, common_fun.get_py_client('vhost'))
+
+    def test_nvmf_tgt(self):
+        acc_client = NvmfTgt(PySPDK('nvmf', self.path, rpc_timeout=5))
+        self.assertEqual([self.bdevs, []], acc_client.get_many(
+            ['get_bdevs', 'get_nvmf_subsystems']))
+        acc_client.construct_nvmf_subsystem(
+            'nqn.2016-06.io.spdk:cnode1',
+            'trtype:RDMA traddr:192.168.100.8 trsvcid:4420',
+            'nqn.2016-06.io.spdk:init', 'SPDK00000000000001', 'Malloc0')
+        self.assertEqual({
+            'nqn': 'nqn.2016-06.io.spdk:cnode1',
+            'listen_addresses': [{'trtype': 'RDMA',
+                                  'traddr': '192.168.100.8',
+                                  'trsvcid': '4420'}],
+            'hosts': ['nqn.2016-06.io.spdk:init'],
+            'serial_number': 'SPDK00000000000001',
+            'namespaces': ['Malloc0']}, self.server.requests[-1]['params'])
@@ -0,0 +1,216 @@
+# Copyright 2018 Huawei Technologies Co.,LTD.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Cyborg agent image cache test cases."""
+
+import hashlib
+import os
+import threading
+import time
+
+import fixtures
+import mock
+from six.moves import BaseHTTPServer
+
+from cyborg.agent import image_cache
+from cyborg.agent.manager import AgentManager
+from cyborg.common import constants
+from cyborg.common import exception
+from cyborg.tests import base
+
+
+class FakeImageServer(fixtures.Fixture):
+    """A local HTTP server standing in for the image service."""
+
+    def __init__(self, images):
+        super(FakeImageServer, self).__init__()
+        self.images = images
+        self.requests = []
+        # Seconds the server waits before sending an image.
+        self.delay = 0
+
+    def _setUp(self):
+        fixture = self
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                fixture.requests.append(self.path)
+                data = fixture.images.get(self.path.lstrip('/'))
+                if data is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                time.sleep(fixture.delay)
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=server.serve_forever,
+                                  args=(0.05,))
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.url = 'http://127.0.0.1:%d/' % server.server_address[1]
+
+
+def _sha256(data):
+    return 'sha256:' + hashlib.sha256(data).hexdigest()
+
+
+class TestImageCache(base.TestCase):
+
+    def setUp(self):
+        super(TestImageCache, self).setUp()
+        self.images = {'a': b'a' * 100, 'b': b'b' * 100, 'c': b'c' * 100}
+        self.server = self.useFixture(FakeImageServer(self.images))
+        self.base_dir = os.path.join(
+            self.useFixture(fixtures.TempDir()).path, 'images')
+        self.cache = image_cache.ImageCache(self.base_dir, 250)
+
+    def _fetch(self, name, checksum=None):
+        with self.cache.fetch(self.server.url + name, checksum) as path:
+            with open(path, 'rb') as f:
+                return path, f.read()
+
+    def test_fetch_cached(self):
+        checksum = _sha256(self.images['a'])
+        path, data = self._fetch('a', checksum)
+        self.assertEqual(self.images['a'], data)
+        self.assertEqual(os.path.join(self.base_dir,
+                                      checksum.replace(':', '-')), path)
+        self.assertEqual((path, data), self._fetch('a', checksum))
+        self.assertEqual(['/a'], self.server.requests)
+
+    def test_fetch_md5(self):
+        checksum = 'md5:' + hashlib.md5(self.images['a']).hexdigest()
+        path, data = self._fetch('a', checksum)
+        self._fetch('a', checksum)
+        self.assertEqual(self.images['a'], data)
+        self.assertEqual(1, len(self.server.requests))
+
+    def test_fetch_without_checksum(self):
+        path, data = self._fetch('a')
+        self.assertEqual(self.images['a'], data)
+        self._fetch('a')
+        # Downloaded every time, and stored once.
+        self.assertEqual(['/a', '/a'], self.server.requests)
+        self.assertEqual([os.path.basename(path)],
+                         os.listdir(self.base_dir))
+
+    def test_checksum_mismatch(self):
+        self.assertRaises(exception.ImageChecksumMismatch, self._fetch, 'a',
+                          _sha256(self.images['b']))
+        self.assertEqual([], os.listdir(self.base_dir))
+
+    def test_download_error(self):
+        self.assertRaises(IOError, self._fetch, 'missing')
+        self.assertEqual([], os.listdir(self.base_dir))
+
+    def test_download_timeout(self):
+        self.server.delay = 0.5
+        cache = image_cache.ImageCache(self.base_dir, 250, timeout=0.1)
+        self.assertRaises(exception.ImageDownloadTimeout, cache.prefetch,
+                          self.server.url + 'a', _sha256(self.images['a']))
+        self.assertEqual([], os.listdir(self.base_dir))
+
+        # The image is not locked by the failed download.
+        self.server.delay = 0
+        self.cache.prefetch(self.server.url + 'a', _sha256(self.images['a']))
+        self.assertEqual(1, len(os.listdir(self.base_dir)))
+
+    def test_local_image(self):
+        with self.cache.fetch('/path/image', 'sha256:abc') as path:
+            self.assertEqual('/path/image', path)
+        self.assertEqual([], self.server.requests)
+
+    def test_lru_eviction(self):
+        paths = {}
+        for name, mtime in (('a', 1000), ('b', 1001)):
+            paths[name] = self._fetch(name, _sha256(self.images[name]))[0]
+            os.utime(paths[name], (mtime, mtime))
+        with mock.patch('os.utime') as mock_utime:
+            # Using a makes b the least recently used.
+            self._fetch('a', _sha256(self.images['a']))
+        os.utime(paths['a'], (1002, 1002))
+        mock_utime.assert_called_once_with(paths['a'], None)
+
+        paths['c'] = self._fetch('c', _sha256(self.images['c']))[0]
+        self.assertEqual(sorted([paths['a'], paths['c']]), sorted(
+            os.path.join(self.base_dir, n) for n in os.listdir(
+                self.base_dir)))
+
+    def test_image_in_use_not_evicted(self):
+        cache = image_cache.ImageCache(self.base_dir, 150)
+        with cache.fetch(self.server.url + 'a',
+                         _sha256(self.images['a'])) as path:
+            cache.prefetch(self.server.url + 'b', _sha256(self.images['b']))
+            self.assertTrue(os.path.exists(path))
+        cache.prefetch(self.server.url + 'c', _sha256(self.images['c']))
+        self.assertEqual(['sha256-%s' % hashlib.sha256(
+            self.images['c']).hexdigest()], os.listdir(self.base_dir))
+
+    def test_partial_downloads_removed(self):
+        os.makedirs(self.base_dir)
+        partial = os.path.join(self.base_dir,
+                               image_cache.TEMP_PREFIX + 'abc')
+        open(partial, 'w').close()
+        image_cache.ImageCache(self.base_dir, 0)
+        self.assertFalse(os.path.exists(partial))
+
+    def test_unsupported_checksum(self):
+        self.assertRaises(exception.InvalidParameterValue, self._fetch, 'a',
+                          'crc0:abc')
+
+
+class TestAgentManagerImages(base.TestCase):
+
+    def setUp(self):
+        super(TestAgentManagerImages, self).setUp()
+        self.images = {'a': b'a' * 100}
+        self.server = self.useFixture(FakeImageServer(self.images))
+        self.config(image_cache_dir=self.useFixture(
+            fixtures.TempDir()).path, group='agent')
+        self.manager = AgentManager(constants.AGENT_TOPIC, 'test-host')
+
+    def test_fpga_image_prefetch(self):
+        checksum = _sha256(self.images['a'])
+        self.manager._prefetch_images([
+            {'url': self.server.url + 'missing'},
+            {'url': self.server.url + 'a', 'checksum': checksum}])
+        self.assertEqual([checksum.replace(':', '-')],
+                         os.listdir(self.manager._image_cache.base_dir))
+
+    def test_fpga_program_fetches_image(self):
+        driver = mock.Mock()
+        driver.program.return_value = 0
+        checksum = _sha256(self.images['a'])
+        with mock.patch.object(self.manager.fpga_driver, 'create',
+                               return_value=driver):
+            job = self.manager.fpga_program(
+                self.context, {'vendor': '0x8086',
+                               'pcie_address': '0000:5e:00.0'},
+                self.server.url + 'a', checksum)
+            self.manager._program_jobs.wait()
+        driver.program.assert_called_once_with(
+            '0000:5e:00.0', os.path.join(self.manager._image_cache.base_dir,
+                                         checksum.replace(':', '-')),
+            progress=mock.ANY)
+        self.assertEqual('succeeded', self.manager.fpga_program_job_get(
+            self.context, job['uuid'])['state'])
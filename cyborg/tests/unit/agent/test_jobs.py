@@ -0,0 +1,150 @@
+# Copyright 2018 Huawei Technologies Co.,LTD.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Cyborg agent FPGA program job test cases."""
+
+import os
+import stat
+
+import fixtures
+import mock
+
+from cyborg.accelerator.drivers.fpga.intel.driver import IntelFPGADriver
+from cyborg.agent import jobs
+from cyborg.agent.manager import AgentManager
+from cyborg.common import constants
+from cyborg.common import exception
+from cyborg.tests import base
+from cyborg.tests.unit.accelerator.drivers.fpga.intel import prepare_test_data
+
+# Logs when it starts and ends programming the bus given with -b, and
+# fails for the images named "bad".
+FAKE_FPGACONF = """#!/bin/sh
+echo "start $2" >> %(log)s
+echo "Programming 50%%"
+sleep %(delay)s
+echo "Programming 100%%"
+echo "end $2" >> %(log)s
+[ "$(basename $7)" != bad ]
+"""
+
+
+class ProgramJobTestBase(base.TestCase):
+
+    def setUp(self):
+        super(ProgramJobTestBase, self).setUp()
+        tmp_dir = self.useFixture(fixtures.TempDir()).path
+        prepare_test_data.create_fake_sysfs(tmp_dir)
+        self.useFixture(fixtures.MonkeyPatch(
+            'cyborg.accelerator.drivers.fpga.intel.sysinfo.SYS_FPGA',
+            os.path.join(tmp_dir, 'sys/class/fpga')))
+        self.log = os.path.join(tmp_dir, 'fpgaconf.log')
+        fpgaconf = os.path.join(tmp_dir, 'fpgaconf')
+        with open(fpgaconf, 'w') as f:
+            f.write(FAKE_FPGACONF % {'log': self.log, 'delay': 0.1})
+        os.chmod(fpgaconf, os.stat(fpgaconf).st_mode | stat.S_IXUSR)
+        self.useFixture(fixtures.MonkeyPatch(
+            'cyborg.accelerator.drivers.fpga.intel.driver.'
+            'IntelFPGADriver.FPGACONF', [fpgaconf]))
+        self.driver = IntelFPGADriver()
+
+    def _fpgaconf_log(self):
+        with open(self.log) as f:
+            return f.read().split('\n')[:-1]
+
+
+class TestProgramJobEngine(ProgramJobTestBase):
+
+    def test_program(self):
+        engine = jobs.ProgramJobEngine(2, 3600)
+        progress = []
+        with mock.patch.object(jobs.ProgramJob, 'set_progress',
+                               autospec=True,
+                               side_effect=lambda job, p: progress.append(p)):
+            job = engine.submit(self.driver, prepare_test_data.VF0_ADDR,
+                                '/path/image')
+            self.assertEqual(jobs.JOB_QUEUED, job.state)
+            engine.wait()
+
+        self.assertEqual(jobs.JOB_SUCCEEDED, job.state)
+        self.assertEqual(100, job.progress)
+        self.assertIsNone(job.error)
+        self.assertEqual([50, 100], progress)
+        self.assertEqual(['start 0x5e', 'end 0x5e'], self._fpgaconf_log())
+        self.assertEqual(job.as_dict(), engine.get(job.uuid).as_dict())
+
+    def test_program_failure(self):
+        engine = jobs.ProgramJobEngine(2, 3600)
+        job = engine.submit(self.driver, prepare_test_data.PF1_ADDR, 'bad')
+        engine.wait()
+        self.assertEqual(jobs.JOB_FAILED, job.state)
+        self.assertEqual('Programming exited with code 1.', job.error)
+
+    def test_same_pf_serialized(self):
+        engine = jobs.ProgramJobEngine(2, 3600)
+        engine.submit(self.driver, prepare_test_data.PF0_ADDR, 'image-1')
+        engine.submit(self.driver, prepare_test_data.VF0_ADDR, 'image-2')
+        engine.wait()
+        self.assertEqual(['start 0x5e', 'end 0x5e', 'start 0x5e',
+                          'end 0x5e'], self._fpgaconf_log())
+
+    def test_pfs_programmed_concurrently(self):
+        engine = jobs.ProgramJobEngine(2, 3600)
+        engine.submit(self.driver, prepare_test_data.PF0_ADDR, 'image-1')
+        engine.submit(self.driver, prepare_test_data.PF1_ADDR, 'image-2')
+        engine.wait()
+        self.assertEqual(['start', 'start', 'end', 'end'],
+                         [line.split()[0] for line in self._fpgaconf_log()])
+
+    def test_concurrency_limit(self):
+        engine = jobs.ProgramJobEngine(1, 3600)
+        engine.submit(self.driver, prepare_test_data.PF0_ADDR, 'image-1')
+        engine.submit(self.driver, prepare_test_data.PF1_ADDR, 'image-2')
+        engine.wait()
+        self.assertEqual(['start', 'end', 'start', 'end'],
+                         [line.split()[0] for line in self._fpgaconf_log()])
+
+    @mock.patch('time.time')
+    def test_finished_jobs_expire(self, mock_time):
+        mock_time.return_value = 1000
+        engine = jobs.ProgramJobEngine(1, 60)
+        job = engine.submit(self.driver, prepare_test_data.PF0_ADDR, 'image')
+        engine.wait()
+        self.assertEqual([job], engine.list())
+        mock_time.return_value = 1061
+        self.assertEqual([], engine.list())
+        self.assertRaises(exception.FPGAProgramJobNotFound, engine.get,
+                          job.uuid)
+
+
+class TestAgentManagerProgram(ProgramJobTestBase):
+
+    def setUp(self):
+        super(TestAgentManagerProgram, self).setUp()
+        self.manager = AgentManager(constants.AGENT_TOPIC, 'test-host')
+
+    def test_fpga_program(self):
+        accelerator = {'vendor': '0x8086',
+                       'pcie_address': prepare_test_data.VF0_ADDR}
+        job = self.manager.fpga_program(self.context, accelerator, 'image')
+        self.assertEqual(jobs.JOB_QUEUED, job['state'])
+        self.manager._program_jobs.wait()
+        job = self.manager.fpga_program_job_get(self.context, job['uuid'])
+        self.assertEqual(jobs.JOB_SUCCEEDED, job['state'])
+        self.assertEqual(prepare_test_data.VF0_ADDR, job['device'])
+
+    def test_fpga_program_job_not_found(self):
+        self.assertRaises(exception.FPGAProgramJobNotFound,
+                          self.manager.fpga_program_job_get, self.context,
+                          'missing')
@@ -0,0 +1,50 @@
+# Copyright 2018 Huawei Technologies Co.,LTD.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import fixtures
+import mock
+
+from cyborg.agent import manager
+from cyborg.agent.resource_tracker import ResourceTracker
+from cyborg.common import constants
+from cyborg.tests import base
+
+
+class TestAgentManager(base.TestCase):
+
+    def setUp(self):
+        super(TestAgentManager, self).setUp()
+        self.config(image_cache_dir=self.useFixture(
+            fixtures.TempDir()).path, group='agent')
+        self.manager = manager.AgentManager(constants.AGENT_TOPIC,
+                                            'test-host')
+
+    @mock.patch.object(ResourceTracker, 'flush_reports')
+    def test_flush_deployable_reports(self, mock_flush):
+        self.config(report_mode='async', group='agent')
+        self.manager.flush_deployable_reports(self.context)
+        mock_flush.assert_called_once_with(self.context)
+
+    @mock.patch.object(ResourceTracker, 'flush_reports')
+    def test_flush_deployable_reports_sync_mode(self, mock_flush):
+        self.config(report_mode='sync', group='agent')
+        self.manager.flush_deployable_reports(self.context)
+        self.assertFalse(mock_flush.called)
+
+    def test_flush_deployable_reports_spacing(self):
+        # Fixed, as the periodic tasks are registered before the config
+        # files are read.
+        self.assertEqual(
+            manager.REPORT_FLUSH_SPACING,
+            self.manager._periodic_spacing['flush_deployable_reports'])
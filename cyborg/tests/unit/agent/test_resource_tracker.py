@@ -17,23 +17,30 @@
 """Cyborg agent resource_tracker test cases."""
 
 import os
+import time
 
+import eventlet
 import fixtures
+import mock
+from oslo_messaging.rpc.client import RemoteError
 
 from cyborg.accelerator.drivers.fpga import utils
 from cyborg.accelerator.drivers.fpga.intel import sysinfo
+from cyborg.agent.resource_tracker import DeployableReportQueue
+from cyborg.agent.resource_tracker import HostDevice
 from cyborg.agent.resource_tracker import ResourceTracker
+from cyborg.common import exception
 from cyborg.conductor import rpcapi as cond_api
 from cyborg.conf import CONF
+from cyborg import objects
 from cyborg.tests import base
 from cyborg.tests.unit.accelerator.drivers.fpga.intel import prepare_test_data
 
 
-class TestResourceTracker(base.TestCase):
-    """Test Agent ResourceTracker """
+class ResourceTrackerTestBase(base.TestCase):
 
     def setUp(self):
-        super(TestResourceTracker, self).setUp()
+        super(ResourceTrackerTestBase, self).setUp()
         self.syspath = sysinfo.SYS_FPGA
         sysinfo.SYS_FPGA = "/sys/class/fpga"
         tmp_sys_dir = self.useFixture(fixtures.TempDir())
@@ -46,10 +53,21 @@ class TestResourceTracker(base.TestCase):
         self.rt = ResourceTracker(self.host, self.cond_api)
 
     def tearDown(self):
-        super(TestResourceTracker, self).tearDown()
+        super(ResourceTrackerTestBase, self).tearDown()
         sysinfo.SYS_FPGA = self.syspath
         utils.SYS_FPGA_PATH = self.syspath
 
+    def _inventory(self, deployables, generation='gen-1'):
+        return {"deployables": deployables, "generation": generation}
+
+    def _fake_sync(self, context, host, creates, updates, deletes,
+                   generation):
+        return self._inventory(creates + updates, 'gen-2')
+
+
+class TestResourceTracker(ResourceTrackerTestBase):
+    """Test Agent ResourceTracker """
+
     def test_update_usage(self):
         """Update the resource usage and stats after a change in an
         instance
@@ -58,34 +76,419 @@ class TestResourceTracker(base.TestCase):
         # has stored into DB by conductor correctly?
         pass
 
+    @mock.patch.object(cond_api.ConductorAPI, 'deployable_sync')
+    @mock.patch.object(cond_api.ConductorAPI,
+                       'deployable_get_host_inventory')
+    def test_update_usage_sends_one_diff(self, mock_get, mock_sync):
+        mock_sync.side_effect = self._fake_sync
+        mock_get.return_value = self._inventory([])
+        self.rt.update_usage(self.context)
+
+        mock_sync.assert_called_once_with(self.context, self.host, mock.ANY,
+                                          [], [], 'gen-1')
+        creates = mock_sync.call_args[0][2]
+        deps = dict((d.pcie_address, d) for d in creates)
+        self.assertEqual(set(['0000:5e:00.0', '0000:5e:00.1',
+                              '0000:be:00.0']), set(deps))
+        self.assertEqual(['pf', 'pf', 'vf'], [d.type for d in creates])
+        self.assertIsNone(deps['0000:5e:00.0'].parent_uuid)
+        self.assertEqual(deps['0000:5e:00.0'].uuid,
+                         deps['0000:5e:00.1'].parent_uuid)
+
+    @mock.patch.object(cond_api.ConductorAPI, 'deployable_sync')
+    @mock.patch.object(cond_api.ConductorAPI,
+                       'deployable_get_host_inventory')
+    def test_update_usage_update_and_delete(self, mock_get, mock_sync):
+        mock_sync.side_effect = self._fake_sync
+        fpgas = self.rt._get_fpga_devices()
+        deps = []
+        for bdf in ('0000:5e:00.0', '0000:be:00.0'):
+            dep = self.rt._gen_deployable_from_host_dev(fpgas[bdf])
+            deps.append(objects.Deployable(self.context, **dep))
+        deps[1].name = 'old-name'
+        obsolete = objects.Deployable(self.context, **dict(
+            self.rt._gen_deployable_from_host_dev(fpgas['0000:be:00.0']),
+            pcie_address='0000:af:00.0'))
+        mock_get.return_value = self._inventory(deps + [obsolete])
+
+        self.rt.update_usage(self.context)
+
+        creates, updates, deletes = mock_sync.call_args[0][2:5]
+        self.assertEqual(['0000:5e:00.1'], [d.pcie_address for d in creates])
+        self.assertEqual(deps[0].uuid, creates[0].parent_uuid)
+        self.assertEqual([deps[1]], updates)
+        self.assertEqual('intel-fpga-dev.1', deps[1].name)
+        self.assertEqual([obsolete.uuid], deletes)
+
+    @mock.patch.object(cond_api.ConductorAPI, 'deployable_sync')
+    @mock.patch.object(cond_api.ConductorAPI,
+                       'deployable_get_host_inventory')
+    def test_update_usage_no_change(self, mock_get, mock_sync):
+        fpgas = self.rt._get_fpga_devices()
+        mock_get.return_value = self._inventory([
+            objects.Deployable(self.context,
+                               **self.rt._gen_deployable_from_host_dev(fpga))
+            for fpga in fpgas.values()])
+        self.rt.update_usage(self.context)
+        self.assertFalse(mock_sync.called)
+
+    @mock.patch.object(cond_api.ConductorAPI, 'deployable_claim')
+    def test_claim(self, mock_claim):
+        self.rt.claim(self.context, 'instance', filters={'type': 'vf'},
+                      count=2)
+        mock_claim.assert_called_once_with(
+            self.context, 'instance', uuids=None,
+            filters={'type': 'vf', 'host': self.host}, count=2)
+
+        mock_claim.reset_mock()
+        self.rt.claim(self.context, 'instance', uuids=['uuid'])
+        mock_claim.assert_called_once_with(
+            self.context, 'instance', uuids=['uuid'], filters=None, count=1)
+
     def test_get_fpga_devices(self):
         expect = {
             '0000:5e:00.0': {
-                'function': 'pf', 'assignable': False, 'pr_num': '1',
-                'name': 'intel-fpga-dev.0', 'vendor_id': '0x8086',
-                'devices': '0000:5e:00.0',
-                'regions': [{
-                    'function': 'vf', 'assignable': True,
-                    'name': 'intel-fpga-dev.2', 'vendor_id': '0x8086',
-                    'devices': '0000:5e:00.1',
-                    'parent_devices': '0000:5e:00.0',
-                    'path': '%s/intel-fpga-dev.2' % sysinfo.SYS_FPGA,
-                    'product_id': '0xbcc1'}],
-                'parent_devices': '',
-                'path': '%s/intel-fpga-dev.0' % sysinfo.SYS_FPGA,
-                'product_id': '0xbcc0'},
+                'type': 'pf', 'assignable': False,
+                'name': 'intel-fpga-dev.0', 'vendor': '0x8086',
+                'pcie_address': '0000:5e:00.0', 'parent_devices': '',
+                'board': '0xbcc0'},
             '0000:5e:00.1': {
-                'function': 'vf', 'assignable': True,
-                'name': 'intel-fpga-dev.2', 'vendor_id': '0x8086',
-                'devices': '0000:5e:00.1',
+                'type': 'vf', 'assignable': True,
+                'name': 'intel-fpga-dev.2', 'vendor': '0x8086',
+                'pcie_address': '0000:5e:00.1',
                 'parent_devices': '0000:5e:00.0',
-                'path': '%s/intel-fpga-dev.2' % sysinfo.SYS_FPGA,
-                'product_id': '0xbcc1'},
+                'board': '0xbcc1'},
             '0000:be:00.0': {
-                'function': 'pf', 'assignable': True, 'pr_num': '0',
-                'name': 'intel-fpga-dev.1', 'vendor_id': '0x8086',
-                'devices': '0000:be:00.0', 'parent_devices': '',
-                'path': '%s/intel-fpga-dev.1' % sysinfo.SYS_FPGA,
-                'product_id': '0xbcc0'}}
+                'type': 'pf', 'assignable': True,
+                'name': 'intel-fpga-dev.1', 'vendor': '0x8086',
+                'pcie_address': '0000:be:00.0', 'parent_devices': '',
+                'board': '0xbcc0'}}
+        fpgas = self.rt._get_fpga_devices()
+        self.assertEqual(set(expect), set(fpgas))
+        for bdf, dev in fpgas.items():
+            self.assertIsInstance(dev, HostDevice)
+            self.assertEqual(expect[bdf], dict(
+                (k, getattr(dev, k)) for k in HostDevice.__slots__
+                if k != 'hash'))
+
+    def test_host_device_equality(self):
+        dev = self.rt._get_fpga_devices()['0000:be:00.0']
+        same = self.rt._get_fpga_devices()['0000:be:00.0']
+        self.assertEqual(dev, same)
+        self.assertEqual(hash(dev), hash(same))
+        other = self.rt._get_fpga_devices()['0000:be:00.0']
+        other.parent_devices = '0000:5e:00.0'
+        self.assertNotEqual(dev, other)
+
+    @mock.patch.object(cond_api.ConductorAPI, 'deployable_get_host_inventory')
+    def test_compare_skips_unchanged_deployables(self, mock_get):
+        fpgas = self.rt._get_fpga_devices()
+        deps = [objects.Deployable(
+            self.context, **self.rt._gen_deployable_from_host_dev(fpga))
+            for fpga in fpgas.values()]
+        deps[0].name = 'old-name'
+        mock_get.return_value = self._inventory(deps)
+        self.rt._resync(self.context)
+
+        accls = dict((d.pcie_address, d) for d in deps)
+        with mock.patch.object(objects.Deployable, '__getitem__',
+                               autospec=True,
+                               side_effect=objects.Deployable.__getitem__
+                               ) as mock_getitem:
+            updated = [bdf for bdf in fpgas
+                       if self.rt._fpga_compare_and_update(fpgas[bdf],
+                                                           accls[bdf])]
+        self.assertEqual([deps[0].pcie_address], updated)
+        # Only the changed deployable had its fields read.
+        self.assertEqual(set([deps[0]]),
+                         set(c[0][0] for c in mock_getitem.call_args_list))
+
+    @mock.patch.object(cond_api.ConductorAPI, 'deployable_sync')
+    @mock.patch.object(cond_api.ConductorAPI,
+                       'deployable_get_host_inventory')
+    def test_update_usage_skipped_when_host_unchanged(self, mock_get,
+                                                      mock_sync):
+        mock_get.return_value = self._inventory([])
+        mock_sync.side_effect = self._fake_sync
+        self.rt.update_usage(self.context)
+        self.rt.update_usage(self.context)
+        self.assertEqual(1, mock_get.call_count)
+        self.assertEqual(1, mock_sync.call_count)
+
+    @mock.patch.object(cond_api.ConductorAPI, 'deployable_sync')
+    @mock.patch.object(cond_api.ConductorAPI,
+                       'deployable_get_host_inventory')
+    def test_update_usage_retried_after_sync_error(self, mock_get,
+                                                   mock_sync):
+        mock_get.return_value = self._inventory([])
+        mock_sync.side_effect = RemoteError()
+        self.rt.update_usage(self.context)
+        self.rt.update_usage(self.context)
+        self.assertEqual(2, mock_sync.call_count)
+        # The cache is reloaded after an error.
+        self.assertEqual(2, mock_get.call_count)
+
+    @mock.patch.object(cond_api.ConductorAPI, 'deployable_sync')
+    @mock.patch.object(cond_api.ConductorAPI,
+                       'deployable_get_host_inventory')
+    def test_update_usage_uses_local_cache(self, mock_get, mock_sync):
+        mock_get.return_value = self._inventory([])
+        mock_sync.side_effect = self._fake_sync
+        self.rt.update_usage(self.context)
+        self.assertEqual('gen-2', self.rt.generation)
+        self.assertEqual(set(['0000:5e:00.0', '0000:5e:00.1',
+                              '0000:be:00.0']), set(self.rt.deployables))
+
+        # A device is gone: the diff is computed against the cache.
+        fpgas = self.rt._get_fpga_devices()
+        del fpgas['0000:be:00.0']
+        with mock.patch.object(self.rt, '_get_fpga_devices',
+                               return_value=fpgas):
+            self.rt.update_usage(self.context)
+        self.assertEqual(1, mock_get.call_count)
+        mock_sync.assert_called_with(
+            self.context, self.host, [], [], [mock.ANY], 'gen-2')
+        self.assertNotIn('0000:be:00.0', self.rt.deployables)
+
+    @mock.patch.object(cond_api.ConductorAPI, 'deployable_sync')
+    @mock.patch.object(cond_api.ConductorAPI,
+                       'deployable_get_host_inventory')
+    def test_update_usage_resync_on_generation_conflict(self, mock_get,
+                                                        mock_sync):
+        mock_get.return_value = self._inventory([])
+        mock_sync.side_effect = exception.DeployableHostGenerationConflict(
+            host=self.host, generation='gen-1')
+        self.rt.update_usage(self.context)
+        self.assertIsNone(self.rt.deployables)
+
+        mock_sync.side_effect = self._fake_sync
+        self.rt.update_usage(self.context)
+        self.assertEqual(2, mock_get.call_count)
+        self.assertEqual('gen-2', self.rt.generation)
+
+
+class TestResourceTrackerDiscovery(ResourceTrackerTestBase):
+
+    def setUp(self):
+        super(TestResourceTrackerDiscovery, self).setUp()
+        self.config(discovery_timeout=1, discovery_failure_threshold=2,
+                    discovery_retry_interval=60, group='agent')
+        self.rt = ResourceTracker(self.host, self.cond_api)
+        self.intel = self.rt.fpga_driver.create('intel')
+        self.other = mock.Mock()
+        self.other.discover.return_value = [{
+            'function': 'pf', 'assignable': True, 'name': 'other-dev.0',
+            'vendor_id': '0x10ee', 'devices': '0000:af:00.0',
+            'parent_devices': '', 'product_id': '0x1'}]
+        drivers = {'intel': self.intel, 'other': self.other}
+        patcher = mock.patch.object(self.rt.fpga_driver, 'discover_vendors',
+                                    return_value=sorted(drivers))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(self.rt.fpga_driver, 'create',
+                                    side_effect=drivers.get)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_discovery_of_all_vendors(self):
         fpgas = self.rt._get_fpga_devices()
-        self.assertDictEqual(expect, fpgas)
+        self.assertEqual(set(['0000:5e:00.0', '0000:5e:00.1',
+                              '0000:be:00.0', '0000:af:00.0']), set(fpgas))
+        self.assertEqual(set(), self.rt._failed_vendors)
+        self.assertEqual(set(['intel', 'other']),
+                         set(self.rt.discovery_latency))
+
+    def test_failing_driver_does_not_hide_others(self):
+        self.other.discover.side_effect = IOError('sysfs error')
+        fpgas = self.rt._get_fpga_devices()
+        self.assertEqual(set(['0000:5e:00.0', '0000:5e:00.1',
+                              '0000:be:00.0']), set(fpgas))
+        self.assertEqual(set(['other']), self.rt._failed_vendors)
+
+    def test_hung_driver_times_out(self):
+        # The driver runs in a native thread, released by the cleanup.
+        hung = eventlet.patcher.original('threading').Event()
+        self.addCleanup(hung.set)
+        self.other.discover.side_effect = lambda: hung.wait(10)
+        start = time.time()
+        fpgas = self.rt._get_fpga_devices()
+        self.assertLess(time.time() - start, 5)
+        self.assertEqual(3, len(fpgas))
+        self.assertEqual(set(['other']), self.rt._failed_vendors)
+
+    def test_hung_driver_holds_one_thread(self):
+        hung = eventlet.patcher.original('threading').Event()
+        self.addCleanup(hung.set)
+        self.other.discover.side_effect = lambda: hung.wait(10)
+        self.config(discovery_failure_threshold=10, group='agent')
+        for i in range(3):
+            fpgas = self.rt._get_fpga_devices()
+            self.assertEqual(3, len(fpgas))
+            self.assertEqual(set(['other']), self.rt._failed_vendors)
+        # Skipped while the timed out discovery is still running.
+        self.assertEqual(1, self.other.discover.call_count)
+        self.assertIn('other', self.rt._discoveries)
+
+        hung.set()
+        for i in range(50):
+            if 'other' not in self.rt._discoveries:
+                break
+            eventlet.sleep(0.1)
+        self.other.discover.side_effect = None
+        fpgas = self.rt._get_fpga_devices()
+        self.assertEqual(2, self.other.discover.call_count)
+        self.assertEqual(4, len(fpgas))
+        self.assertEqual(set(), self.rt._failed_vendors)
+
+    @mock.patch('time.time')
+    def test_circuit_breaker(self, mock_time):
+        mock_time.return_value = 1000
+        self.other.discover.side_effect = IOError('sysfs error')
+        self.rt._get_fpga_devices()
+        self.rt._get_fpga_devices()
+        # Open after two failures.
+        self.rt._get_fpga_devices()
+        self.assertEqual(2, self.other.discover.call_count)
+        self.assertEqual(set(['other']), self.rt._failed_vendors)
+
+        mock_time.return_value = 1060
+        self.other.discover.side_effect = None
+        fpgas = self.rt._get_fpga_devices()
+        self.assertEqual(3, self.other.discover.call_count)
+        self.assertIn('0000:af:00.0', fpgas)
+        self.assertEqual(set(), self.rt._failed_vendors)
+
+    @mock.patch.object(cond_api.ConductorAPI, 'deployable_sync')
+    @mock.patch.object(cond_api.ConductorAPI,
+                       'deployable_get_host_inventory')
+    def test_update_usage_keeps_failed_vendor_deployables(self, mock_get,
+                                                          mock_sync):
+        mock_sync.side_effect = self._fake_sync
+        deps = [objects.Deployable(
+            self.context, **self.rt._gen_deployable_from_host_dev(fpga))
+            for fpga in self.rt._get_fpga_devices().values()]
+        mock_get.return_value = self._inventory(deps)
+        self.intel.discover = mock.Mock(side_effect=IOError('sysfs error'))
+
+        self.rt.update_usage(self.context)
+
+        self.assertFalse(mock_sync.called)
+        self.assertEqual(4, len(self.rt.deployables))
+
+
+class TestDeployableReportQueue(base.TestCase):
+
+    def _deployable(self, uuid):
+        return objects.Deployable(self.context, uuid=uuid)
+
+    def test_coalesce(self):
+        queue = DeployableReportQueue()
+        created = self._deployable('uuid-1')
+        queue.create(created)
+        queue.update(self._deployable('uuid-2'))
+        updated = self._deployable('uuid-2')
+        queue.update(updated)
+        queue.delete('uuid-3')
+        queue.create(self._deployable('uuid-4'))
+        queue.delete('uuid-4')
+        # Still created, with the latest object.
+        recreated = self._deployable('uuid-1')
+        queue.update(recreated)
+
+        self.assertEqual(3, len(queue))
+        self.assertEqual(([recreated], [updated], ['uuid-3']),
+                         queue.pop_batch(10))
+        self.assertEqual(0, len(queue))
+        self.assertIsNone(queue.queued_at)
+
+    def test_pop_batch_in_order(self):
+        queue = DeployableReportQueue()
+        deps = [self._deployable('uuid-%d' % i) for i in range(5)]
+        for dep in deps:
+            queue.create(dep)
+        self.assertEqual((deps[:2], [], []), queue.pop_batch(2))
+        self.assertEqual((deps[2:4], [], []), queue.pop_batch(2))
+        self.assertEqual(1, len(queue))
+
+
+class TestResourceTrackerAsyncReport(ResourceTrackerTestBase):
+
+    def setUp(self):
+        super(TestResourceTrackerAsyncReport, self).setUp()
+        self.config(report_mode='async', report_batch_size=2,
+                    report_batch_interval=10, report_ack_timeout=60,
+                    group='agent')
+        self.rt = ResourceTracker(self.host, self.cond_api)
+        patcher = mock.patch.object(cond_api.ConductorAPI,
+                                    'deployable_get_host_inventory',
+                                    return_value=self._inventory([]))
+        self.mock_get = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(cond_api.ConductorAPI,
+                                    'deployable_report')
+        self.mock_report = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('time.time', return_value=1000)
+        self.mock_time = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_update_usage_sends_batches(self):
+        self.rt.update_usage(self.context)
+        # Only one batch is in flight.
+        self.mock_report.assert_called_once_with(
+            self.context, self.host, 1, mock.ANY, [], [])
+        creates = self.mock_report.call_args[0][3]
+        self.assertEqual(['0000:5e:00.0', '0000:be:00.0'],
+                         [d.pcie_address for d in creates])
+        # The host devices are cached right away.
+        self.assertEqual(3, len(self.rt.deployables))
+
+        self.rt.report_ack(self.context, 1, 'gen-2')
+        self.assertEqual('gen-2', self.rt.generation)
+        # The last change waits for the batch to fill up.
+        self.assertEqual(1, self.mock_report.call_count)
+        self.mock_time.return_value = 1011
+        self.rt.flush_reports(self.context)
+        self.mock_report.assert_called_with(
+            self.context, self.host, 2, mock.ANY, [], [])
+        self.assertEqual(['0000:5e:00.1'],
+                         [d.pcie_address
+                          for d in self.mock_report.call_args[0][3]])
+
+    def test_update_usage_queues_while_in_flight(self):
+        self.rt.update_usage(self.context)
+        fpgas = self.rt._get_fpga_devices()
+        del fpgas['0000:be:00.0']
+        with mock.patch.object(self.rt, '_get_fpga_devices',
+                               return_value=fpgas):
+            self.rt.update_usage(self.context)
+        self.assertEqual(1, self.mock_report.call_count)
+        self.assertEqual(1, self.mock_get.call_count)
+
+        self.rt.report_ack(self.context, 1, 'gen-2')
+        self.mock_report.assert_called_with(
+            self.context, self.host, 2, mock.ANY, [], [mock.ANY])
+
+    def test_lost_batch_triggers_resync(self):
+        self.rt.update_usage(self.context)
+        self.mock_time.return_value = 1061
+        self.rt.flush_reports(self.context)
+        self.assertIsNone(self.rt.deployables)
+
+        # A late acknowledgement is ignored.
+        self.rt.report_ack(self.context, 1, 'gen-2')
+        self.assertIsNone(self.rt.generation)
+
+        self.rt.update_usage(self.context)
+        self.assertEqual(2, self.mock_get.call_count)
+        self.mock_report.assert_called_with(
+            self.context, self.host, 2, mock.ANY, [], [])
+
+    def test_failed_batch_triggers_resync(self):
+        self.rt.update_usage(self.context)
+        self.rt.report_ack(self.context, 1, None, error='DB error')
+        self.assertIsNone(self.rt.deployables)
+        self.assertEqual(1, self.mock_report.call_count)
+
+        self.rt.update_usage(self.context)
+        self.assertEqual(2, self.mock_get.call_count)
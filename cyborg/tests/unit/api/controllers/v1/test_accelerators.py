@@ -19,6 +19,7 @@ from oslo_utils import timeutils
 from six.moves import http_client
 
 from cyborg.conductor import rpcapi
+from cyborg import objects
 from cyborg.tests.unit.api.controllers.v1 import base as v1_test
 from cyborg.tests.unit.db import utils as db_utils
 from cyborg.tests.unit.objects import utils as obj_utils
@@ -94,6 +95,16 @@ class TestList(v1_test.APITestV1):
         self.assertIn('user_id', data)
         self.assertIn('vendor_id', data)
 
+    def test_get_one_loads_once_per_request(self):
+        with mock.patch.object(objects.Accelerator, 'get',
+                               side_effect=objects.Accelerator.get) as get:
+            for acc in self.accs:
+                data = self.get_json('/accelerators/%s' % acc.uuid,
+                                     headers=self.headers)
+                # Not the accelerator of the previous request.
+                self.assertEqual(acc.uuid, data['uuid'])
+        self.assertEqual(3, get.call_count)
+
     def test_get_all(self):
         data = self.get_json('/accelerators', headers=self.headers)
         self.assertEqual(3, len(data['accelerators']))
@@ -101,6 +112,14 @@ class TestList(v1_test.APITestV1):
         acc_uuids = [acc.uuid for acc in self.accs]
         self.assertItemsEqual(acc_uuids, data_uuids)
 
+    def test_get_all_stream(self):
+        expected = self.get_json('/accelerators', headers=self.headers)
+        self.config(stream_collections=True, group='api')
+        data = self.get_json('/accelerators', headers=self.headers)
+        self.assertEqual(expected, data)
+        self.assertEqual(self.acc.uuid, data['accelerators'][0]['uuid'])
+        self.assertIn('links', data['accelerators'][0])
+
 
 def _rpcapi_accelerator_update(context, obj_acc):
     """Fake used to mock out the conductor RPCAPI's accelerator_update method.
@@ -145,6 +164,28 @@ class TestPatch(v1_test.APITestV1):
         self.assertEqual(test_time, return_updated_at)
         self.mock_update.assert_called_once_with(mock.ANY, mock.ANY)
 
+    def test_patch_if_match(self):
+        response = self.get_json('/accelerators/%s' % self.acc.uuid,
+                                 headers=self.headers, expect_errors=True)
+        etag = response.headers['ETag']
+        patch = [{'path': '/description', 'value': 'new-description',
+                  'op': 'replace'}]
+
+        response = self.patch_json('/accelerators/%s' % self.acc.uuid, patch,
+                                   headers=dict(self.headers,
+                                                **{'If-Match': etag}))
+        self.assertEqual(http_client.OK, response.status_code)
+        self.assertNotEqual(etag, response.headers['ETag'])
+
+        # The accelerator changed since etag was returned.
+        response = self.patch_json('/accelerators/%s' % self.acc.uuid, patch,
+                                   headers=dict(self.headers,
+                                                **{'If-Match': etag}),
+                                   expect_errors=True)
+        self.assertEqual(http_client.PRECONDITION_FAILED,
+                         response.status_code)
+        self.mock_update.assert_called_once_with(mock.ANY, mock.ANY)
+
 
 def _rpcapi_accelerator_delete(context, obj_acc):
     """Fake used to mock out the conductor RPCAPI's accelerator_delete method.
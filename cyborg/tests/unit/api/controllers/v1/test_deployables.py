@@ -0,0 +1,326 @@
+# Copyright 2018 Huawei Technologies Co.,LTD.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+
+import mock
+from oslo_utils import timeutils
+from oslo_utils import uuidutils
+from six.moves import http_client
+
+from cyborg.conductor import rpcapi
+from cyborg import objects
+from cyborg.tests.unit.api.controllers.v1 import base as v1_test
+from cyborg.tests.unit.objects import utils as obj_utils
+
+
+class TestList(v1_test.APITestV1):
+
+    def setUp(self):
+        super(TestList, self).setUp()
+        self.deps = []
+        for i in range(3):
+            dep = obj_utils.create_test_deployable(
+                self.context, name='dep%d' % i,
+                host='host%d' % (i % 2))
+            self.deps.append(dep)
+        self.dep = self.deps[0]
+        self.headers = self.gen_headers(self.context)
+
+    def test_get_one(self):
+        data = self.get_json('/deployables/%s' % self.dep.uuid,
+                             headers=self.headers)
+        self.assertEqual(self.dep.uuid, data['uuid'])
+        self.assertIn('host', data)
+        self.assertIn('links', data)
+
+    def test_get_all(self):
+        data = self.get_json('/deployables', headers=self.headers)
+        self.assertEqual(3, len(data['deployables']))
+        data_uuids = [d['uuid'] for d in data['deployables']]
+        self.assertEqual([dep.uuid for dep in self.deps], data_uuids)
+        self.assertNotIn('next', data)
+
+    def test_get_all_limit_and_marker(self):
+        data = self.get_json('/deployables?limit=2', headers=self.headers)
+        self.assertEqual([dep.uuid for dep in self.deps[:2]],
+                         [d['uuid'] for d in data['deployables']])
+        self.assertIn('limit=2', data['next'])
+        self.assertIn('marker=%s' % self.deps[1].uuid, data['next'])
+
+        data = self.get_json('/deployables?limit=2&marker=%s' %
+                             self.deps[1].uuid, headers=self.headers)
+        self.assertEqual([self.deps[2].uuid],
+                         [d['uuid'] for d in data['deployables']])
+        self.assertNotIn('next', data)
+
+    def test_get_all_max_limit(self):
+        self.config(max_limit=2, group='api')
+        data = self.get_json('/deployables', headers=self.headers)
+        self.assertEqual([dep.uuid for dep in self.deps[:2]],
+                         [d['uuid'] for d in data['deployables']])
+        # The truncated list links to the rest of it.
+        self.assertIn('limit=2', data['next'])
+        self.assertIn('marker=%s' % self.deps[1].uuid, data['next'])
+
+        data = self.get_json('/deployables?limit=5', headers=self.headers)
+        self.assertEqual(2, len(data['deployables']))
+        self.assertIn('marker=%s' % self.deps[1].uuid, data['next'])
+
+        data = self.get_json('/deployables?marker=%s' % self.deps[1].uuid,
+                             headers=self.headers)
+        self.assertEqual([self.deps[2].uuid],
+                         [d['uuid'] for d in data['deployables']])
+        self.assertNotIn('next', data)
+
+    def test_get_all_sort(self):
+        data = self.get_json('/deployables?sort_key=name&sort_dir=desc',
+                             headers=self.headers)
+        self.assertEqual(['dep2', 'dep1', 'dep0'],
+                         [d['name'] for d in data['deployables']])
+
+    def test_get_all_invalid_sort(self):
+        response = self.get_json('/deployables?sort_dir=up',
+                                 headers=self.headers, expect_errors=True)
+        self.assertEqual(http_client.BAD_REQUEST, response.status_int)
+        response = self.get_json('/deployables?sort_key=foo',
+                                 headers=self.headers, expect_errors=True)
+        self.assertEqual(http_client.BAD_REQUEST, response.status_int)
+
+    def test_get_all_invalid_limit(self):
+        response = self.get_json('/deployables?limit=0',
+                                 headers=self.headers, expect_errors=True)
+        self.assertEqual(http_client.BAD_REQUEST, response.status_int)
+
+    def test_get_all_filter_by_host(self):
+        data = self.get_json('/deployables?host=host0', headers=self.headers)
+        self.assertEqual([self.deps[0].uuid, self.deps[2].uuid],
+                         [d['uuid'] for d in data['deployables']])
+
+    def test_get_all_filter_by_attributes(self):
+        attr = objects.Attribute(self.context, deployable_id=self.deps[1].id,
+                                 key='region', value='1')
+        attr.create(self.context)
+        data = self.get_json('/deployables?attributes=region:1',
+                             headers=self.headers)
+        self.assertEqual([self.deps[1].uuid],
+                         [d['uuid'] for d in data['deployables']])
+
+        response = self.get_json('/deployables?attributes=region',
+                                 headers=self.headers, expect_errors=True)
+        self.assertEqual(http_client.BAD_REQUEST, response.status_int)
+
+    def test_get_all_stream(self):
+        expected = self.get_json('/deployables?limit=2&sort_key=name',
+                                 headers=self.headers)
+        self.config(stream_collections=True, stream_batch_size=1,
+                    group='api')
+        response = self.get_json('/deployables?limit=2&sort_key=name',
+                                 headers=self.headers, expect_errors=True)
+        self.assertEqual(http_client.OK, response.status_int)
+        self.assertEqual('application/json', response.content_type)
+        self.assertEqual(expected, response.json)
+        self.assertIn('marker=%s' % self.deps[1].uuid, response.json['next'])
+
+        data = self.get_json('/deployables?host=host1', headers=self.headers)
+        self.assertEqual([self.deps[1].uuid],
+                         [d['uuid'] for d in data['deployables']])
+        self.assertNotIn('next', data)
+
+    def test_get_all_stream_not_capped(self):
+        self.config(max_limit=1, stream_collections=True,
+                    stream_batch_size=2, group='api')
+        response = self.get_json('/deployables', headers=self.headers,
+                                 expect_errors=True)
+        self.assertEqual(http_client.OK, response.status_int)
+        self.assertEqual([dep.uuid for dep in self.deps],
+                         [d['uuid'] for d in response.json['deployables']])
+        self.assertNotIn('next', response.json)
+
+        response = self.get_json('/deployables?limit=2',
+                                 headers=self.headers, expect_errors=True)
+        self.assertEqual(2, len(response.json['deployables']))
+        self.assertIn('limit=2', response.json['next'])
+
+    def test_get_all_changes_since(self):
+        timeutils.set_time_override(
+            timeutils.utcnow() + datetime.timedelta(minutes=1))
+        self.addCleanup(timeutils.clear_time_override)
+        since = timeutils.utcnow()
+        self.deps[0].name = 'new-name'
+        self.deps[0].save(self.context)
+        self.deps[2].destroy(self.context)
+
+        data = self.get_json('/deployables?changes_since=%sZ' %
+                             since.isoformat(), headers=self.headers)
+        self.assertEqual([self.deps[0].uuid],
+                         [d['uuid'] for d in data['deployables']])
+        self.assertEqual([self.deps[2].uuid],
+                         [d['uuid'] for d in data['deleted']])
+
+        data = self.get_json('/deployables?host=host1&changes_since=%s' %
+                             since.isoformat(), headers=self.headers)
+        self.assertEqual([], data['deployables'])
+        self.assertEqual([], data['deleted'])
+        data = self.get_json('/deployables', headers=self.headers)
+        self.assertNotIn('deleted', data)
+
+    def test_get_all_changes_since_invalid(self):
+        for changes_since in ('yesterday', '2000-01-01T00:00:00'):
+            response = self.get_json(
+                '/deployables?changes_since=%s' % changes_since,
+                headers=self.headers, expect_errors=True)
+            self.assertEqual(http_client.BAD_REQUEST, response.status_int)
+
+    def test_get_all_changes_since_filters(self):
+        since = timeutils.utcnow().isoformat()
+        for query in ('type=vf', 'vendor=Xilinx', 'availability=free',
+                      'attributes=region:1', 'host=host0&type=vf'):
+            response = self.get_json(
+                '/deployables?changes_since=%s&%s' % (since, query),
+                headers=self.headers, expect_errors=True)
+            self.assertEqual(http_client.BAD_REQUEST, response.status_int)
+
+    def test_get_tree(self):
+        pf = self.deps[1]
+        vfs = [obj_utils.create_test_deployable(
+            self.context, name='vf%d' % i, type='vf', parent_uuid=pf.uuid,
+            host=pf.host) for i in range(2)]
+        vf_child = obj_utils.create_test_deployable(
+            self.context, name='vf0-0', type='vf', parent_uuid=vfs[0].uuid,
+            host=pf.host)
+
+        data = self.get_json('/deployables/%s/tree' % pf.uuid,
+                             headers=self.headers)
+        self.assertEqual(pf.uuid, data['uuid'])
+        self.assertIn('links', data)
+        self.assertEqual([vf.uuid for vf in vfs],
+                         [c['uuid'] for c in data['children']])
+        self.assertEqual([vf_child.uuid],
+                         [c['uuid'] for c in data['children'][0]['children']])
+        self.assertEqual([], data['children'][1]['children'])
+
+        # The subtree of a VF.
+        data = self.get_json('/deployables/%s/tree' % vfs[0].uuid,
+                             headers=self.headers)
+        self.assertEqual(vfs[0].uuid, data['uuid'])
+        self.assertEqual([vf_child.uuid],
+                         [c['uuid'] for c in data['children']])
+
+    def test_get_tree_not_found(self):
+        response = self.get_json(
+            '/deployables/%s/tree' % uuidutils.generate_uuid(),
+            headers=self.headers, expect_errors=True)
+        self.assertEqual(http_client.NOT_FOUND, response.status_int)
+
+
+def _rpcapi_deployable_summary(context, group_by, filters=None):
+    return objects.Deployable.summary(context, group_by, filters)
+
+
+class TestSummary(v1_test.APITestV1):
+
+    def setUp(self):
+        super(TestSummary, self).setUp()
+        for i, (host, type) in enumerate([('host0', 'pf'), ('host0', 'vf'),
+                                          ('host0', 'vf'), ('host1', 'vf')]):
+            obj_utils.create_test_deployable(
+                self.context, name='dep%d' % i, host=host, type=type,
+                availability='free' if i else 'claimed')
+        self.headers = self.gen_headers(self.context)
+
+        p = mock.patch.object(rpcapi.ConductorAPI, 'deployable_summary')
+        self.mock_summary = p.start()
+        self.mock_summary.side_effect = _rpcapi_deployable_summary
+        self.addCleanup(p.stop)
+
+    def test_get_summary(self):
+        data = self.get_json('/deployables/summary?group_by=host,type',
+                             headers=self.headers)
+        self.assertEqual(['host', 'type'], data['group_by'])
+        self.assertEqual([{'host': 'host0', 'type': 'pf', 'count': 1},
+                          {'host': 'host0', 'type': 'vf', 'count': 2},
+                          {'host': 'host1', 'type': 'vf', 'count': 1}],
+                         data['groups'])
+
+    def test_get_summary_filters(self):
+        data = self.get_json(
+            '/deployables/summary?group_by=host&type=vf&availability=free',
+            headers=self.headers)
+        self.assertEqual([{'host': 'host0', 'count': 2},
+                          {'host': 'host1', 'count': 1}], data['groups'])
+        self.mock_summary.assert_called_once_with(
+            mock.ANY, ['host'], {'type': 'vf', 'availability': 'free'})
+
+    def test_get_summary_without_group_by(self):
+        data = self.get_json('/deployables/summary', headers=self.headers)
+        self.assertEqual({'group_by': [], 'groups': [{'count': 4}]}, data)
+
+    def test_get_summary_invalid_group_by(self):
+        response = self.get_json('/deployables/summary?group_by=host,uuid',
+                                 headers=self.headers, expect_errors=True)
+        self.assertEqual(http_client.BAD_REQUEST, response.status_int)
+
+
+def _rpcapi_deployable_update(context, obj_dep):
+    obj_dep.save(context)
+    return obj_dep
+
+
+class TestPatch(v1_test.APITestV1):
+
+    def setUp(self):
+        super(TestPatch, self).setUp()
+        self.dep = obj_utils.create_test_deployable(self.context)
+        self.headers = self.gen_headers(self.context, roles="admin")
+
+        p = mock.patch.object(rpcapi.ConductorAPI, 'deployable_update')
+        self.mock_update = p.start()
+        self.mock_update.side_effect = _rpcapi_deployable_update
+        self.addCleanup(p.stop)
+
+    def test_patch_if_match(self):
+        response = self.get_json('/deployables/%s' % self.dep.uuid,
+                                 headers=self.headers, expect_errors=True)
+        etag = response.headers['ETag']
+        patch = [{'path': '/name', 'value': 'new-name', 'op': 'replace'}]
+
+        # Changed behind the back of the client.
+        self.dep.availability = 'claimed'
+        self.dep.save(self.context)
+        response = self.patch_json('/deployables/%s' % self.dep.uuid, patch,
+                                   headers=dict(self.headers,
+                                                **{'If-Match': etag}),
+                                   expect_errors=True)
+        self.assertEqual(http_client.PRECONDITION_FAILED,
+                         response.status_code)
+        self.assertFalse(self.mock_update.called)
+
+        response = self.patch_json('/deployables/%s' % self.dep.uuid, patch,
+                                   headers=self.headers)
+        self.assertEqual(http_client.OK, response.status_code)
+        self.assertEqual('new-name', response.json['name'])
+        self.assertNotIn('generation', response.json)
+        self.assertEqual(
+            '"%d"' % objects.Deployable.get(self.context,
+                                            self.dep.uuid).generation,
+            response.headers['ETag'])
+
+    def test_patch_generation_not_patchable(self):
+        response = self.patch_json('/deployables/%s' % self.dep.uuid,
+                                   [{'path': '/generation', 'value': 1,
+                                     'op': 'replace'}],
+                                   headers=self.headers, expect_errors=True)
+        self.assertEqual(http_client.BAD_REQUEST, response.status_code)
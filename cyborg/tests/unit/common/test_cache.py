@@ -0,0 +1,87 @@
+# Copyright 2018 Huawei Technologies Co.,LTD.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from cyborg.common import cache
+from cyborg.common import exception
+from cyborg.tests import base
+
+
+class TestLRUCache(base.TestCase):
+
+    def setUp(self):
+        super(TestLRUCache, self).setUp()
+        self.cache = cache.LRUCache(2, 10)
+        patcher = mock.patch('time.time', return_value=1000)
+        self.mock_time = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.loader = mock.Mock(side_effect=lambda: object())
+
+    def test_hit(self):
+        value = self.cache.get_or_load('a', self.loader)
+        self.assertIs(value, self.cache.get_or_load('a', self.loader))
+        self.assertEqual(1, self.loader.call_count)
+        self.assertEqual({'size': 1, 'hits': 1, 'misses': 1,
+                          'evictions': 0, 'invalidations': 0},
+                         self.cache.stats())
+
+    def test_expired(self):
+        value = self.cache.get_or_load('a', self.loader)
+        self.mock_time.return_value = 1010
+        self.assertIsNot(value, self.cache.get_or_load('a', self.loader))
+        self.assertEqual(2, self.loader.call_count)
+
+    def test_lru_eviction(self):
+        self.cache.get_or_load('a', self.loader)
+        self.cache.get_or_load('b', self.loader)
+        # "a" is now the most recently used.
+        self.cache.get_or_load('a', self.loader)
+        self.cache.get_or_load('c', self.loader)
+        self.assertEqual(1, self.cache.stats()['evictions'])
+        self.cache.get_or_load('a', self.loader)
+        self.assertEqual(3, self.loader.call_count)
+        self.cache.get_or_load('b', self.loader)
+        self.assertEqual(4, self.loader.call_count)
+
+    def test_invalidate(self):
+        value = self.cache.get_or_load('a', self.loader)
+        self.cache.get_or_load('b', self.loader)
+        self.cache.invalidate('a', 'missing')
+        self.assertIsNot(value, self.cache.get_or_load('a', self.loader))
+        self.assertEqual(1, self.cache.stats()['invalidations'])
+        self.cache.clear()
+        self.assertEqual(0, self.cache.stats()['size'])
+
+    def test_load_racing_with_invalidation(self):
+        def loader():
+            # A write happens while loading.
+            self.cache.invalidate('a')
+            return 'old'
+
+        self.assertEqual('old', self.cache.get_or_load('a', loader))
+        self.assertEqual('new', self.cache.get_or_load('a', lambda: 'new'))
+
+    def test_error_not_cached(self):
+        self.loader.side_effect = exception.DeployableNotFound(uuid='a')
+        self.assertRaises(exception.DeployableNotFound,
+                          self.cache.get_or_load, 'a', self.loader)
+        self.assertEqual(0, self.cache.stats()['size'])
+
+    def test_disabled(self):
+        disabled = cache.LRUCache(0, 10)
+        disabled.get_or_load('a', self.loader)
+        disabled.get_or_load('a', self.loader)
+        self.assertEqual(2, self.loader.call_count)
+        self.assertEqual(0, disabled.stats()['size'])
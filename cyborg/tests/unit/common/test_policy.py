@@ -0,0 +1,69 @@
+# Copyright 2018 Huawei Technologies Co.,LTD.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+from oslo_policy import policy as oslo_policy
+
+from cyborg.common import exception
+from cyborg.common import policy
+from cyborg.tests import base
+
+
+class TestAuthorize(base.TestCase):
+
+    def setUp(self):
+        super(TestAuthorize, self).setUp()
+        self.creds = {'user_id': 'user', 'project_id': 'project',
+                      'roles': ['member'], 'is_admin': False}
+        self.target = {'user_id': 'user', 'project_id': 'project'}
+        patcher = mock.patch.object(
+            oslo_policy.Enforcer, 'authorize', autospec=True,
+            side_effect=oslo_policy.Enforcer.authorize)
+        self.mock_authorize = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_decision_cached(self):
+        for i in range(2):
+            self.assertTrue(policy.authorize('cyborg:accelerator:get',
+                                             self.target, self.creds))
+        self.assertEqual(1, self.mock_authorize.call_count)
+
+        other = dict(self.target, project_id='other')
+        self.assertFalse(policy.authorize('cyborg:accelerator:get', other,
+                                          self.creds))
+        self.assertFalse(policy.authorize('is_admin', self.creds,
+                                          self.creds))
+        self.assertEqual(3, self.mock_authorize.call_count)
+
+    def test_denial_cached(self):
+        for i in range(2):
+            self.assertRaises(exception.HTTPForbidden, policy.authorize,
+                              'cyborg:deployable:create', self.target,
+                              self.creds, do_raise=True)
+        self.assertEqual(1, self.mock_authorize.call_count)
+
+    @mock.patch('time.time')
+    def test_decision_expires(self, mock_time):
+        mock_time.return_value = 1000
+        policy.authorize('is_admin', self.creds, self.creds)
+        mock_time.return_value = 1006
+        policy.authorize('is_admin', self.creds, self.creds)
+        self.assertEqual(2, self.mock_authorize.call_count)
+
+    def test_cache_disabled(self):
+        self.config(policy_cache_size=0, group='api')
+        policy._ENFORCER = None
+        for i in range(2):
+            policy.authorize('is_admin', self.creds, self.creds)
+        self.assertEqual(2, self.mock_authorize.call_count)
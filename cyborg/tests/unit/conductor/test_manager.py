@@ -0,0 +1,153 @@
+# Copyright 2018 Huawei Technologies Co.,LTD.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+
+import mock
+from oslo_utils import timeutils
+from oslo_utils import uuidutils
+
+from cyborg.agent import rpcapi as agent_rpcapi
+from cyborg.common import constants
+from cyborg.common import exception
+from cyborg.conductor import manager
+from cyborg import objects
+from cyborg.tests.unit.db.base import DbTestCase
+from cyborg.tests.unit import fake_deployable
+from cyborg.tests.unit.objects import utils as obj_utils
+
+
+class TestConductorManager(DbTestCase):
+
+    def setUp(self):
+        super(TestConductorManager, self).setUp()
+        self.manager = manager.ConductorManager(constants.CONDUCTOR_TOPIC,
+                                                'test-host')
+        patcher = mock.patch.object(agent_rpcapi.AgentAPI,
+                                    'deployable_report_ack')
+        self.mock_ack = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _deployable(self, **kw):
+        db_dep = fake_deployable.fake_db_deployable(**kw)
+        for field in ('id', 'root_uuid', 'attributes_list'):
+            db_dep.pop(field, None)
+        return objects.Deployable(self.context, **db_dep)
+
+    def test_periodic_tasks_purges_deleted(self):
+        dep = self._deployable(parent_uuid=None)
+        self.manager.deployable_create(self.context, dep)
+        now = timeutils.utcnow()
+        timeutils.set_time_override(now - datetime.timedelta(days=8))
+        self.addCleanup(timeutils.clear_time_override)
+        self.manager.deployable_delete(self.context, dep)
+        self.assertEqual([dep.uuid], [
+            d['uuid'] for d in objects.Deployable.get_deleted_since(
+                self.context, now - datetime.timedelta(days=9))])
+
+        timeutils.set_time_override(now)
+        self.manager.periodic_tasks(self.context, raise_on_error=True)
+        self.assertEqual([], objects.Deployable.get_deleted_since(
+            self.context, now - datetime.timedelta(days=9)))
+
+    def test_deployable_report(self):
+        dep = self._deployable(parent_uuid=None)
+        self.manager.deployable_report(self.context, dep.host, 1, [dep],
+                                       [], [])
+
+        generation = objects.Deployable.get_host_generation(self.context,
+                                                            dep.host)
+        self.mock_ack.assert_called_once_with(self.context, dep.host, 1,
+                                              generation, None)
+        self.assertEqual(dep.uuid,
+                         objects.Deployable.get(self.context, dep.uuid).uuid)
+
+    def test_deployable_report_error(self):
+        dep = self._deployable(parent_uuid=None)
+        self.manager.deployable_report(self.context, dep.host, 3, [], [dep],
+                                       [])
+        self.mock_ack.assert_called_once_with(self.context, dep.host, 3,
+                                              None, mock.ANY)
+        self.assertIsNotNone(self.mock_ack.call_args[0][4])
+
+    def test_deployable_queries_cached(self):
+        dep = self._deployable(parent_uuid=None)
+        self.manager.deployable_create(self.context, dep)
+
+        with mock.patch.object(objects.Deployable, 'get_by_host',
+                               wraps=objects.Deployable.get_by_host) as \
+                mock_get:
+            self.assertEqual(
+                [dep.uuid], [d.uuid for d in self.manager.
+                             deployable_get_by_host(self.context, dep.host)])
+            self.manager.deployable_get_by_host(self.context, dep.host)
+            self.assertEqual(1, mock_get.call_count)
+
+            # A write through this conductor drops the cached result.
+            dep.name = 'new-name'
+            self.manager.deployable_update(self.context, dep)
+            self.assertEqual(
+                ['new-name'], [d.name for d in self.manager.
+                               deployable_get_by_host(self.context,
+                                                      dep.host)])
+            self.assertEqual(2, mock_get.call_count)
+
+        self.assertEqual('new-name', self.manager.deployable_get(
+            self.context, dep.uuid).name)
+        self.manager.deployable_delete(self.context, dep)
+        self.assertEqual([], self.manager.deployable_list(self.context))
+        self.assertRaises(exception.DeployableNotFound,
+                          self.manager.deployable_get, self.context,
+                          dep.uuid)
+
+    def test_deployable_sync_invalidates_cache(self):
+        dep = self._deployable(parent_uuid=None)
+        self.assertEqual([], self.manager.deployable_get_by_host(
+            self.context, dep.host))
+        self.manager.deployable_sync(self.context, dep.host, [dep], [], [])
+        self.assertEqual([dep.uuid], [d.uuid for d in self.manager.
+                                      deployable_get_by_host(self.context,
+                                                             dep.host)])
+
+    def test_accelerator_delete_invalidates_cache(self):
+        acc = obj_utils.create_test_accelerator(self.context)
+        dep = self._deployable(parent_uuid=None, accelerator_id=acc.id)
+        self.manager.deployable_create(self.context, dep)
+
+        with mock.patch.object(objects.Deployable, 'get_by_host',
+                               wraps=objects.Deployable.get_by_host) as \
+                mock_get:
+            self.manager.deployable_get_by_host(self.context, dep.host)
+            # The deployables of the accelerator are deleted in cascade.
+            self.manager.accelerator_delete(self.context, acc)
+            self.manager.deployable_get_by_host(self.context, dep.host)
+            self.assertEqual(2, mock_get.call_count)
+
+    def test_deployable_claim_invalidates_cache(self):
+        dep = self._deployable(parent_uuid=None, availability='free')
+        self.manager.deployable_create(self.context, dep)
+        self.assertEqual('free', self.manager.deployable_get(
+            self.context, dep.uuid).availability)
+
+        instance_uuid = uuidutils.generate_uuid()
+        claimed = self.manager.deployable_claim(
+            self.context, instance_uuid, filters={'host': dep.host})
+        self.assertEqual([dep.uuid], [d.uuid for d in claimed])
+        self.assertEqual('claimed', self.manager.deployable_get(
+            self.context, dep.uuid).availability)
+
+        self.manager.deployable_release(self.context, instance_uuid)
+        self.assertEqual('free', [d.availability for d in self.manager.
+                                  deployable_get_by_host(self.context,
+                                                         dep.host)][0])
@@ -0,0 +1,66 @@
+# Copyright 2018 Huawei Technologies Co.,LTD.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+from oslo_db.sqlalchemy import enginefacade
+
+from cyborg.common import exception
+from cyborg.db.sqlalchemy import api as sqlalchemy_api
+from cyborg.db.sqlalchemy import models
+from cyborg import objects
+from cyborg.tests import base
+from cyborg.tests.unit.db import utils
+
+
+class TestSlaveConnection(base.TestCase):
+    """The reads allowed on the slave database go to its own engine."""
+
+    def setUp(self):
+        super(TestSlaveConnection, self).setUp()
+        # Two distinct in-memory databases, the slave one stays empty.
+        transaction_context = enginefacade.transaction_context()
+        transaction_context.configure(connection='sqlite://',
+                                      slave_connection='sqlite://')
+        patcher = mock.patch.object(sqlalchemy_api, 'enginefacade',
+                                    transaction_context)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(transaction_context.dispose_pool)
+        # The reader engine is the slave one.
+        for manager in (transaction_context.writer,
+                        transaction_context.reader):
+            models.Base.metadata.create_all(manager.get_engine())
+        self.dbapi = sqlalchemy_api.Connection()
+        self.dep = self.dbapi.deployable_create(
+            self.context, utils.get_test_deployable())
+
+    def test_deployable_get(self):
+        self.assertEqual(self.dep.uuid, self.dbapi.deployable_get(
+            self.context, self.dep.uuid).uuid)
+        self.assertRaises(exception.DeployableNotFound,
+                          self.dbapi.deployable_get, self.context,
+                          self.dep.uuid, use_slave=True)
+
+    def test_deployable_list(self):
+        self.assertEqual(1, len(objects.Deployable.list(self.context)))
+        self.assertEqual([], objects.Deployable.list(
+            self.context, filters={'host': self.dep.host}, use_slave=True))
+        self.assertEqual([], objects.Deployable.list(self.context,
+                                                     use_slave=True))
+
+    def test_write_ignores_slave(self):
+        # A read in a write transaction uses the writer.
+        with sqlalchemy_api._session_for_write():
+            self.assertEqual(self.dep.uuid, self.dbapi.deployable_get(
+                self.context, self.dep.uuid, use_slave=True).uuid)
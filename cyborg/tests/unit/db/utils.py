@@ -15,6 +15,8 @@
 
 """Cyborg db test utilities."""
 
+from oslo_utils import uuidutils
+
 
 def get_test_accelerator(**kw):
     return {
@@ -29,3 +31,22 @@ def get_test_accelerator(**kw):
         'project_id': kw.get('project_id', 'b492a6fb12964ae3bd291ce585107d48'),
         'user_id': kw.get('user_id', '7009409e21614d1db1ef7a8c5ee101d8'),
     }
+
+
+def get_test_deployable(**kw):
+    return {
+        'uuid': kw.get('uuid', uuidutils.generate_uuid()),
+        'name': kw.get('name', 'name'),
+        'parent_uuid': kw.get('parent_uuid', None),
+        'root_uuid': kw.get('root_uuid', None),
+        'pcie_address': kw.get('pcie_address', '0000:5e:00.0'),
+        'host': kw.get('host', 'host'),
+        'board': kw.get('board', 'KU115'),
+        'vendor': kw.get('vendor', 'Xilinx'),
+        'version': kw.get('version', '1.0'),
+        'type': kw.get('type', 'pf'),
+        'assignable': kw.get('assignable', True),
+        'instance_uuid': kw.get('instance_uuid', None),
+        'availability': kw.get('availability', 'free'),
+        'accelerator_id': kw.get('accelerator_id', 1),
+    }
@@ -35,7 +35,8 @@ def fake_db_accelerator(**updates):
         'acc_capability': 'fake-cap',
         'vendor_id': 'fake-vid',
         'product_id': 'fake-pid',
-        'remotable': 0
+        'remotable': 0,
+        'generation': 1
         }
 
     for name, field in objects.Accelerator.fields.items():
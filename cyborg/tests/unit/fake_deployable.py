@@ -39,7 +39,8 @@ def fake_db_deployable(**updates):
         'assignable': True,
         'instance_uuid': None,
         'availability': 'Available',
-        'accelerator_id': 1
+        'accelerator_id': 1,
+        'generation': 1
         }
 
     for name, field in objects.Deployable.fields.items():
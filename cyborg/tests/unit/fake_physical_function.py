@@ -40,7 +40,8 @@ def fake_db_physical_function(**updates):
         'assignable': True,
         'instance_uuid': None,
         'availability': 'Available',
-        'accelerator_id': 1
+        'accelerator_id': 1,
+        'generation': 1
         }
 
     for name, field in physical_function.PhysicalFunction.fields.items():
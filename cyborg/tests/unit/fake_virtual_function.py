@@ -40,7 +40,8 @@ def fake_db_virtual_function(**updates):
         'assignable': True,
         'instance_uuid': None,
         'availability': 'Available',
-        'accelerator_id': 1
+        'accelerator_id': 1,
+        'generation': 1
         }
 
     for name, field in virtual_function.VirtualFunction.fields.items():
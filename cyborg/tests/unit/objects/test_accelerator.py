@@ -66,6 +66,21 @@ class _TestAcceleratorObject(DbTestCase):
         acc_get = objects.Accelerator.get(self.context, acc['uuid'])
         self.assertEqual(acc_get.name, 'test_save')
 
+    def test_save_generation_conflict(self):
+        acc = objects.Accelerator(context=self.context,
+                                  **self.fake_accelerator)
+        acc.create(self.context)
+        stale = objects.Accelerator.get(self.context, acc.uuid)
+        acc.name = 'first'
+        acc.save(self.context)
+        self.assertEqual(stale.generation + 1, acc.generation)
+
+        stale.name = 'second'
+        self.assertRaises(exception.AcceleratorGenerationConflict,
+                          stale.save, self.context)
+        self.assertEqual('first', objects.Accelerator.get(
+            self.context, acc.uuid).name)
+
     @mock.patch.object(db.api.Connection, 'accelerator_delete')
     def test_destroy(self, mock_destroy):
         mock_destroy.return_value = self.fake_accelerator
@@ -121,6 +121,34 @@ class _TestDeployableObject(DbTestCase):
 
         self.assertEqual(db_attr['uuid'], attr_get.uuid)
 
+    def test_get_by_deployable_ids(self):
+        db_acc = self.fake_accelerator
+        acc = objects.Accelerator(context=self.context,
+                                  **db_acc)
+        acc.create(self.context)
+        acc_get = objects.Accelerator.get(self.context, acc.uuid)
+
+        db_dpl = self.fake_deployable
+        dpl = objects.Deployable(context=self.context,
+                                 **db_dpl)
+
+        dpl.accelerator_id = acc_get.id
+        dpl.create(self.context)
+        dpl_get = objects.Deployable.get(self.context, dpl.uuid)
+
+        db_attr = self.fake_attribute
+        attr = objects.Attribute(context=self.context,
+                                 **db_attr)
+        attr.deployable_id = dpl_get.id
+        attr.create(self.context)
+        attr_get_list = objects.Attribute.get_by_deployable_ids(
+            self.context, [dpl_get.id, dpl_get.id + 1])
+
+        self.assertEqual(len(attr_get_list), 1)
+        self.assertEqual(db_attr['uuid'], attr_get_list[0].uuid)
+        self.assertEqual(
+            [], objects.Attribute.get_by_deployable_ids(self.context, []))
+
     def test_save(self):
         db_acc = self.fake_accelerator
         acc = objects.Accelerator(context=self.context,
@@ -19,6 +19,7 @@ import netaddr
 from oslo_db import exception as db_exc
 from oslo_serialization import jsonutils
 from oslo_utils import timeutils
+from oslo_utils import uuidutils
 from oslo_context import context
 
 from cyborg import db
@@ -30,6 +31,7 @@ from cyborg.tests.unit import fake_accelerator
 from cyborg.tests.unit import fake_deployable
 from cyborg.tests.unit import fake_attribute
 from cyborg.tests.unit.objects import test_objects
+from cyborg.tests.unit.objects import utils as obj_utils
 from cyborg.tests.unit.db.base import DbTestCase
 
 
@@ -278,6 +280,13 @@ class _TestDeployableObject(DbTestCase):
         self.assertEqual(len(dpl_get_list), 1)
         self.assertEqual(dpl_get_list[0].uuid, dpl2.uuid)
 
+        # All the attribute filters must match the same deployable.
+        query = {"attr_key": "attr_val", "test_key": "test_val"}
+        dpl_get_list = objects.Deployable.get_by_filter(self.context, query)
+        self.assertEqual(len(dpl_get_list), 0)
+        self.assertEqual(query, {"attr_key": "attr_val",
+                                 "test_key": "test_val"})
+
     def test_get_by_host(self):
         dep1 = self.fake_deployable
         dep2 = self.fake_deployable2
@@ -295,6 +304,370 @@ class _TestDeployableObject(DbTestCase):
         self.assertEqual(dep_objs[0].host, fake_hostname)
         self.assertEqual(dep_objs[1].host, fake_hostname)
 
+    def test_get_trees_by_host(self):
+        pf = objects.Deployable(context=self.context,
+                                **self.fake_deployable)
+        pf.create(self.context)
+        vf = objects.Deployable(context=self.context, **dict(
+            self.fake_deployable2, parent_uuid=pf.uuid, type='vf'))
+        vf.create(self.context)
+        other = objects.Deployable(context=self.context, **dict(
+            fake_deployable.fake_db_deployable(id=3), host='other_host'))
+        other.create(self.context)
+
+        with mock.patch.object(
+                self.dbapi, 'attribute_get_by_deployable_ids',
+                wraps=self.dbapi.attribute_get_by_deployable_ids) as mock_get:
+            dpl_get_list = objects.Deployable.get_trees_by_host(
+                self.context, pf.host)
+            self.assertEqual(1, mock_get.call_count)
+        self.assertEqual([pf.uuid, vf.uuid],
+                         [d.uuid for d in dpl_get_list])
+        self.assertEqual(pf.uuid, dpl_get_list[1].root_uuid)
+
+        self.assertEqual([pf.uuid, vf.uuid],
+                         [d.uuid for d in objects.Deployable.get_tree(
+                             self.context, vf.uuid)])
+        self.assertRaises(exception.DeployableNotFound,
+                          objects.Deployable.get_tree, self.context,
+                          '00000000-0000-0000-0000-000000000000')
+
+    def test_list_loads_attributes_in_one_query(self):
+        db_acc = self.fake_accelerator
+        acc = objects.Accelerator(context=self.context,
+                                  **db_acc)
+        acc.create(self.context)
+        acc_get = objects.Accelerator.get(self.context, acc.uuid)
+
+        dpls = []
+        for db_dpl in (self.fake_deployable, self.fake_deployable2):
+            dpl = objects.Deployable(context=self.context,
+                                     **db_dpl)
+            dpl.accelerator_id = acc_get.id
+            dpl.create(self.context)
+            dpls.append(dpl)
+
+        db_attr = self.fake_attribute
+        attr = objects.Attribute(context=self.context,
+                                 **db_attr)
+        attr.deployable_id = dpls[1].id
+        attr.create(self.context)
+
+        with mock.patch.object(
+                self.dbapi, 'attribute_get_by_deployable_ids',
+                wraps=self.dbapi.attribute_get_by_deployable_ids) as mock_get:
+            dpl_get_list = objects.Deployable.list(self.context)
+            self.assertEqual(1, mock_get.call_count)
+
+        attrs = dict((d.uuid, d.attributes_list) for d in dpl_get_list)
+        self.assertEqual([], attrs[dpls[0].uuid])
+        self.assertEqual(1, len(attrs[dpls[1].uuid]))
+        self.assertEqual(attr.uuid, attrs[dpls[1].uuid][0].uuid)
+
+    def test_sync(self):
+        db_acc = self.fake_accelerator
+        acc = objects.Accelerator(context=self.context,
+                                  **db_acc)
+        acc.create(self.context)
+        acc_get = objects.Accelerator.get(self.context, acc.uuid)
+
+        old = objects.Deployable(context=self.context,
+                                 **self.fake_deployable)
+        old.accelerator_id = acc_get.id
+        old.create(self.context)
+        changed = objects.Deployable(context=self.context,
+                                     **self.fake_deployable2)
+        changed.accelerator_id = acc_get.id
+        changed.create(self.context)
+
+        pf = objects.Deployable(context=self.context,
+                                **fake_deployable.fake_db_deployable())
+        pf.accelerator_id = acc_get.id
+        vf = objects.Deployable(context=self.context,
+                                **fake_deployable.fake_db_deployable(
+                                    type='vf', parent_uuid=pf.uuid))
+        vf.accelerator_id = acc_get.id
+        changed.name = 'new_name'
+
+        generation = objects.Deployable.get_host_generation(self.context,
+                                                            'host_name')
+        dpls, new_generation = objects.Deployable.sync(
+            self.context, 'host_name', [pf, vf], [changed], [old.uuid],
+            generation)
+
+        self.assertEqual(set([changed.uuid, pf.uuid, vf.uuid]),
+                         set(d.uuid for d in dpls))
+        self.assertNotEqual(generation, new_generation)
+        self.assertEqual(new_generation,
+                         objects.Deployable.get_host_generation(
+                             self.context, 'host_name'))
+        self.assertRaises(exception.DeployableNotFound,
+                          objects.Deployable.get, self.context, old.uuid)
+        self.assertEqual('new_name', objects.Deployable.get(
+            self.context, changed.uuid).name)
+        vf_get = objects.Deployable.get(self.context, vf.uuid)
+        self.assertEqual(pf.uuid, vf_get.parent_uuid)
+        self.assertEqual(pf.uuid, vf_get.root_uuid)
+
+    def test_sync_rollback(self):
+        db_acc = self.fake_accelerator
+        acc = objects.Accelerator(context=self.context,
+                                  **db_acc)
+        acc.create(self.context)
+        acc_get = objects.Accelerator.get(self.context, acc.uuid)
+
+        old = objects.Deployable(context=self.context,
+                                 **self.fake_deployable)
+        old.accelerator_id = acc_get.id
+        old.create(self.context)
+        missing = objects.Deployable(context=self.context,
+                                     **self.fake_deployable2)
+        missing.obj_reset_changes()
+        missing.name = 'new_name'
+
+        self.assertRaises(exception.DeployableNotFound,
+                          objects.Deployable.sync, self.context,
+                          'host_name', [], [missing], [old.uuid])
+        self.assertEqual(old.uuid,
+                         objects.Deployable.get(self.context, old.uuid).uuid)
+
+    def test_sync_generation_conflict(self):
+        db_acc = self.fake_accelerator
+        acc = objects.Accelerator(context=self.context,
+                                  **db_acc)
+        acc.create(self.context)
+        acc_get = objects.Accelerator.get(self.context, acc.uuid)
+
+        old = objects.Deployable(context=self.context,
+                                 **self.fake_deployable)
+        old.accelerator_id = acc_get.id
+        old.create(self.context)
+        generation = objects.Deployable.get_host_generation(self.context,
+                                                            'host_name')
+        # Changed behind the back of the host.
+        old.name = 'new-name'
+        old.save(self.context)
+
+        self.assertRaises(exception.DeployableHostGenerationConflict,
+                          objects.Deployable.sync, self.context,
+                          'host_name', [], [], [old.uuid], generation)
+        self.assertEqual(old.uuid,
+                         objects.Deployable.get(self.context, old.uuid).uuid)
+
+    def test_sync_generation_conflict_new_host(self):
+        self.assertEqual(0, objects.Deployable.get_host_generation(
+            self.context, 'new-host'))
+        obj_utils.create_test_deployable(self.context, host='new-host')
+
+        self.assertRaises(exception.DeployableHostGenerationConflict,
+                          objects.Deployable.sync, self.context,
+                          'new-host', [], [], [], 0)
+
+    def test_host_generation_bumped_by_writes(self):
+        def assert_bumped(func, *args, **kwargs):
+            self._assert_host_generation_changed(1, func, *args, **kwargs)
+
+        created = obj_utils.create_test_deployable(self.context, host='host')
+        dep = objects.Deployable.get(self.context, created.uuid)
+        self.assertEqual(1, objects.Deployable.get_host_generation(
+            self.context, 'host'))
+        other = obj_utils.create_test_deployable(
+            self.context, name='other', host='other-host')
+
+        dep.name = 'new-name'
+        assert_bumped(dep.save, self.context)
+        assert_bumped(objects.Deployable.sync, self.context, 'host', [], [],
+                      [])
+        dep = objects.Deployable.get(self.context, dep.uuid)
+        assert_bumped(dep.destroy, self.context)
+        self.assertEqual(1, objects.Deployable.get_host_generation(
+            self.context, other.host))
+
+    def test_host_generation_unchanged_by_claims(self):
+        def assert_unchanged(func, *args, **kwargs):
+            self._assert_host_generation_changed(0, func, *args, **kwargs)
+
+        created = obj_utils.create_test_deployable(self.context, host='host')
+        dep = objects.Deployable.get(self.context, created.uuid)
+        instance_uuid = uuidutils.generate_uuid()
+
+        assert_unchanged(objects.Deployable.claim, self.context,
+                         instance_uuid, uuids=[dep.uuid])
+        assert_unchanged(objects.Deployable.release, self.context,
+                         instance_uuid)
+        assert_unchanged(objects.Deployable.claim, self.context,
+                         instance_uuid, filters={'host': 'host'})
+        dep = objects.Deployable.get(self.context, dep.uuid)
+        dep.availability = 'free'
+        dep.instance_uuid = None
+        assert_unchanged(dep.save, self.context)
+
+    def _assert_host_generation_changed(self, delta, func, *args, **kwargs):
+        generation = objects.Deployable.get_host_generation(self.context,
+                                                            'host')
+        func(*args, **kwargs)
+        self.assertEqual(generation + delta,
+                         objects.Deployable.get_host_generation(
+                             self.context, 'host'))
+
+    def _create_deployables(self, count, **kw):
+        return [obj_utils.create_test_deployable(
+            self.context, name='dep%d' % i, **kw) for i in range(count)]
+
+    def test_save_generation_conflict(self):
+        dep = obj_utils.create_test_deployable(self.context)
+        stale = objects.Deployable.get(self.context, dep.uuid)
+        objects.Deployable.claim(self.context, uuidutils.generate_uuid(),
+                                 uuids=[dep.uuid])
+
+        stale.name = 'new-name'
+        self.assertRaises(exception.DeployableGenerationConflict,
+                          stale.save, self.context)
+
+        gone = obj_utils.create_test_deployable(self.context, name='gone')
+        deleted = objects.Deployable.get(self.context, gone.uuid)
+        gone.destroy(self.context)
+        deleted.name = 'new-name'
+        self.assertRaises(exception.DeployableNotFound,
+                          deleted.save, self.context)
+
+        dep = objects.Deployable.get(self.context, dep.uuid)
+        dep.name = 'new-name'
+        dep.save(self.context)
+        self.assertEqual(stale.generation + 2, dep.generation)
+
+    def test_summary(self):
+        for i, (host, availability) in enumerate([
+                ('host0', 'free'), ('host0', 'free'), ('host0', 'claimed'),
+                ('host1', 'free')]):
+            obj_utils.create_test_deployable(
+                self.context, name='dep%d' % i, host=host,
+                availability=availability)
+
+        self.assertEqual(
+            [{'host': 'host0', 'availability': 'claimed', 'count': 1},
+             {'host': 'host0', 'availability': 'free', 'count': 2},
+             {'host': 'host1', 'availability': 'free', 'count': 1}],
+            objects.Deployable.summary(self.context,
+                                       ['host', 'availability']))
+        self.assertEqual(
+            [{'host': 'host0', 'count': 2}, {'host': 'host1', 'count': 1}],
+            objects.Deployable.summary(self.context, ['host'],
+                                       {'availability': 'free'}))
+        self.assertEqual([{'count': 4}],
+                         objects.Deployable.summary(self.context, []))
+        self.assertRaises(exception.InvalidParameterValue,
+                          objects.Deployable.summary, self.context,
+                          ['host', 'uuid'])
+
+    def test_changes_since(self):
+        deps = self._create_deployables(3)
+        timeutils.set_time_override(
+            timeutils.utcnow() + datetime.timedelta(minutes=1))
+        self.addCleanup(timeutils.clear_time_override)
+        since = timeutils.utcnow()
+
+        deps[0].name = 'new-name'
+        deps[0].save(self.context)
+        created = obj_utils.create_test_deployable(self.context, name='new')
+        deps[1].destroy(self.context)
+        objects.Deployable.sync(self.context, deps[2].host, [], [],
+                                [deps[2].uuid])
+
+        changed = [deps[0].uuid, created.uuid]
+        self.assertEqual(sorted(changed), sorted(
+            d.uuid for d in objects.Deployable.list(self.context,
+                                                    changes_since=since)))
+        self.assertEqual(sorted(changed), sorted(
+            d.uuid for d in objects.Deployable.stream(self.context,
+                                                      changes_since=since)))
+        deleted = objects.Deployable.get_deleted_since(self.context, since)
+        self.assertEqual([deps[1].uuid, deps[2].uuid],
+                         [d['uuid'] for d in deleted])
+        self.assertEqual([since] * 2, [d['deleted_at'] for d in deleted])
+        self.assertEqual([], objects.Deployable.get_deleted_since(
+            self.context, since, host='other_host'))
+
+        self.assertEqual(0, objects.Deployable.purge_deleted(self.context,
+                                                             since))
+        self.assertEqual(2, objects.Deployable.purge_deleted(
+            self.context, since + datetime.timedelta(seconds=1)))
+        self.assertEqual([], objects.Deployable.get_deleted_since(
+            self.context, since))
+
+    def test_claim(self):
+        deps = self._create_deployables(3)
+        instance_uuid = uuidutils.generate_uuid()
+
+        claimed = objects.Deployable.claim(
+            self.context, instance_uuid, uuids=[deps[0].uuid, deps[1].uuid])
+
+        self.assertEqual(set([deps[0].uuid, deps[1].uuid]),
+                         set(d.uuid for d in claimed))
+        for dep in claimed:
+            self.assertEqual('claimed', dep.availability)
+            self.assertEqual(instance_uuid, dep.instance_uuid)
+        self.assertEqual('free', objects.Deployable.get(
+            self.context, deps[2].uuid).availability)
+
+    def test_claim_not_available(self):
+        deps = self._create_deployables(2)
+        objects.Deployable.claim(self.context, uuidutils.generate_uuid(),
+                                 uuids=[deps[0].uuid])
+
+        # Nothing is claimed when one of the deployables is not free.
+        self.assertRaises(exception.DeployableNotAvailable,
+                          objects.Deployable.claim, self.context,
+                          uuidutils.generate_uuid(),
+                          uuids=[deps[0].uuid, deps[1].uuid])
+        dep = objects.Deployable.get(self.context, deps[1].uuid)
+        self.assertEqual('free', dep.availability)
+        self.assertIsNone(dep.instance_uuid)
+
+    def test_claim_by_filters(self):
+        deps = self._create_deployables(3, host='host1')
+        other = obj_utils.create_test_deployable(self.context, name='other',
+                                                 host='host2')
+        instance_uuid = uuidutils.generate_uuid()
+
+        claimed = objects.Deployable.claim(self.context, instance_uuid,
+                                           filters={'host': 'host1'},
+                                           count=2)
+        self.assertEqual(2, len(claimed))
+        self.assertTrue(set(d.uuid for d in claimed) <=
+                        set(d.uuid for d in deps))
+
+        # Only one free deployable is left on host1.
+        self.assertRaises(exception.DeployableClaimFailed,
+                          objects.Deployable.claim, self.context,
+                          uuidutils.generate_uuid(),
+                          filters={'host': 'host1'}, count=2)
+        self.assertEqual(1, len(objects.Deployable.list(
+            self.context, filters={'host': 'host1', 'availability': 'free'})))
+        self.assertEqual('free', objects.Deployable.get(
+            self.context, other.uuid).availability)
+
+    def test_release(self):
+        deps = self._create_deployables(3)
+        instance_uuid = uuidutils.generate_uuid()
+        objects.Deployable.claim(self.context, instance_uuid,
+                                 uuids=[d.uuid for d in deps[:2]])
+        objects.Deployable.claim(self.context, uuidutils.generate_uuid(),
+                                 uuids=[deps[2].uuid])
+
+        released = objects.Deployable.release(self.context, instance_uuid,
+                                              uuids=[deps[0].uuid])
+        self.assertEqual([deps[0].uuid], [d.uuid for d in released])
+        self.assertEqual('free', released[0].availability)
+        self.assertIsNone(released[0].instance_uuid)
+
+        released = objects.Deployable.release(self.context, instance_uuid)
+        self.assertEqual([deps[1].uuid], [d.uuid for d in released])
+        self.assertEqual([], objects.Deployable.release(self.context,
+                                                        instance_uuid))
+        self.assertEqual('claimed', objects.Deployable.get(
+            self.context, deps[2].uuid).availability)
+
 
 class TestDeployableObject(test_objects._LocalTest,
                            _TestDeployableObject):
@@ -161,6 +161,71 @@ class _TestPhysicalFunctionObject(DbTestCase):
         self.assertEqual(db_vf['uuid'],
                          pf_get_2.virtual_function_list[0].uuid)
 
+    def test_get_loads_tree_in_constant_queries(self):
+        db_acc = self.fake_accelerator
+        acc = objects.Accelerator(context=self.context,
+                                  **db_acc)
+        acc.create(self.context)
+        acc_get = objects.Accelerator.get(self.context, acc.uuid)
+        pfs = []
+        vfs = []
+        for i in range(2):
+            pf = objects.PhysicalFunction(
+                context=self.context,
+                **fake_physical_function.fake_db_physical_function(
+                    id=i + 1, pcie_address='00:7f:%02x.0' % i))
+            pf.accelerator_id = acc_get.id
+            pf.create(self.context)
+            pfs.append(pf)
+            for j in range(3):
+                vf = objects.VirtualFunction(
+                    context=self.context,
+                    **fake_virtual_function.fake_db_virtual_function(
+                        id=10 * (i + 1) + j, parent_uuid=pf.uuid,
+                        pcie_address='00:7f:%02x.%d' % (i, j + 1)))
+                vf.accelerator_id = acc_get.id
+                vf.create(self.context)
+                vfs.append(vf)
+        attr = objects.Attribute(context=self.context,
+                                 deployable_id=vfs[0].id,
+                                 key='attr_key', value='attr_val')
+        attr.create(self.context)
+
+        with mock.patch.object(
+                self.dbapi, 'deployable_get',
+                wraps=self.dbapi.deployable_get) as mock_get, \
+                mock.patch.object(
+                    self.dbapi, 'deployable_get_by_filters',
+                    wraps=self.dbapi.deployable_get_by_filters) as \
+                mock_filter, \
+                mock.patch.object(
+                    self.dbapi, 'attribute_get_by_deployable_ids',
+                    wraps=self.dbapi.attribute_get_by_deployable_ids) as \
+                mock_attrs:
+            pf_get = objects.PhysicalFunction.get(self.context, pfs[0].uuid)
+            self.assertEqual(1, mock_get.call_count)
+            self.assertEqual(1, mock_filter.call_count)
+            self.assertEqual(1, mock_attrs.call_count)
+
+            pf_get_list = objects.PhysicalFunction.get_by_filter(
+                self.context, {"vendor": pfs[0].vendor})
+            self.assertEqual(1, mock_get.call_count)
+            self.assertEqual(3, mock_filter.call_count)
+            self.assertEqual(2, mock_attrs.call_count)
+
+        self.assertEqual(set(vf.uuid for vf in vfs[:3]),
+                         set(vf.uuid for vf in pf_get.virtual_function_list))
+        vf_get = [vf for vf in pf_get.virtual_function_list
+                  if vf.uuid == vfs[0].uuid][0]
+        self.assertEqual(objects.VirtualFunction, type(vf_get))
+        self.assertEqual(['attr_key'],
+                         [a.key for a in vf_get.attributes_list])
+        self.assertEqual(2, len(pf_get_list))
+        for pf_get in pf_get_list:
+            self.assertEqual(
+                set(vf.uuid for vf in vfs if vf.parent_uuid == pf_get.uuid),
+                set(vf.uuid for vf in pf_get.virtual_function_list))
+
 
 class TestPhysicalFunctionObject(test_objects._LocalTest,
                                  _TestPhysicalFunctionObject):
@@ -39,3 +39,25 @@ def create_test_accelerator(ctxt, **kw):
     acc = get_test_accelerator(ctxt, **kw)
     acc.create(ctxt)
     return acc
+
+
+def get_test_deployable(ctxt, **kw):
+    """Return a Deployable object with appropriate attributes.
+
+    NOTE: The object leaves the attributes marked as changed, such
+    that a create() could be used to commit it to the DB.
+    """
+    test_dep = db_utils.get_test_deployable(**kw)
+    obj_dep = objects.Deployable(ctxt, **test_dep)
+    return obj_dep
+
+
+def create_test_deployable(ctxt, **kw):
+    """Create and return a test deployable object.
+
+    Create a deployable in the DB and return a Deployable object with
+    appropriate attributes.
+    """
+    dep = get_test_deployable(ctxt, **kw)
+    dep.create(ctxt)
+    return dep
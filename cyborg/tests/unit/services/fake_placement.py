@@ -0,0 +1,127 @@
+# Copyright (c) 2018 Huawei Technologies Co., Ltd
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""A fake placement WSGI app and a session wired to it."""
+
+import json
+
+from keystoneauth1 import session as ks_session
+from keystoneauth1 import token_endpoint
+import requests
+from requests import adapters
+import webob
+
+ENDPOINT = 'http://placement.test'
+
+INVENTORY_DEFAULTS = {'reserved': 0, 'min_unit': 1, 'step_size': 1,
+                      'allocation_ratio': 1.0}
+
+
+class FakePlacement(object):
+    """Implement the resource provider and inventory calls of placement.
+
+    The requests it got are recorded in calls as (method, path) tuples.
+    """
+
+    def __init__(self):
+        self.providers = {}
+        self.calls = []
+
+    def __call__(self, environ, start_response):
+        req = webob.Request(environ)
+        self.calls.append((req.method, req.path))
+        parts = req.path.strip('/').split('/')
+        try:
+            status, body = self._dispatch(req, parts)
+        except KeyError:
+            status, body = 404, {'errors': [{'status': 404,
+                                             'title': 'Not Found'}]}
+        resp = webob.Response(status=status, content_type='application/json')
+        if body is not None:
+            resp.text = json.dumps(body)
+        return resp(environ, start_response)
+
+    def _dispatch(self, req, parts):
+        if parts == ['resource_providers'] and req.method == 'POST':
+            data = req.json
+            if any(data['uuid'] == p['uuid'] or data['name'] == p['name']
+                   for p in self.providers.values()):
+                return 409, {'errors': [{'status': 409,
+                                         'title': 'Conflict'}]}
+            self.providers[data['uuid']] = {
+                'uuid': data['uuid'], 'name': data['name'], 'generation': 0,
+                'parent_provider_uuid': data.get('parent_provider_uuid'),
+                'inventories': {}}
+            return 201, None
+        provider = self.providers[parts[1]]
+        if len(parts) == 2 and req.method == 'GET':
+            return 200, dict((k, v) for k, v in provider.items()
+                             if k != 'inventories')
+        if parts[2:] == ['inventories']:
+            if req.method == 'PUT':
+                data = req.json
+                if data['resource_provider_generation'] != \
+                        provider['generation']:
+                    return 409, {'errors': [{'status': 409,
+                                             'title': 'Conflict'}]}
+                inventories = {}
+                for rc, inv in data['inventories'].items():
+                    inventories[rc] = dict(INVENTORY_DEFAULTS,
+                                           max_unit=inv['total'], **inv)
+                provider['inventories'] = inventories
+                provider['generation'] += 1
+            return 200, self._inventories(provider)
+        raise KeyError(req.path)
+
+    @staticmethod
+    def _inventories(provider):
+        return {'resource_provider_generation': provider['generation'],
+                'inventories': provider['inventories']}
+
+
+class WSGIAdapter(adapters.BaseAdapter):
+    """A requests transport adapter calling a WSGI app in process."""
+
+    def __init__(self, app):
+        super(WSGIAdapter, self).__init__()
+        self.app = app
+
+    def send(self, request, **kwargs):
+        body = request.body or b''
+        if not isinstance(body, bytes):
+            body = body.encode('utf-8')
+        wreq = webob.Request.blank(request.url, method=request.method,
+                                   headers=dict(request.headers), body=body)
+        wresp = wreq.get_response(self.app)
+        resp = requests.Response()
+        resp.status_code = wresp.status_code
+        resp.headers.update(wresp.headers)
+        resp._content = wresp.body
+        resp.url = request.url
+        resp.request = request
+        resp.reason = wresp.status.split(' ', 1)[-1]
+        return resp
+
+    def close(self):
+        pass
+
+
+def get_session(app):
+    """Return a keystoneauth session sending its requests to app."""
+    session = requests.Session()
+    session.mount(ENDPOINT, WSGIAdapter(app))
+    client = ks_session.Session(
+        auth=token_endpoint.Token(ENDPOINT, 'fake-token'), session=session)
+    client.additional_headers = {'accept': 'application/json'}
+    return client
@@ -12,7 +12,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import time
+
 from cyborg.tests import base
+from cyborg.tests.unit.services import fake_placement
 import mock
 from cyborg.services import report as placement_client
 from oslo_utils import uuidutils
@@ -123,3 +126,114 @@ class PlacementAPIClientTestCase(base.DietTestCase):
         self.assertRaises(c_exc.PlacementInventoryUpdateConflict,
                           self.client.update_inventory, rp_uuid,
                           expected_payload, resource_class)
+
+
+class ProviderTreeSyncTestCase(base.DietTestCase):
+    """Test the provider tree sync against a fake placement app."""
+
+    def setUp(self):
+        super(ProviderTreeSyncTestCase, self).setUp()
+        self.mock_load_auth_p = mock.patch(
+            'keystoneauth1.loading.load_auth_from_conf_options')
+        self.mock_load_auth_p.start()
+        self.addCleanup(self.mock_load_auth_p.stop)
+        self.placement = fake_placement.FakePlacement()
+        self.client = placement_client.SchedulerReportClient()
+        self.client._client = fake_placement.get_session(self.placement)
+        self.root = uuidutils.generate_uuid()
+        self.child = uuidutils.generate_uuid()
+        self.tree = [
+            {'uuid': self.root, 'name': 'host', 'inventories': {}},
+            {'uuid': self.child, 'name': 'host_fpga_0',
+             'parent_provider_uuid': self.root,
+             'inventories': {'CUSTOM_FPGA_INTEL': {'total': 2}}}]
+
+    def test_update_provider_tree(self):
+        self.assertEqual([self.child],
+                         self.client.update_provider_tree(self.tree))
+        child = self.placement.providers[self.child]
+        self.assertEqual(self.root, child['parent_provider_uuid'])
+        self.assertEqual(2, child['inventories']['CUSTOM_FPGA_INTEL'][
+            'total'])
+        self.assertEqual(1, child['generation'])
+
+    def test_update_provider_tree_unchanged(self):
+        self.client.update_provider_tree(self.tree)
+        del self.placement.calls[:]
+        self.assertEqual([], self.client.update_provider_tree(self.tree))
+        self.assertEqual([], self.placement.calls)
+
+    def test_update_provider_tree_one_put(self):
+        self.client.update_provider_tree(self.tree)
+        del self.placement.calls[:]
+        self.tree[1]['inventories'] = {'CUSTOM_FPGA_INTEL': {'total': 1},
+                                       'CUSTOM_FPGA_INTEL_VF': {'total': 4}}
+        self.assertEqual([self.child],
+                         self.client.update_provider_tree(self.tree))
+        self.assertEqual(
+            [('PUT', '/resource_providers/%s/inventories' % self.child)],
+            self.placement.calls)
+
+    def test_update_provider_tree_conflict(self):
+        self.client.update_provider_tree(self.tree)
+        # Someone else bumped the generation.
+        self.placement.providers[self.child]['generation'] += 1
+        self.tree[1]['inventories'] = {'CUSTOM_FPGA_INTEL': {'total': 1}}
+        self.assertEqual([self.child],
+                         self.client.update_provider_tree(self.tree))
+        self.assertEqual(1, self.placement.providers[self.child][
+            'inventories']['CUSTOM_FPGA_INTEL']['total'])
+
+    def test_update_provider_tree_conflict_again(self):
+        self.client.update_provider_tree(self.tree)
+        self.placement.providers[self.child]['generation'] += 1
+        self.tree[1]['inventories'] = {'CUSTOM_FPGA_INTEL': {'total': 1}}
+        with mock.patch.object(self.client, '_refresh_provider',
+                               return_value=True):
+            self.assertRaises(c_exc.PlacementInventoryUpdateConflict,
+                              self.client.update_provider_tree, self.tree)
+
+    def test_update_provider_tree_created_concurrently(self):
+        refresh = self.client._refresh_provider
+
+        def create_concurrently(rp_uuid):
+            # Created by someone else once looked up.
+            if rp_uuid == self.child and \
+                    self.child not in self.placement.providers:
+                self.placement.providers[self.child] = {
+                    'uuid': self.child, 'name': 'host_fpga_0',
+                    'generation': 3, 'parent_provider_uuid': self.root,
+                    'inventories': {}}
+                return False
+            return refresh(rp_uuid)
+
+        with mock.patch.object(self.client, '_refresh_provider',
+                               side_effect=create_concurrently):
+            self.assertEqual([self.child],
+                             self.client.update_provider_tree(self.tree))
+        child = self.placement.providers[self.child]
+        self.assertEqual(4, child['generation'])
+        self.assertEqual(2, child['inventories']['CUSTOM_FPGA_INTEL'][
+            'total'])
+
+    def test_update_provider_tree_name_conflict(self):
+        self.placement.providers['other'] = {
+            'uuid': 'other', 'name': 'host_fpga_0', 'generation': 0,
+            'parent_provider_uuid': None, 'inventories': {}}
+        self.assertRaises(c_exc.PlacementResourceProviderConflict,
+                          self.client.update_provider_tree, self.tree)
+
+    def test_update_provider_tree_cache_expired(self):
+        self.client.update_provider_tree(self.tree)
+        del self.placement.calls[:]
+        cfg.CONF.set_override('resource_provider_cache_ttl', 0,
+                              group='placement')
+        self.addCleanup(cfg.CONF.clear_override,
+                        'resource_provider_cache_ttl', group='placement')
+        with mock.patch.object(placement_client.time, 'time',
+                               return_value=time.time() + 1):
+            self.client.update_provider_tree(self.tree)
+        self.assertEqual(
+            [('GET', '/resource_providers/%s/inventories' % self.root),
+             ('GET', '/resource_providers/%s/inventories' % self.child)],
+            self.placement.calls)
@@ -0,0 +1,73 @@
+# Copyright 2018 Huawei Technologies Co.,LTD.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmark the per request overhead of cyborg-api.
+
+Sends GET /v1/accelerators/<uuid> requests to the pecan application,
+in process and without keystone, with and without the policy decision
+cache, and counts the policy evaluations and SQL queries per request.
+"""
+
+import mock
+from oslo_policy import policy as oslo_policy
+import webtest
+
+import utils
+
+from cyborg.api import app
+from cyborg.common import policy
+
+
+def main():
+    parser = utils.get_parser(__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=10,
+                        help='Number of distinct users sending requests.')
+    parser.add_argument('--cache-sizes', default='0,1000',
+                        help='Comma separated policy cache sizes.')
+    args = parser.parse_args()
+
+    engine = utils.setup_db(args.connection)
+    utils.seed_deployables(engine, 1)
+    uuid = engine.execute('SELECT uuid FROM accelerators').scalar()
+    test_app = webtest.TestApp(app.setup_app())
+    headers = [{'X-User-Id': 'user-%d' % i, 'X-Project-Id': 'project-%d' % i,
+                'X-Roles': 'admin'} for i in range(args.users)]
+
+    rows = []
+    for size in [int(s) for s in args.cache_sizes.split(',')]:
+        utils.CONF.set_override('policy_cache_size', size, group='api')
+        policy._ENFORCER = None
+        with mock.patch.object(oslo_policy.Enforcer, 'authorize',
+                               autospec=True,
+                               side_effect=oslo_policy.Enforcer.authorize
+                               ) as authorize:
+            elapsed = []
+            with utils.QueryCounter(engine) as counter:
+                with utils.timed(elapsed):
+                    for i in range(args.requests):
+                        test_app.get('/v1/accelerators/%s' % uuid,
+                                     headers=headers[i % args.users])
+        rows.append((size, args.requests,
+                     '%.2f' % (authorize.call_count / float(args.requests)),
+                     '%.2f' % (counter.count / float(args.requests)),
+                     '%.3f' % elapsed[0],
+                     '%.0f' % (args.requests / elapsed[0])))
+    utils.print_table(('cache size', 'requests', 'policy checks/request',
+                       'queries/request', 'seconds', 'requests/s'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# Copyright 2018 Huawei Technologies Co.,LTD.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmark streaming the deployable collection of cyborg-api.
+
+Sends GET /v1/deployables requests for the whole collection to the
+pecan application, in process and without keystone, with and without
+streaming, and measures the time to the first byte of the body and
+the peak memory allocated by a request.
+"""
+
+import time
+import tracemalloc
+
+import webtest
+
+import utils
+
+from cyborg.api import app
+
+
+def _get(test_app, count, headers):
+    started = time.time()
+    response = test_app.app(webtest.TestRequest.blank(
+        '/v1/deployables?limit=%d' % count, headers=headers).environ,
+        lambda status, headers, exc_info=None: None)
+    body = iter(response)
+    first = next(body)
+    first_byte = time.time() - started
+    size = len(first) + sum(len(chunk) for chunk in body)
+    if hasattr(response, 'close'):
+        response.close()
+    return first_byte, time.time() - started, size
+
+
+def main():
+    parser = utils.get_parser(__doc__)
+    parser.add_argument('--deployables', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help='Number of deployables fetched and sent at '
+                             'once when streaming.')
+    args = parser.parse_args()
+
+    engine = utils.setup_db(args.connection)
+    utils.seed_deployables(engine, args.deployables)
+    utils.CONF.set_override('max_limit', args.deployables, group='api')
+    utils.CONF.set_override('stream_batch_size', args.batch_size,
+                            group='api')
+    test_app = webtest.TestApp(app.setup_app())
+    headers = {'X-User-Id': 'user', 'X-Project-Id': 'project',
+               'X-Roles': 'admin'}
+
+    rows = []
+    for stream in (False, True):
+        utils.CONF.set_override('stream_collections', stream, group='api')
+        tracemalloc.start()
+        first_byte, elapsed, size = _get(test_app, args.deployables,
+                                         headers)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        rows.append((stream, args.deployables, size,
+                     '%.1f' % (peak / 1024.0 / 1024), '%.3f' % first_byte,
+                     '%.3f' % elapsed))
+    utils.print_table(('stream', 'deployables', 'bytes', 'peak MiB',
+                       'first byte seconds', 'seconds'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# Copyright 2018 Huawei Technologies Co.,LTD.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmark the conductor deployable query cache.
+
+Many concurrent readers call deployable_get, deployable_get_by_host and
+deployable_list on one ConductorManager, as cyborg-api would through
+RPC, with and without the query cache.
+"""
+
+import random
+import threading
+
+import utils
+
+from cyborg.common import constants
+from cyborg.conductor import manager
+
+
+def _reader(conductor, context, deployables, hosts, requests, seed):
+    rand = random.Random(seed)
+    for i in range(requests):
+        choice = rand.random()
+        if choice < 0.7:
+            conductor.deployable_get(context,
+                                     rand.choice(deployables)['uuid'])
+        elif choice < 0.98:
+            conductor.deployable_get_by_host(context, rand.choice(hosts))
+        else:
+            conductor.deployable_list(context)
+
+
+def main():
+    parser = utils.get_parser(__doc__)
+    parser.add_argument('--deployables', type=int, default=1000)
+    parser.add_argument('--hosts', type=int, default=20)
+    parser.add_argument('--readers', type=int, default=20,
+                        help='Number of concurrent readers.')
+    parser.add_argument('--requests', type=int, default=200,
+                        help='Number of requests per reader.')
+    parser.add_argument('--cache-sizes', default='0,1000',
+                        help='Comma separated conductor query cache sizes.')
+    args = parser.parse_args()
+
+    engine = utils.setup_db(args.connection)
+    context = utils.get_context()
+    hosts = ['host-%d' % i for i in range(args.hosts)]
+    deployables = []
+    for host in hosts:
+        deployables += utils.seed_deployables(
+            engine, args.deployables // args.hosts, host=host)
+
+    rows = []
+    for size in [int(s) for s in args.cache_sizes.split(',')]:
+        utils.CONF.set_override('query_cache_size', size, group='conductor')
+        conductor = manager.ConductorManager(constants.CONDUCTOR_TOPIC)
+        readers = [threading.Thread(target=_reader, args=(
+            conductor, context, deployables, hosts, args.requests, i))
+            for i in range(args.readers)]
+        elapsed = []
+        with utils.QueryCounter(engine) as counter:
+            with utils.timed(elapsed):
+                for reader in readers:
+                    reader.start()
+                for reader in readers:
+                    reader.join()
+        stats = conductor._query_cache.stats()
+        rows.append((size, args.readers * args.requests, counter.count,
+                     stats['hits'], stats['misses'], '%.3f' % elapsed[0],
+                     '%.0f' % (args.readers * args.requests / elapsed[0])))
+    utils.print_table(('cache size', 'requests', 'queries', 'hits',
+                       'misses', 'seconds', 'requests/s'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# Copyright 2018 Huawei Technologies Co.,LTD.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmark filtering deployables by their attributes.
+
+Compares the former outer join + OR filter (which returns a row per
+matching attribute) with the EXISTS filter, with and without the
+attributes (key, value, deployable_id) index.
+"""
+
+import sqlalchemy
+
+import utils
+
+from cyborg.db.sqlalchemy import api as sqlalchemy_api
+from cyborg.db.sqlalchemy import models
+
+INDEX = 'attributes_key_value_deployable_id_idx'
+
+
+def _outerjoin_or(context, attribute_filters):
+    query = sqlalchemy_api.model_query(context, models.Deployable)
+    query = query.outerjoin(models.Attribute)
+    query = query.filter(sqlalchemy.or_(*[
+        sqlalchemy.and_(models.Attribute.key == k, models.Attribute.value == v)
+        for k, v in attribute_filters.items()]))
+    return query.all()
+
+
+def _exists(context, attribute_filters):
+    return sqlalchemy_api.Connection(
+    ).deployable_get_by_filters_with_attributes(context,
+                                                dict(attribute_filters))
+
+
+def _index():
+    for index in models.Attribute.__table__.indexes:
+        if index.name == INDEX:
+            return index
+
+
+def main():
+    parser = utils.get_parser(__doc__)
+    parser.add_argument('--attributes', type=int, default=100000,
+                        help='Number of attributes to seed.')
+    parser.add_argument('--attrs-per-deployable', type=int, default=4)
+    args = parser.parse_args()
+
+    engine = utils.setup_db(args.connection)
+    context = utils.get_context()
+    utils.seed_deployables(engine,
+                           args.attributes // args.attrs_per_deployable,
+                           attrs_per_dpl=args.attrs_per_deployable)
+    # Every tenth deployable has these two attributes.
+    attribute_filters = {'key-0': 'value-3', 'key-1': 'value-3'}
+
+    rows = []
+    for indexed in (False, True):
+        index = _index()
+        if indexed:
+            index.create(engine)
+        else:
+            index.drop(engine)
+        for name, func in (('outerjoin + OR', _outerjoin_or),
+                           ('EXISTS', _exists)):
+            elapsed = []
+            with utils.timed(elapsed):
+                result = func(context, attribute_filters)
+            rows.append((name, indexed, len(result),
+                         len(set(d.id for d in result)),
+                         '%.3f' % elapsed[0]))
+    utils.print_table(('filter', 'indexed', 'rows', 'deployables',
+                       'seconds'), rows)
+
+
+if __name__ == '__main__':
+    main()
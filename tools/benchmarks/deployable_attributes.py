@@ -0,0 +1,64 @@
+# Copyright 2018 Huawei Technologies Co.,LTD.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmark loading the attributes of many deployables.
+
+Compares the former one-query-per-deployable attribute loading with the
+batched loading used by Deployable.list and Deployable.get_by_host.
+"""
+
+import utils
+
+from cyborg import objects
+
+
+def _per_deployable(context):
+    obj_dpls = objects.Deployable.list(context)
+    for obj_dpl in obj_dpls:
+        obj_dpl.attributes_list = objects.Attribute.get_by_filter(
+            context, {"deployable_id": obj_dpl.id})
+    return obj_dpls
+
+
+def main():
+    parser = utils.get_parser(__doc__)
+    parser.add_argument('--sizes', default='10,1000,10000',
+                        help='Comma separated numbers of deployables.')
+    args = parser.parse_args()
+
+    engine = utils.setup_db(args.connection)
+    context = utils.get_context()
+    rows = []
+    for size in [int(s) for s in args.sizes.split(',')]:
+        utils.reset_db(engine)
+        utils.seed_deployables(engine, size)
+        cases = [
+            ('per-deployable', lambda: _per_deployable(context)),
+            ('list', lambda: objects.Deployable.list(context)),
+            ('get_by_host',
+             lambda: objects.Deployable.get_by_host(context, 'host-0')),
+        ]
+        for name, func in cases:
+            elapsed = []
+            with utils.QueryCounter(engine) as counter:
+                with utils.timed(elapsed):
+                    func()
+            rows.append((size, name, counter.count,
+                         '%.3f' % elapsed[0]))
+    utils.print_table(('deployables', 'loader', 'queries', 'seconds'), rows)
+
+
+if __name__ == '__main__':
+    main()
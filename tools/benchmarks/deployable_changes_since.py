@@ -0,0 +1,71 @@
+# Copyright 2018 Huawei Technologies Co.,LTD.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmark polling the deployables for changes.
+
+Compares a poller listing all the deployables with one asking only for
+the deployables created, updated and deleted since its last poll.
+"""
+
+from oslo_utils import timeutils
+
+import utils
+
+from cyborg.db.sqlalchemy import api as sqlalchemy_api
+from cyborg.db.sqlalchemy import models
+from cyborg import objects
+
+
+def _full(context, since):
+    return len(objects.Deployable.list(context)), 0
+
+
+def _changes_since(context, since):
+    return (len(objects.Deployable.list(context, changes_since=since)),
+            len(objects.Deployable.get_deleted_since(context, since)))
+
+
+def main():
+    parser = utils.get_parser(__doc__)
+    parser.add_argument('--deployables', type=int, default=100000)
+    parser.add_argument('--changes', type=int, default=100,
+                        help='Number of deployables updated and deleted '
+                             'since the last poll.')
+    args = parser.parse_args()
+
+    engine = utils.setup_db(args.connection)
+    context = utils.get_context()
+    dpls = utils.seed_deployables(engine, args.deployables)
+
+    since = timeutils.utcnow()
+    step = args.deployables // args.changes
+    engine.execute(models.Deployable.__table__.update().where(
+        models.Deployable.id % step == 0).values(updated_at=since))
+    conn = sqlalchemy_api.Connection()
+    for dpl in dpls[1::step][:args.changes]:
+        conn.deployable_delete(context, dpl['uuid'])
+
+    rows = []
+    for name, func in (('full list', _full),
+                       ('changes_since', _changes_since)):
+        elapsed = []
+        with utils.timed(elapsed):
+            changed, deleted = func(context, since)
+        rows.append((name, changed, deleted, '%.3f' % elapsed[0]))
+    utils.print_table(('poll', 'deployables', 'deleted', 'seconds'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+# Copyright 2018 Huawei Technologies Co.,LTD.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmark concurrent deployable claims.
+
+Many claimers claim free deployables of one host at the same time:
+
+* ``lock``: each claimer selects free deployables and updates them while
+  holding a process-local lock, as a single cyborg service would have to
+  without a DB-level claim. It cannot work across services.
+* ``unlocked``: the same without the lock, which claims some deployables
+  twice.
+* ``cas``: deployable_claim_by_filters, the conditional UPDATE
+  compare-and-swap.
+
+The claimers are native threads, and the default database is a SQLite
+file since an in-memory one is not shared by their connections. SQLite
+fails the transactions which read before writing when another one
+writes, so they take its write lock when they begin instead: SQLite then
+runs all the claims one after another, use --connection to run them on
+a MySQL or PostgreSQL database.
+"""
+
+import collections
+import os
+import tempfile
+
+import eventlet
+from oslo_utils import uuidutils
+import sqlalchemy
+
+import utils
+
+from cyborg.db.sqlalchemy import api as sqlalchemy_api
+from cyborg.db.sqlalchemy import models
+
+threading = eventlet.patcher.original('threading')
+
+_LOCK = threading.Lock()
+
+
+def _select_and_update(context, instance_uuid, count):
+    with sqlalchemy_api._session_for_write():
+        deps = sqlalchemy_api.model_query(
+            context, models.Deployable).filter_by(
+            availability='free').limit(count).all()
+        for dep in deps:
+            dep.update({'availability': 'claimed',
+                        'instance_uuid': instance_uuid})
+    return deps
+
+
+def _claim_locked(context, instance_uuid, count):
+    with _LOCK:
+        return _select_and_update(context, instance_uuid, count)
+
+
+def _claim_cas(context, instance_uuid, count):
+    return sqlalchemy_api.Connection().deployable_claim_by_filters(
+        context, instance_uuid, {'host': 'host-0'}, count)
+
+
+def _sqlite_begin_immediate(engine):
+    # oslo.db begins the SQLite transactions with a plain BEGIN.
+    @sqlalchemy.event.listens_for(engine, 'before_cursor_execute',
+                                  retval=True)
+    def begin_immediate(conn, cursor, statement, parameters, context,
+                        executemany):
+        if statement == 'BEGIN':
+            statement = 'BEGIN IMMEDIATE'
+        return statement, parameters
+
+
+def _claimer(claim, context, index, claims, count, claimed, failures):
+    for i in range(claims):
+        try:
+            deps = claim(context, uuidutils.generate_uuid(), count)
+        except Exception:
+            failures.append(index)
+            continue
+        claimed.extend(dep.uuid for dep in deps)
+
+
+def main():
+    parser = utils.get_parser(__doc__)
+    parser.set_defaults(connection=None)
+    parser.add_argument('--claimers', type=int, default=100,
+                        help='Number of concurrent claimers.')
+    parser.add_argument('--claims', type=int, default=10,
+                        help='Number of claims per claimer.')
+    parser.add_argument('--devices', type=int, default=2,
+                        help='Number of deployables per claim.')
+    args = parser.parse_args()
+
+    tmp = None
+    if not args.connection:
+        fd, tmp = tempfile.mkstemp(suffix='.sqlite')
+        os.close(fd)
+        args.connection = 'sqlite:///%s' % tmp
+    engine = utils.setup_db(args.connection)
+    if engine.name == 'sqlite':
+        _sqlite_begin_immediate(engine)
+    context = utils.get_context()
+    total = args.claimers * args.claims * args.devices
+
+    rows = []
+    try:
+        for name, claim in (('lock', _claim_locked),
+                            ('unlocked', _select_and_update),
+                            ('cas', _claim_cas)):
+            utils.reset_db(engine)
+            utils.seed_deployables(engine, total, attrs_per_dpl=0)
+            claimed = []
+            failures = []
+            claimers = [threading.Thread(target=_claimer, args=(
+                claim, context, i, args.claims, args.devices, claimed,
+                failures)) for i in range(args.claimers)]
+            elapsed = []
+            with utils.timed(elapsed):
+                for claimer in claimers:
+                    claimer.start()
+                for claimer in claimers:
+                    claimer.join()
+            counts = collections.Counter(claimed)
+            rows.append((name, args.claimers * args.claims, len(failures),
+                         len(counts),
+                         sum(1 for c in counts.values() if c > 1),
+                         '%.3f' % elapsed[0],
+                         '%.0f' % (args.claimers * args.claims / elapsed[0])))
+    finally:
+        if tmp:
+            os.unlink(tmp)
+    utils.print_table(('claim', 'claims', 'failed', 'claimed',
+                       'claimed twice', 'seconds', 'claims/s'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+# Copyright 2018 Huawei Technologies Co.,LTD.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmark the deployables host and capacity indexes.
+
+Seeds deployables spread over many hosts, then times the queries the
+agents and the schedulers run on them and checks their EXPLAIN plans,
+with and without the (host, availability, type) and (vendor, type,
+availability) indexes. Exits with 1 if an indexed query does not use its
+index.
+"""
+
+import sys
+
+from sqlalchemy import func
+
+import utils
+
+from cyborg.db.sqlalchemy import api as sqlalchemy_api
+from cyborg.db.sqlalchemy import models
+
+HOST_INDEX = 'deployables_host_availability_type_idx'
+CAPACITY_INDEX = 'deployables_vendor_type_availability_idx'
+VENDORS = ('Xilinx', 'Intel')
+
+
+def _capacity(context, **filters):
+    return sqlalchemy_api.model_query(
+        context, models.Deployable,
+        func.count(models.Deployable.id)).filter_by(**filters).scalar()
+
+
+def _queries(context, host):
+    conn = sqlalchemy_api.Connection()
+    return (
+        ('get_by_host', HOST_INDEX,
+         lambda: conn.deployable_get_by_host(context, host)),
+        ('get_trees_by_host', HOST_INDEX,
+         lambda: conn.deployable_get_trees_by_host(context, host)),
+        ('claim candidates', HOST_INDEX,
+         lambda: conn.deployable_get_by_filters_with_attributes(
+             context, {'host': host, 'availability': 'free', 'type': 'vf'})),
+        ('capacity', CAPACITY_INDEX,
+         lambda: _capacity(context, vendor='Intel', type='vf',
+                           availability='free')),
+    )
+
+
+def _indexes():
+    return [index for index in models.Deployable.__table__.indexes
+            if index.name in (HOST_INDEX, CAPACITY_INDEX)]
+
+
+def main():
+    parser = utils.get_parser(__doc__)
+    parser.add_argument('--deployables', type=int, default=100000)
+    parser.add_argument('--hosts', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=20,
+                        help='Number of times each query is run.')
+    args = parser.parse_args()
+
+    engine = utils.setup_db(args.connection)
+    context = utils.get_context()
+    hosts = ['host-%d' % i for i in range(args.hosts)]
+    for i, host in enumerate(hosts):
+        # A PF and 3 VFs per device, a third of them claimed.
+        utils.seed_deployables(engine, args.deployables // args.hosts,
+                               host=host, attrs_per_dpl=0, vfs_per_pf=3,
+                               vendor=VENDORS[i % len(VENDORS)])
+    engine.execute(models.Deployable.__table__.update().where(
+        models.Deployable.id % 3 == 0).values(availability='claimed'))
+
+    rows = []
+    missing = []
+    for indexed in (False, True):
+        for index in _indexes():
+            if indexed:
+                index.create(engine)
+            else:
+                index.drop(engine)
+        for name, expected, run in _queries(context, hosts[1]):
+            elapsed = []
+            with utils.QueryCounter(engine) as counter:
+                with utils.timed(elapsed):
+                    for i in range(args.repeat):
+                        run()
+            # Skip the connection pings, the attributes are loaded by a
+            # second query.
+            plan = utils.explain(engine, *[
+                s for s in counter.statements if 'FROM deployables' in s[0]
+            ][0])
+            if indexed and expected not in plan:
+                missing.append(name)
+            rows.append((name, indexed,
+                         '%.2f' % (elapsed[0] / args.repeat * 1000), plan))
+    utils.print_table(('query', 'indexed', 'ms/query', 'plan'), rows)
+    if missing:
+        print('Not using their index: %s' % ', '.join(missing))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+# Copyright 2018 Huawei Technologies Co.,LTD.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmark counting the free VFs per host and vendor.
+
+Compares listing all the deployables and counting them on the client
+side, as the capacity dashboards had to, with the GROUP BY query behind
+GET /v1/deployables/summary.
+"""
+
+import collections
+
+import utils
+
+from cyborg import objects
+
+VENDORS = ('Xilinx', 'Intel')
+GROUP_BY = ['host', 'vendor']
+FILTERS = {'type': 'vf', 'availability': 'free'}
+
+
+def _list_and_count(context):
+    counts = collections.Counter(
+        (dep.host, dep.vendor)
+        for dep in objects.Deployable.list(context, filters=dict(FILTERS)))
+    return [{'host': host, 'vendor': vendor, 'count': count}
+            for (host, vendor), count in sorted(counts.items())]
+
+
+def _summary(context):
+    return objects.Deployable.summary(context, GROUP_BY, FILTERS)
+
+
+def main():
+    parser = utils.get_parser(__doc__)
+    parser.add_argument('--deployables', type=int, default=100000)
+    parser.add_argument('--hosts', type=int, default=500)
+    args = parser.parse_args()
+
+    engine = utils.setup_db(args.connection)
+    context = utils.get_context()
+    for i in range(args.hosts):
+        utils.seed_deployables(engine, args.deployables // args.hosts,
+                               host='host-%d' % i, vfs_per_pf=3,
+                               vendor=VENDORS[i % len(VENDORS)])
+
+    rows = []
+    results = []
+    for name, func in (('list + count', _list_and_count),
+                       ('summary', _summary)):
+        elapsed = []
+        with utils.QueryCounter(engine) as counter:
+            with utils.timed(elapsed):
+                result = func(context)
+        results.append(result)
+        rows.append((name, len(result), counter.count, '%.3f' % elapsed[0]))
+    utils.print_table(('method', 'groups', 'queries', 'seconds'), rows)
+    assert results[0] == results[1]
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+# Copyright 2018 Huawei Technologies Co.,LTD.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Helpers shared by the cyborg DB benchmarks.
+
+The benchmarks run against the database configured by ``--connection``
+(an in-memory SQLite database by default). Run them from the top of the
+source tree with cyborg importable, e.g. inside a tox venv::
+
+    python tools/benchmarks/deployable_attributes.py
+"""
+
+import argparse
+import contextlib
+import time
+
+from oslo_config import cfg
+from oslo_context import context
+from oslo_db import options
+from oslo_db.sqlalchemy import enginefacade
+from oslo_utils import uuidutils
+import sqlalchemy
+
+from cyborg.common import config as cyborg_config
+from cyborg.db.sqlalchemy import models
+from cyborg import objects
+
+
+CONF = cfg.CONF
+
+
+def get_parser(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--connection', default='sqlite://',
+                        help='SQLAlchemy URL of the database to seed and '
+                             'query. Defaults to an in-memory SQLite.')
+    return parser
+
+
+def setup_db(connection):
+    """Configure cyborg to use the given DB and create the schema."""
+    options.set_defaults(CONF, connection=connection)
+    cyborg_config.parse_args([], default_config_files=[])
+    objects.register_all()
+    engine = enginefacade.writer.get_engine()
+    reset_db(engine)
+    return engine
+
+
+def reset_db(engine):
+    models.Base.metadata.drop_all(engine)
+    models.Base.metadata.create_all(engine)
+
+
+def get_context():
+    return context.get_admin_context()
+
+
+def seed_deployables(engine, count, host='host-0', attrs_per_dpl=2,
+                     vfs_per_pf=0, **dpl_values):
+    """Bulk insert ``count`` deployables and their attributes.
+
+    When ``vfs_per_pf`` is set, every ``vfs_per_pf + 1`` deployables form a
+    PF with its VFs.
+    """
+    acc_id = engine.execute(models.Accelerator.__table__.insert(), {
+        'uuid': uuidutils.generate_uuid(), 'name': 'bench-acc',
+        'device_type': 'FPGA', 'acc_type': 'crypto',
+        'acc_capability': 'aes', 'vendor_id': '0x8086',
+        'product_id': '0xbcc0', 'remotable': 0}).inserted_primary_key[0]
+
+    first_id = (engine.execute(sqlalchemy.select(
+        [sqlalchemy.func.max(models.Deployable.id)])).scalar() or 0) + 1
+    dpls = []
+    attrs = []
+    pf_uuid = None
+    for i in range(count):
+        dpl_uuid = uuidutils.generate_uuid()
+        is_pf = vfs_per_pf == 0 or i % (vfs_per_pf + 1) == 0
+        if is_pf:
+            pf_uuid = dpl_uuid
+        dpl = {
+            'id': first_id + i,
+            'uuid': dpl_uuid,
+            'name': 'dpl-%d' % i,
+            'parent_uuid': None if is_pf else pf_uuid,
+            'root_uuid': pf_uuid,
+            'pcie_address': '0000:%02x:%02x.%d' % (
+                i // 2048 % 256, i // 8 % 256, i % 8),
+            'host': host,
+            'board': 'KU115',
+            'vendor': 'Xilinx',
+            'version': '1.0',
+            'type': 'pf' if is_pf else 'vf',
+            'assignable': True,
+            'instance_uuid': None,
+            'availability': 'free',
+            'accelerator_id': acc_id,
+        }
+        dpl.update(dpl_values)
+        dpls.append(dpl)
+        for j in range(attrs_per_dpl):
+            attrs.append({'uuid': uuidutils.generate_uuid(),
+                          'deployable_id': dpl['id'],
+                          'key': 'key-%d' % j,
+                          'value': 'value-%d' % (i % 10)})
+    if dpls:
+        engine.execute(models.Deployable.__table__.insert(), dpls)
+    if attrs:
+        engine.execute(models.Attribute.__table__.insert(), attrs)
+    return dpls
+
+
+class QueryCounter(object):
+    """Count the SQL statements sent to an engine.
+
+    The (statement, parameters) sent are kept in ``statements``.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+        self.statements = []
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters,
+                               *args):
+        self.count += 1
+        self.statements.append((statement, parameters))
+
+    def __enter__(self):
+        self.count = 0
+        self.statements = []
+        sqlalchemy.event.listen(self.engine, 'before_cursor_execute',
+                                self._before_cursor_execute)
+        return self
+
+    def __exit__(self, *exc):
+        sqlalchemy.event.remove(self.engine, 'before_cursor_execute',
+                                self._before_cursor_execute)
+
+
+def explain(engine, statement, parameters):
+    """Return the query plan of a statement as a one line string."""
+    if engine.dialect.name == 'sqlite':
+        rows = engine.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+        return '; '.join(row[-1] for row in rows)
+    rows = engine.execute('EXPLAIN ' + statement, parameters)
+    if engine.dialect.name == 'mysql':
+        return '; '.join('%s %s key=%s' % (row['table'], row['type'],
+                                           row['key']) for row in rows)
+    return '; '.join(row[0].strip() for row in rows)
+
+
+@contextlib.contextmanager
+def timed(result):
+    start = time.time()
+    yield
+    result.append(time.time() - start)
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(r[i])) for r in [headers] + rows)
+              for i in range(len(headers))]
+    fmt = '  '.join('%%-%ds' % w for w in widths)
+    print(fmt % tuple(headers))
+    for row in rows:
+        print(fmt % tuple(row))